@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+# Allow direct execution
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import argparse
+import contextlib
+import time
+
+from test.test_aes import TestAES
+from yt_dlp.aes import (
+    _cbc_decrypt,
+    _ctr_crypt,
+    _gcm_decrypt_and_verify,
+    aes_cbc_encrypt_bytes,
+    aes_decrypt,
+    key_expansion,
+    xor,
+)
+from yt_dlp.utils import bytes_to_intlist, intlist_to_bytes
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the native AES implementation')
+    parser.add_argument(
+        '-s', '--size', type=int, default=1024, help='size of the data to decrypt in KiB (default: 1024)')
+    return parser.parse_args()
+
+
+def reference_cbc_decrypt(data, key, iv):
+    """ The block-by-block implementation on lists of bytes, for comparison """
+    data, key, iv = map(bytes_to_intlist, (data, key, iv))
+    expanded_key = key_expansion(key)
+    decrypted_data, previous_cipher_block = [], iv
+    for i in range(0, len(data), 16):
+        block = data[i: i + 16]
+        decrypted_data += xor(aes_decrypt(block, expanded_key), previous_cipher_block)
+        previous_cipher_block = block
+    return intlist_to_bytes(decrypted_data)
+
+
+def throughput(func, data, *args):
+    start = time.perf_counter()
+    result = func(data, *args)
+    return result, len(data) / (time.perf_counter() - start) / 1024 / 1024
+
+
+def main():
+    args = parse_args()
+    vectors = TestAES()
+    vectors.setUp()
+    key, iv = bytes(vectors.key), bytes(vectors.iv)
+    data = vectors.secret_msg * (args.size * 1024 // len(vectors.secret_msg))
+    encrypted = aes_cbc_encrypt_bytes(data, key, iv)
+
+    # The reference implementation is too slow to run on all of the data
+    sample = encrypted[:64 * 1024]
+    result, reference_speed = throughput(reference_cbc_decrypt, sample, key, iv)
+    assert result == data[:len(sample)]
+    print(f'{"cbc (reference)":<20}{reference_speed:>10.2f} MiB/s')
+
+    result, speed = throughput(_cbc_decrypt, encrypted, key, iv)
+    assert result[:len(data)] == data
+    print(f'{"cbc":<20}{speed:>10.2f} MiB/s{speed / reference_speed:>8.1f}x')
+
+    result, speed = throughput(_ctr_crypt, data, key, iv)
+    assert _ctr_crypt(result, key, iv) == data
+    print(f'{"ctr":<20}{speed:>10.2f} MiB/s')
+
+    nonce = iv[:12]
+    tag = b'\xe8&I\x80rI\x07\x9d}YWuU@:e'
+    ciphertext = b'\x159Y\xcf5eud\x90\x9c\x85&]\x14\x1d\x0f.\x08\xb4T\xe4/\x17\xbd'
+    assert _gcm_decrypt_and_verify(ciphertext, key, tag, nonce).startswith(vectors.secret_msg)
+    # The tag will not match, but it is only checked after the data has been decrypted and hashed
+    start = time.perf_counter()
+    with contextlib.suppress(ValueError):
+        _gcm_decrypt_and_verify(data, key, tag, nonce)
+    print(f'{"gcm":<20}{len(data) / (time.perf_counter() - start) / 1024 / 1024:>10.2f} MiB/s')
+
+
+if __name__ == '__main__':
+    main()
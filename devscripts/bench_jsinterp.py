@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+# Allow direct execution
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import argparse
+import contextlib
+import time
+import urllib.request
+
+from test.test_youtube_signature import _NSIG_TESTS, _SIG_TESTS, n_sig, signature
+from yt_dlp.extractor import YoutubeIE
+from yt_dlp.jsinterp import JSInterpreter
+
+_cached_split = JSInterpreter.__dict__['_split_cached']
+
+TESTDATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test', 'testdata', 'sigs')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark JSInterpreter on the players from test/test_youtube_signature.py')
+    parser.add_argument(
+        '-k', metavar='PLAYER', help='only run the cases with a player ID containing PLAYER')
+    parser.add_argument(
+        '-n', '--repeat', type=int, default=3, help='number of runs per case; the fastest is reported (default: 3)')
+    return parser.parse_args()
+
+
+def load_player(name, url):
+    fn = os.path.join(TESTDATA_DIR, f'player-{name}-{YoutubeIE._extract_player_info(url)}.js')
+    if not os.path.exists(fn):
+        os.makedirs(TESTDATA_DIR, exist_ok=True)
+        urllib.request.urlretrieve(url, fn)
+    with open(fn, encoding='utf-8') as f:
+        return f.read()
+
+
+@contextlib.contextmanager
+def uncached():
+    JSInterpreter._split_cached = JSInterpreter.__dict__['_split']
+    try:
+        yield
+    finally:
+        JSInterpreter._split_cached = _cached_split
+
+
+def measure(func, jscode, sig_input, expected, repeat):
+    timings = []
+    for _ in range(repeat):
+        # Each run starts cold, as a new process would
+        _cached_split.__func__.cache_clear()
+        start = time.perf_counter()
+        result = func(jscode, sig_input)
+        timings.append(time.perf_counter() - start)
+        if result != expected:
+            raise AssertionError(f'Expected {expected!r}, got {result!r}')
+    return min(timings)
+
+
+def main():
+    args = parse_args()
+    total_uncached = total_cached = 0
+    print(f'{"case":<32}{"uncached":>12}{"cached":>12}{"speedup":>10}')
+    for name, func, tests in (('signature', signature, _SIG_TESTS), ('nsig', n_sig, _NSIG_TESTS)):
+        for url, sig_input, expected in tests:
+            player_id = YoutubeIE._extract_player_info(url)
+            if args.k and args.k not in player_id:
+                continue
+            jscode = load_player(name, url)
+            with uncached():
+                time_uncached = measure(func, jscode, sig_input, expected, args.repeat)
+            time_cached = measure(func, jscode, sig_input, expected, args.repeat)
+            total_uncached += time_uncached
+            total_cached += time_cached
+            print(f'{f"{name} {player_id}":<32}{time_uncached * 1000:>10.1f}ms'
+                  f'{time_cached * 1000:>10.1f}ms{time_uncached / time_cached:>9.2f}x')
+
+    if total_cached:
+        print(f'{"total":<32}{total_uncached * 1000:>10.1f}ms'
+              f'{total_cached * 1000:>10.1f}ms{total_uncached / total_cached:>9.2f}x')
+
+
+if __name__ == '__main__':
+    main()
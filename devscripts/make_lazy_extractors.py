@@ -8,10 +8,16 @@
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+import collections
 from inspect import getsource
 
 from devscripts.utils import get_filename_args, read_file, write_file
 
+try:
+    import re._parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
 NO_ATTR = object()
 STATIC_CLASS_PROPERTIES = [
     'IE_NAME', '_ENABLED', '_VALID_URL',  # Used for URL matching
@@ -30,7 +36,8 @@
 class {name}({bases}):
     _module = {module!r}
 '''
-MODULE_TEMPLATE = read_file('devscripts/lazy_load_template.py')
+URL_INDEX_NGRAM_SIZE = 4
+_REPEAT_OPS = {sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, getattr(sre_parse, 'POSSESSIVE_REPEAT', None)}
 
 
 def main():
@@ -46,13 +53,15 @@ def main():
     # Filter out plugins
     _ALL_CLASSES = [cls for cls in _ALL_CLASSES if not cls.__module__.startswith(f'{yt_dlp.plugins.PACKAGE_NAME}.')]
 
+    url_index_size, url_index, url_indexed_ie_keys = build_url_index(_ALL_CLASSES)
     DummyInfoExtractor = type('InfoExtractor', (InfoExtractor,), {'IE_NAME': NO_ATTR})
     module_src = '\n'.join((
-        MODULE_TEMPLATE,
+        read_file('devscripts/lazy_load_template.py'),
         '    _module = None',
         *extra_ie_code(DummyInfoExtractor),
         '\nclass LazyLoadSearchExtractor(LazyLoadExtractor):\n    pass\n',
         *build_ies(_ALL_CLASSES, (InfoExtractor, SearchInfoExtractor), DummyInfoExtractor),
+        f'\n_URL_INDEX = ({url_index_size}, {url_index!r}, frozenset({sorted(url_indexed_ie_keys)!r}))',
     ))
 
     write_file(lazy_extractors_filename, f'{module_src}\n')
@@ -128,5 +137,85 @@ def build_lazy_ie(ie, name, attr_base):
     return s + '\n'.join(extra_ie_code(ie, attr_base))
 
 
+def build_url_index(ies):
+    """
+    Build an index of the extractors by the substrings that any URL they match must contain
+
+    Returns (n, {ngram: ie_keys}, indexed_ie_keys), where the ngrams are lowercase and
+    of length n. An ASCII URL can only be matched by the indexed extractors that are listed
+    under one of the ngrams of the lowercased URL. See yt_dlp.extractor.url_index_candidates
+    """
+    from yt_dlp.extractor.common import InfoExtractor
+    from yt_dlp.utils import variadic
+
+    def ngrams(literal):
+        return (literal[i:i + URL_INDEX_NGRAM_SIZE] for i in range(len(literal) - URL_INDEX_NGRAM_SIZE + 1))
+
+    requirements = {}
+    for ie in ies:
+        # Extractors with a custom `suitable` may match URLs that `_VALID_URL` does not
+        if (ie.suitable.__func__ is not InfoExtractor.suitable.__func__
+                or ie._match_valid_url.__func__ is not InfoExtractor._match_valid_url.__func__
+                or ie.ie_key() != ie.__name__[:-2] or not ie._VALID_URL):
+            continue
+        clauses = [required_literals(regex) for regex in variadic(ie._VALID_URL)]
+        if all(clauses):
+            requirements[ie.ie_key()] = clauses
+
+    # Prefer the ngrams that are shared by the fewest extractors
+    frequency = collections.Counter()
+    for clauses in requirements.values():
+        frequency.update({
+            ngram for regex_clauses in clauses for clause in regex_clauses
+            for literal in clause for ngram in ngrams(literal)})
+    rarest_ngram = lambda literal: min(ngrams(literal), key=lambda ngram: (frequency[ngram], ngram))
+
+    index = collections.defaultdict(list)
+    for ie_key, clauses in requirements.items():
+        keys = set()
+        for regex_clauses in clauses:
+            clause = min(regex_clauses, key=lambda clause: sum(frequency[rarest_ngram(lit)] for lit in clause))
+            keys.update(map(rarest_ngram, clause))
+        for ngram in keys:
+            index[ngram].append(ie_key)
+    return (
+        URL_INDEX_NGRAM_SIZE,
+        {ngram: tuple(index[ngram]) for ngram in sorted(index)},
+        frozenset(requirements))
+
+
+def required_literals(regex, parsed=None):
+    """
+    Return a list of sets of lowercase ASCII strings such that every match of the
+    regex contains one of the strings of each set (ignoring case)
+    """
+    clauses, run = [], []
+
+    def end_run():
+        if len(run) >= URL_INDEX_NGRAM_SIZE:
+            clauses.append({''.join(run).lower()})
+        run.clear()
+
+    for op, av in sre_parse.parse(regex) if parsed is None else parsed:
+        if op is sre_parse.IN and len(av) == 1:  # eg: [.]
+            op, av = av[0]
+        if op is sre_parse.LITERAL and chr(av).isascii():
+            run.append(chr(av))
+            continue
+        end_run()
+        if op is sre_parse.SUBPATTERN:
+            clauses.extend(required_literals(None, av[-1]))
+        elif op in _REPEAT_OPS and av[0] >= 1:
+            clauses.extend(required_literals(None, av[2]))
+        elif op is sre_parse.BRANCH:
+            alternatives = [required_literals(None, branch) for branch in av[1]]
+            if all(alternatives):
+                clauses.append(set().union(*(
+                    min(alternative, key=lambda clause: (len(clause), -min(map(len, clause))))
+                    for alternative in alternatives)))
+    end_run()
+    return clauses
+
+
 if __name__ == '__main__':
     main()
@@ -3,7 +3,7 @@
 import pytest
 
 from yt_dlp.networking import RequestHandler
-from yt_dlp.networking.common import _REQUEST_HANDLERS
+from yt_dlp.networking.common import _load_request_handlers
 from yt_dlp.utils._utils import _YDLLogger as FakeLogger
 
 
@@ -14,8 +14,8 @@ def handler(request):
         return
     if inspect.isclass(RH_KEY) and issubclass(RH_KEY, RequestHandler):
         handler = RH_KEY
-    elif RH_KEY in _REQUEST_HANDLERS:
-        handler = _REQUEST_HANDLERS[RH_KEY]
+    elif RH_KEY in _load_request_handlers():
+        handler = _load_request_handlers()[RH_KEY]
     else:
         pytest.skip(f'{RH_KEY} request handler is not available')
 
@@ -1035,6 +1035,15 @@ def test_parse_m3u8_formats(self):
                 expect_value(self, formats, expected_formats, None)
                 expect_value(self, subs, expected_subs, None)
 
+    def test_parse_m3u8_event_playlist(self):
+        for playlist_type, expected in (('EVENT', {'hls_keeps_history': True}), ('VOD', None), (None, None)):
+            m3u8_doc = ''.join((
+                '#EXTM3U\n#EXT-X-TARGETDURATION:2\n',
+                f'#EXT-X-PLAYLIST-TYPE:{playlist_type}\n' if playlist_type else '',
+                '#EXTINF:2,\n0.ts\n'))
+            formats, _ = self.ie._parse_m3u8_formats_and_subtitles(m3u8_doc, 'http://example.com/live.m3u8')
+            self.assertEqual(formats[0].get('downloader_options'), expected, playlist_type)
+
     def test_parse_mpd_formats(self):
         _TEST_CASES = [
             (
@@ -11,17 +11,24 @@
 
 import contextlib
 import copy
+import io
 import json
+import shutil
+import tempfile
+import time
 
 from test.helper import FakeYDL, assertRegexpMatches, try_rm
 from yt_dlp import YoutubeDL
 from yt_dlp.compat import compat_os_name
 from yt_dlp.extractor import YoutubeIE
 from yt_dlp.extractor.common import InfoExtractor
-from yt_dlp.postprocessor.common import PostProcessor
+from yt_dlp.postprocessor.common import PostProcessingError, PostProcessor
 from yt_dlp.utils import (
+    DownloadError,
+    ExistingVideoReached,
     ExtractorError,
     LazyList,
+    MaxDownloadsReached,
     OnDemandPagedList,
     int_or_none,
     match_filter_func,
@@ -114,6 +121,53 @@ def test_prefer_free_formats(self):
         downloaded = ydl.downloaded_info_dicts[0]
         self.assertEqual(downloaded['ext'], 'webm')
 
+    def test_format_sorter_cache(self):
+        ydl = YDL()
+
+        def best(fields):
+            info_dict = _make_result([
+                {'format_id': str(height), 'height': height, 'ext': 'mp4', 'url': TEST_URL}
+                for height in (360, 720, 1080)], _format_sort_fields=fields)
+            ydl.sort_formats(info_dict)
+            return info_dict['formats'][-1]['format_id']
+
+        self.assertEqual(best(['res:720']), '720')
+        sorter = ydl._get_format_sorter(['res:720'])
+        # The sorters of other videos do not change the limits of a cached one
+        self.assertEqual(best(['res:360']), '360')
+        self.assertEqual(best([]), '1080')
+        self.assertEqual(best(['res:720']), '720')
+        self.assertIs(ydl._get_format_sorter(['res:720']), sorter)
+
+        ydl.params['format_sort'] = ['+res']
+        self.assertIsNot(ydl._get_format_sorter(['res:720']), sorter)
+        self.assertEqual(best(['res:720']), '360')
+
+    def test_format_selector_cache(self):
+        format_spec = 'bv*[height<=720]+ba/b[height<=720]/wa'
+        ydl = YDL()
+        selector = ydl.build_format_selector(format_spec)
+        self.assertIs(ydl.build_format_selector(format_spec), selector)
+
+        def select(formats):
+            formats = [{'url': TEST_URL, 'ext': 'mp4', **f} for f in formats]
+            return [f['format_id'] for f in ydl._select_formats(formats, selector)]
+
+        # The results of the filters are not reused across videos
+        self.assertEqual(select([
+            {'format_id': 'v', 'height': 720, 'acodec': 'none'},
+            {'format_id': 'a', 'vcodec': 'none'},
+        ]), ['v+a'])
+        self.assertEqual(select([
+            {'format_id': 'v', 'height': 1080, 'acodec': 'none'},
+            {'format_id': 'a', 'vcodec': 'none'},
+            {'format_id': 'b', 'height': 360},
+        ]), ['b'])
+        self.assertEqual(select([
+            {'format_id': 'v', 'height': 1080, 'acodec': 'none'},
+            {'format_id': 'a', 'vcodec': 'none'},
+        ]), ['a'])
+
     def test_format_selection(self):
         formats = [
             {'format_id': '35', 'ext': 'mp4', 'preference': 0, 'url': TEST_URL},
@@ -521,6 +575,56 @@ def test_format_filtering(self):
             ydl.process_ie_result(info_dict)
         self.assertEqual(ydl.downloaded_info_dicts, [])
 
+    def test_check_formats(self):
+        formats = [{'format_id': str(i), 'url': f'{TEST_URL}?{i}', 'quality': i} for i in range(10)]
+        broken = {'9', '8'}
+
+        class _YDL(YDL):
+            def _test_format(self, f):
+                time.sleep(0.01)
+                self.tested.append(f['format_id'])
+                return f['format_id'] not in broken
+
+        def run(params):
+            ydl = _YDL({'check_formats': 'selected', 'format': 'best', **params})
+            ydl.tested = []
+            info_dict = _make_result(copy.deepcopy(formats))
+            ydl.process_ie_result(info_dict)
+            return ydl, info_dict
+
+        ydl, _ = run({'concurrent_format_checks': 1})
+        self.assertEqual(ydl.downloaded_info_dicts[0]['format_id'], '7')
+        self.assertEqual(ydl.tested, ['9', '8', '7'])
+
+        # Formats are tested concurrently, but no further than needed
+        ydl, info_dict = run({'concurrent_format_checks': 4})
+        self.assertEqual(ydl.downloaded_info_dicts[0]['format_id'], '7')
+        self.assertLessEqual({'7', '8', '9'}, set(ydl.tested))
+        self.assertLessEqual(set(ydl.tested), {'4', '5', '6', '7', '8', '9'})
+        self.assertEqual(traverse_obj(info_dict, ('formats', slice(6, None), '__working')), [True, True, False, False])
+
+        # The results are memoized in the formats
+        ydl.tested = []
+        checked = info_dict['formats'][:5:-1]
+        self.assertEqual(list(ydl._check_formats(checked)), checked[2:])
+        self.assertEqual(ydl.tested, [])
+
+        cachedir = tempfile.mkdtemp()
+        try:
+            params = {'cachedir': cachedir, 'format_check_cache_ttl': 60, 'concurrent_format_checks': 1}
+            ydl, _ = run(params)
+            self.assertEqual(ydl.tested, ['9', '8', '7'])
+            ydl, _ = run(params)
+            self.assertEqual(ydl.downloaded_info_dicts[0]['format_id'], '7')
+            self.assertEqual(ydl.tested, [])
+
+            # Expired results are discarded
+            with patch('time.time', lambda: time.monotonic() + 10 ** 10):
+                ydl, _ = run(params)
+            self.assertEqual(ydl.tested, ['9', '8', '7'])
+        finally:
+            shutil.rmtree(cachedir)
+
     @patch('yt_dlp.postprocessor.ffmpeg.FFmpegMergerPP.available', False)
     def test_default_format_spec_without_ffmpeg(self):
         ydl = YDL({})
@@ -564,6 +668,30 @@ def test_default_format_spec_with_ffmpeg(self):
         self.assertEqual(ydl._default_format_spec({}), 'bestvideo*+bestaudio/best')
         self.assertEqual(ydl._default_format_spec({'is_live': True}), 'best/bestvideo+bestaudio')
 
+    def test_live_from_start(self):
+        formats = [
+            {'format_id': 'hls-window', 'protocol': 'm3u8_native', 'url': TEST_URL, 'quality': 2},
+            {'format_id': 'hls', 'protocol': 'm3u8_native', 'url': TEST_URL,
+             'downloader_options': {'hls_keeps_history': True}},
+            {'format_id': 'hls-ffmpeg', 'protocol': 'm3u8', 'url': TEST_URL, 'quality': 1},
+        ]
+        # Playlists that only keep a window of segments cannot be downloaded from the start
+        ydl = YDL({'live_from_start': True})
+        with self.assertRaisesRegex(ExtractorError, 'no formats that can be downloaded from the start'):
+            ydl.process_ie_result(_make_result(copy.deepcopy([formats[0], formats[2]]), is_live=True))
+
+        ydl = YDL({'live_from_start': True})
+        ydl.process_ie_result(_make_result(copy.deepcopy(formats), is_live=True))
+        downloaded = ydl.downloaded_info_dicts[0]
+        self.assertEqual(downloaded['format_id'], 'hls')
+        self.assertTrue(downloaded['is_from_start'])
+
+        ydl = YDL()
+        ydl.process_ie_result(_make_result(copy.deepcopy(formats), is_live=True))
+        downloaded = ydl.downloaded_info_dicts[0]
+        self.assertEqual(downloaded['format_id'], 'hls-window')
+        self.assertNotIn('is_from_start', downloaded)
+
 
 class TestYoutubeDL(unittest.TestCase):
     def test_subtitles(self):
@@ -889,6 +1017,20 @@ def gen():
         test('%(title3)s', ('foo/bar\\test', 'foo⧸bar⧹test'))
         test('folder/%(title3)s', ('folder/foo/bar\\test', f'folder{os.path.sep}foo⧸bar⧹test'))
 
+    def test_outtmpl_evaluator_cache(self):
+        tmpl = '%(title)s-%(missing|x)s-%(width+1)d-%(formats.0.id)s'
+        ydl = FakeYDL()
+        evaluator = ydl._get_outtmpl_evaluator(tmpl, True)
+        self.assertIs(ydl._get_outtmpl_evaluator(tmpl, True), evaluator)
+        self.assertIsNot(ydl._get_outtmpl_evaluator(tmpl), evaluator)
+
+        # The evaluators only depend on the template, not on the info dict or the params
+        self.assertEqual(ydl.prepare_filename(self.outtmpl_info, outtmpl=tmpl), 'NA-x-NA-id 1')
+        ydl.params['outtmpl_na_placeholder'] = 'none'
+        info = {**self.outtmpl_info, 'title': 'a/b', 'width': 1920}
+        self.assertEqual(ydl.prepare_filename(info, outtmpl=tmpl), 'a⧸b-x-1921-id 1')
+        self.assertEqual(ydl.evaluate_outtmpl(tmpl, {'title': 'a/b', 'formats': [{}]}), 'a/b-x-none-none')
+
     def test_format_note(self):
         ydl = YoutubeDL()
         self.assertEqual(ydl._format_note({}), '')
@@ -1131,6 +1273,191 @@ def test_selection(params, expected_ids, evaluate_all=False):
         test_selection({'playlist_items': '-15::2'}, INDICES[1::2], True)
         test_selection({'playlist_items': '-15::15'}, [], True)
 
+    def test_concurrent_playlist_entries(self):
+        archive_file = 'test_concurrent_entries.archive'
+
+        class _YDL(YDL):
+            def process_info(self, info_dict):
+                # Make the earlier entries finish last
+                time.sleep(0.02 * (10 - int(info_dict['id'])))
+                super().process_info(info_dict)
+                info_dict['__write_download_archive'] = True
+                # Evaluated after the other entries have started
+                self.autonumbers.append(self.evaluate_outtmpl('%(autonumber)d %(video_autonumber)d', info_dict))
+
+        def run(params, **kwargs):
+            ydl = _YDL({'download_archive': archive_file, **params})
+            ydl.autonumbers = []
+            return ydl, ydl.process_ie_result({
+                '_type': 'playlist',
+                'id': 'test',
+                'extractor': 'test:playlist',
+                'extractor_key': 'test:playlist',
+                'webpage_url': 'http://example.com',
+                'entries': ({'id': str(i), 'title': str(i), 'url': TEST_URL} for i in range(1, 11)),
+                **kwargs,
+            })
+
+        try_rm(archive_file)
+        try:
+            ydl, result = run({'concurrent_entries': 4})
+            self.assertEqual(traverse_obj(result, ('entries', ..., 'id')), [str(i) for i in range(1, 11)])
+            self.assertEqual(traverse_obj(result, ('entries', ..., 'playlist_index')), list(range(1, 11)))
+            self.assertEqual(len(ydl.downloaded_info_dicts), 10)
+            self.assertEqual(len(set(ydl.autonumbers)), 10)
+            with open(archive_file, encoding='utf-8') as f:
+                self.assertEqual(f.read().splitlines(), [f'test:playlist {i}' for i in range(1, 11)])
+
+            # All entries are in the archive now
+            with self.assertRaises(ExistingVideoReached):
+                run({'concurrent_entries': 4, 'break_on_existing': True})
+        finally:
+            try_rm(archive_file)
+
+    def test_concurrent_postprocessing(self):
+        tmpdir = tempfile.mkdtemp()
+        archive_file = os.path.join(tmpdir, 'archive.txt')
+        events = []
+
+        class _YDL(YoutubeDL):
+            def dl(self, name, info, subtitle=False, test=False):
+                with open(name, 'w') as f:
+                    f.write('EXAMPLE')
+                events.append(f'download {info["id"]}')
+                return True, True
+
+        class SlowPP(PostProcessor):
+            def run(self, info):
+                # Make the earlier videos finish last
+                time.sleep(0.05 * (5 - int(info['id'])))
+                events.append(f'post_process {info["id"]}')
+                return [], info
+
+        class AfterMovePP(PostProcessor):
+            def run(self, info):
+                events.append(f'after_move {info["id"]}')
+                return [], info
+
+        try:
+            ydl = _YDL({
+                'quiet': True,
+                'paths': {'home': tmpdir},
+                'download_archive': archive_file,
+                'concurrent_postprocessing': 2,
+            })
+            ydl.add_post_processor(SlowPP())
+            ydl.add_post_processor(AfterMovePP(), when='after_move')
+            ydl.process_ie_result({
+                '_type': 'playlist',
+                'id': 'test',
+                'extractor': 'test:playlist',
+                'extractor_key': 'test:playlist',
+                'webpage_url': 'http://example.com',
+                'entries': [{
+                    'id': str(i), 'title': str(i), 'url': TEST_URL, 'ext': 'mp4',
+                    'extractor': 'test', 'extractor_key': 'test', 'webpage_url': f'http://example.com/{i}',
+                } for i in range(1, 5)],
+            }, download=True)
+            ydl.close()
+
+            # The next videos are downloaded while the first is post-processed
+            self.assertLess(events.index('download 2'), events.index('post_process 1'))
+            self.assertEqual(
+                [event for event in events if event.startswith('after_move')], [f'after_move {i}' for i in range(1, 5)])
+            with open(archive_file, encoding='utf-8') as f:
+                self.assertEqual(f.read().splitlines(), [f'test {i}' for i in range(1, 5)])
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def test_concurrent_postprocessing_errors(self):
+        tmpdir = tempfile.mkdtemp()
+
+        class _YDL(YoutubeDL):
+            def dl(self, name, info, subtitle=False, test=False):
+                with open(name, 'w') as f:
+                    f.write('EXAMPLE')
+                return True, True
+
+        class FailingPP(PostProcessor):
+            def run(self, info):
+                # The error happens after the next videos were submitted
+                if info['id'] == '1':
+                    time.sleep(0.2)
+                    raise PostProcessingError('failed')
+                return [], info
+
+        def run(**params):
+            ydl = _YDL({'quiet': True, 'paths': {'home': tmpdir}, 'concurrent_postprocessing': 2, **params})
+            ydl.add_post_processor(FailingPP())
+            ydl._YoutubeDL__download_wrapper(ydl.process_ie_result)({
+                '_type': 'playlist',
+                'id': 'test',
+                'extractor': 'test:playlist',
+                'extractor_key': 'test:playlist',
+                'webpage_url': 'http://example.com',
+                'entries': [{
+                    'id': str(i), 'title': str(i), 'url': TEST_URL, 'ext': 'mp4',
+                    'extractor': 'test', 'extractor_key': 'test', 'webpage_url': f'http://example.com/{i}',
+                } for i in range(1, 5)],
+            }, download=True)
+
+        try:
+            with self.assertRaisesRegex(DownloadError, r'failed \(while post-processing 1\)$'):
+                run()
+            # The error of the background job does not mask the one of the download
+            with self.assertRaises(MaxDownloadsReached):
+                run(max_downloads=2)
+        finally:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    def test_stream_playlist_json(self):
+        written = []
+
+        class _YDL(YDL):
+            def process_info(self, info_dict):
+                written.append(self._out_files.out.getvalue())
+                super().process_info(info_dict)
+
+        def dump_single_json(stream):
+            written.clear()
+            fd, info_file = tempfile.mkstemp(suffix='.info.json')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({
+                    '_type': 'playlist',
+                    'id': 'test',
+                    'extractor': 'test:playlist',
+                    'extractor_key': 'test:playlist',
+                    'webpage_url': 'http://example.com',
+                    'entries': [{
+                        'id': str(i), 'title': str(i), 'url': TEST_URL, 'ext': 'mp4', 'epoch': 0,
+                        'extractor': 'test', 'extractor_key': 'test', 'webpage_url': f'http://example.com/{i}',
+                    } for i in range(1, 4)],
+                }, f)
+            try:
+                ydl = _YDL({
+                    'dump_single_json': True,
+                    'stream_playlist_json': stream,
+                    'simulate': True,
+                    'clean_infojson': False,
+                })
+                ydl._out_files.out = io.StringIO()
+                ydl.download_with_info_file(info_file)
+            finally:
+                os.remove(info_file)
+            output = ydl._out_files.out.getvalue()
+            self.assertEqual(output.count('\n'), 1)
+            return {**json.loads(output), 'epoch': 0}
+
+        expected = dump_single_json(False)
+        self.assertEqual(written, [''] * 3)
+        streamed = dump_single_json(True)
+        self.assertEqual(streamed, expected)
+        self.assertEqual(next(iter(streamed)), 'entries')
+        # Each entry is written once it is processed
+        self.assertEqual(written[0], '{"entries": [')
+        self.assertEqual([json.loads(f'{output}]}}')['entries'] for output in written[1:]], [
+            expected['entries'][:1], expected['entries'][:2]])
+
     def test_do_not_override_ie_key_in_url_transparent(self):
         ydl = YDL()
 
@@ -9,9 +9,17 @@
 
 
 import collections
+from unittest.mock import patch
 
-from test.helper import gettestcases
-from yt_dlp.extractor import FacebookIE, YoutubeIE, gen_extractors
+from devscripts.make_lazy_extractors import build_url_index
+from test.helper import FakeYDL, gettestcases
+from yt_dlp.extractor import (
+    FacebookIE,
+    YoutubeIE,
+    extractors,
+    gen_extractor_classes,
+    gen_extractors,
+)
 
 
 class TestAllURLsMatching(unittest.TestCase):
@@ -108,6 +116,20 @@ def test_pbs(self):
         self.assertMatch('http://video.pbs.org/viralplayer/2365173446/', ['pbs'])
         self.assertMatch('http://video.pbs.org/widget/partnerplayer/980042464/', ['pbs'])
 
+    def test_url_index(self):
+        # Use the index of the lazy extractors if they have been built
+        url_index = extractors._URL_INDEX or build_url_index(gen_extractor_classes())
+        with patch.object(extractors, '_URL_INDEX', url_index):
+            ydl = FakeYDL()
+            ydl.add_default_info_extractors()
+            urls = [tc['url'] for tc in gettestcases(include_onlymatching=True)]
+            for url in (*urls, ':ytsubs', 'ytsearch5:test', 'https://www.youtube.com/watch?v=BaW_jenozKcİ'):
+                candidates = ydl._candidate_ies(url)
+                self.assertEqual(
+                    [ie_key for ie_key, ie in candidates.items() if ie.suitable(url)],
+                    [ie_key for ie_key, ie in ydl._ies.items() if ie.suitable(url)], f'for URL {url!r}')
+            self.assertLess(len(ydl._candidate_ies('https://www.youtube.com/watch?v=BaW_jenozKc')), len(ydl._ies) / 10)
+
     def test_no_duplicated_ie_names(self):
         name_accu = collections.defaultdict(list)
         for ie in self.ies:
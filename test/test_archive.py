@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+# Allow direct execution
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import shutil
+
+from test.helper import FakeYDL
+from yt_dlp.archive import IndexedDownloadArchive
+from yt_dlp.dependencies import sqlite3
+
+
+@unittest.skipUnless(sqlite3, 'sqlite3 is not available')
+class TestIndexedDownloadArchive(unittest.TestCase):
+    def setUp(self):
+        TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+        self.test_dir = os.path.join(TEST_DIR, 'testdata', 'archive_test')
+        self.tearDown()
+        os.makedirs(self.test_dir)
+        self.filename = os.path.join(self.test_dir, 'archive.txt')
+
+    def tearDown(self):
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def write_lines(self, *lines, mode='a'):
+        with open(self.filename, mode, encoding='utf-8') as f:
+            f.writelines(f'{line}\n' for line in lines)
+
+    def read_lines(self):
+        with open(self.filename, encoding='utf-8') as f:
+            return f.read().splitlines()
+
+    def test_lookup(self):
+        self.write_lines('youtube a', 'youtube b')
+        archive = IndexedDownloadArchive(self.filename)
+        self.assertIn('youtube a', archive)
+        self.assertNotIn('youtube c', archive)
+
+        # Lines appended by other processes are picked up
+        self.write_lines('youtube c')
+        self.assertIn('youtube c', archive)
+
+        # A partially written line is not indexed until it is complete
+        with open(self.filename, 'a', encoding='utf-8') as f:
+            f.write('youtube d')
+        self.assertNotIn('youtube d', archive)
+        self.write_lines('')
+        self.assertIn('youtube d', archive)
+        archive.close()
+
+        # The index is reused and the archive file is not modified
+        archive = IndexedDownloadArchive(self.filename)
+        self.assertIn('youtube a', archive)
+        self.assertEqual(self.read_lines(), ['youtube a', 'youtube b', 'youtube c', 'youtube d'])
+        archive.close()
+
+    def test_write(self):
+        archive = IndexedDownloadArchive(self.filename, batch_size=2)
+        archive.write('youtube a')
+        self.assertIn('youtube a', archive)
+        self.assertFalse(os.path.exists(self.filename))
+        archive.write('youtube b')
+        self.assertEqual(self.read_lines(), ['youtube a', 'youtube b'])
+        archive.write('youtube c')
+        archive.close()
+        self.assertEqual(self.read_lines(), ['youtube a', 'youtube b', 'youtube c'])
+
+        archive = IndexedDownloadArchive(self.filename)
+        self.assertIn('youtube c', archive)
+        archive.close()
+
+    def test_rebuild(self):
+        self.write_lines('youtube a', 'youtube b')
+        IndexedDownloadArchive(self.filename).close()
+
+        self.write_lines('youtube c', mode='w')
+        archive = IndexedDownloadArchive(self.filename)
+        self.assertNotIn('youtube a', archive)
+        self.assertIn('youtube c', archive)
+
+        self.write_lines('youtube d', 'youtube e', 'youtube f', mode='w')
+        self.assertNotIn('youtube c', archive)
+        self.assertIn('youtube f', archive)
+        archive.close()
+
+    def test_YoutubeDL(self):
+        with FakeYDL({'download_archive': self.filename, 'download_archive_index': True}) as ydl:
+            self.assertIsInstance(ydl.archive, IndexedDownloadArchive)
+            ydl.record_download_archive({'id': 'a', 'extractor_key': 'Youtube'})
+            conn = ydl.archive._conn
+        self.assertEqual(self.read_lines(), ['youtube a'])
+        # The index is closed with the YoutubeDL instance
+        self.assertRaises(sqlite3.ProgrammingError, conn.execute, 'SELECT 1')
+
+
+if __name__ == '__main__':
+    unittest.main()
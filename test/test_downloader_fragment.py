@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+
+# Allow direct execution
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import http.server
+import json
+import random
+import threading
+import time
+import urllib.parse
+from unittest.mock import patch
+
+from test.helper import http_server_port, try_rm
+from yt_dlp import YoutubeDL
+from yt_dlp.downloader.dash import DashSegmentsFD
+from yt_dlp.downloader.fragment import FragmentBuffer
+from yt_dlp.downloader.hls import HlsFD
+from yt_dlp.downloader.merge import StreamMergeFD
+from yt_dlp.networking.budget import GLOBAL_BUDGET
+from yt_dlp.postprocessor.ffmpeg import FFmpegMergerPP
+from yt_dlp.utils import Popen, encodeFilename
+from yt_dlp.utils._utils import _YDLLogger as FakeLogger
+
+FRAGMENT_COUNT = 12
+LIVE_SEGMENTS = 6
+
+
+def fragment_content(format_id, index):
+    return f'{format_id}:{index:03d};'.encode() * 100
+
+
+class HTTPTestRequestHandler(http.server.BaseHTTPRequestHandler):
+    lock = threading.Lock()
+    active = max_active = 0
+    requested = []
+    low_latency = False
+    slow_fragment = None
+    live_requests = not_modified = 0
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_live_playlist(self):
+        cls = type(self)
+        query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        with cls.lock:
+            cls.requested.append(self.path)
+            if cls.low_latency:
+                last = min(int(query.get('_HLS_msn', [2])[0]), LIVE_SEGMENTS - 1)
+            else:
+                # A segment is added on every other request
+                last = min(2 + cls.live_requests // 2, LIVE_SEGMENTS - 1)
+                cls.live_requests += 1
+        etag = f'"{last}"'
+        if self.headers.get('If-None-Match') == etag:
+            cls.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        skipped = last - 1 if query.get('_HLS_skip') == ['YES'] else 0
+        lines = ['#EXTM3U', '#EXT-X-TARGETDURATION:0.1', '#EXT-X-MEDIA-SEQUENCE:0']
+        if cls.low_latency:
+            lines.append('#EXT-X-SERVER-CONTROL:CAN-BLOCK-RELOAD=YES,CAN-SKIP-UNTIL=1.0')
+        if skipped:
+            lines.append(f'#EXT-X-SKIP:SKIPPED-SEGMENTS={skipped}')
+        for index in range(skipped, last + 1):
+            lines.extend(('#EXTINF:0.1,', f'/live/{index}'))
+        if last == LIVE_SEGMENTS - 1:
+            lines.append('#EXT-X-ENDLIST')
+        content = '\n'.join((*lines, '')).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/vnd.apple.mpegurl')
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        if self.path.startswith('/live.m3u8'):
+            return self.send_live_playlist()
+        if self.path.endswith('.m3u8'):
+            # Format f2 is only in the second discontinuity
+            content = ''.join((
+                '#EXTM3U\n#EXT-X-TARGETDURATION:2\n#EXT-X-MEDIA-SEQUENCE:5\n#EXT-X-MAP:URI="/init/0"\n',
+                *(f'#EXTINF:2,\n/f1/{index}\n' for index in range(FRAGMENT_COUNT)),
+                '#EXT-X-DISCONTINUITY\n#EXTINF:2,\n/f2/0\n#EXT-X-ENDLIST\n')).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/vnd.apple.mpegurl')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+            return
+        format_id, index = self.path.strip('/').split('/')
+        cls = type(self)
+        with cls.lock:
+            cls.requested.append(self.path)
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            # Complete the fragments out of order
+            time.sleep(0.3 if self.path == cls.slow_fragment else random.uniform(0, 0.02))
+        finally:
+            # Before responding, since the client may send its next request as soon as it has the content
+            with cls.lock:
+                cls.active -= 1
+        content = fragment_content(format_id, int(index))
+        self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class TestFragmentEngines(unittest.TestCase):
+    def setUp(self):
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), HTTPTestRequestHandler)
+        self.port = http_server_port(self.httpd)
+        self.server_thread = threading.Thread(target=self.httpd.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+        HTTPTestRequestHandler.requested.clear()
+        HTTPTestRequestHandler.max_active = 0
+        HTTPTestRequestHandler.live_requests = HTTPTestRequestHandler.not_modified = 0
+        self.filenames = ['testfile.f1.mp4', 'testfile.f2.mp4']
+        self.remove_files()
+
+    def tearDown(self):
+        self.remove_files()
+
+    def remove_files(self):
+        for filename in self.filenames:
+            for suffix in ('', '.part', '.ytdl'):
+                try_rm(encodeFilename(filename + suffix))
+
+    def info_dict(self):
+        return {
+            'protocol': 'http_dash_segments',
+            'url': f'http://127.0.0.1:{self.port}/',
+            'requested_formats': [{
+                'format_id': format_id,
+                'filepath': filename,
+                'fragment_base_url': f'http://127.0.0.1:{self.port}/{format_id}/',
+                'fragments': [{'path': str(index)} for index in range(FRAGMENT_COUNT)],
+            } for format_id, filename in zip(('f1', 'f2'), self.filenames)],
+        }
+
+    def download(self, params):
+        params = {'logger': FakeLogger(), 'concurrent_fragment_downloads': 4, **params}
+        downloader = DashSegmentsFD(YoutubeDL(params), params)
+        self.assertTrue(downloader.real_download('testfile.mp4', self.info_dict()))
+
+    def assert_downloaded(self, start=0):
+        for format_id, filename in zip(('f1', 'f2'), self.filenames):
+            with open(encodeFilename(filename), 'rb') as f:
+                self.assertEqual(f.read(), b''.join(
+                    fragment_content(format_id, index) for index in range(FRAGMENT_COUNT)), format_id)
+            self.assertFalse(os.path.exists(encodeFilename(f'{filename}.ytdl')))
+        self.assertCountEqual(HTTPTestRequestHandler.requested, [
+            f'/{format_id}/{index}' for format_id in ('f1', 'f2') for index in range(start, FRAGMENT_COUNT)])
+
+    def test_threads(self):
+        self.download({})
+        self.assert_downloaded()
+
+    def test_threads_in_memory(self):
+        buffers = []
+
+        class _FragmentBuffer(FragmentBuffer):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                buffers.append(self)
+
+        HTTPTestRequestHandler.slow_fragment = '/f1/0'
+        try:
+            with patch('yt_dlp.downloader.fragment.FragmentBuffer', _FragmentBuffer):
+                self.download({'in_memory_fragments': True, 'concurrent_fragment_downloads': 8})
+        finally:
+            HTTPTestRequestHandler.slow_fragment = None
+        self.assert_downloaded()
+        # The fragments that are downloaded while waiting for the slow one are limited
+        self.assertLessEqual(len(buffers), 10)
+
+    def test_async(self):
+        for params in ({}, {'in_memory_fragments': True}):
+            self.remove_files()
+            HTTPTestRequestHandler.requested.clear()
+            HTTPTestRequestHandler.max_active = 0
+            self.download({'async_fragments': True, **params})
+            self.assert_downloaded()
+            # The formats share the downloads
+            self.assertLessEqual(HTTPTestRequestHandler.max_active, 4)
+
+    def test_async_resume(self):
+        for format_id, filename in zip(('f1', 'f2'), self.filenames):
+            with open(encodeFilename(f'{filename}.part'), 'wb') as f:
+                f.write(fragment_content(format_id, 0) + fragment_content(format_id, 1))
+            with open(encodeFilename(f'{filename}.ytdl'), 'w') as f:
+                json.dump({'downloader': {'current_fragment': {'index': 2}}}, f)
+        self.download({'async_fragments': True})
+        self.assert_downloaded(start=2)
+
+    def test_hls(self):
+        params = {'logger': FakeLogger(), 'concurrent_fragment_downloads': 4}
+        for format_index, expected in (
+            (None, [fragment_content('init', 0), *(fragment_content('f1', index) for index in range(FRAGMENT_COUNT)),
+                    fragment_content('f2', 0)]),
+            (1, [fragment_content('f2', 0)]),
+        ):
+            self.remove_files()
+            downloader = HlsFD(YoutubeDL(params), params)
+            self.assertTrue(downloader.real_download(self.filenames[0], {
+                'url': f'http://127.0.0.1:{self.port}/playlist.m3u8',
+                'ext': 'mp4',
+                'format_index': format_index,
+            }))
+            with open(encodeFilename(self.filenames[0]), 'rb') as f:
+                self.assertEqual(f.read(), b''.join(expected), format_index)
+
+    def download_live(self):
+        params = {'logger': FakeLogger()}
+        downloader = HlsFD(YoutubeDL(params), params)
+        self.assertTrue(downloader.real_download(self.filenames[0], {
+            'url': f'http://127.0.0.1:{self.port}/live.m3u8',
+            'ext': 'mp4',
+            'is_live': True,
+            'is_from_start': True,
+        }))
+        with open(encodeFilename(self.filenames[0]), 'rb') as f:
+            self.assertEqual(f.read(), b''.join(fragment_content('live', index) for index in range(LIVE_SEGMENTS)))
+        return [path for path in HTTPTestRequestHandler.requested if path.startswith('/live.m3u8')]
+
+    def test_hls_live(self):
+        HTTPTestRequestHandler.low_latency = False
+        requested = self.download_live()
+        self.assertEqual(requested, ['/live.m3u8'] * len(requested))
+        # Every other reload is answered with 304 Not Modified
+        self.assertEqual(HTTPTestRequestHandler.not_modified, LIVE_SEGMENTS - 3)
+
+    def test_hls_live_low_latency(self):
+        HTTPTestRequestHandler.low_latency = True
+        try:
+            requested = self.download_live()
+        finally:
+            HTTPTestRequestHandler.low_latency = False
+        self.assertEqual(requested, ['/live.m3u8', *(
+            f'/live.m3u8?_HLS_msn={index}&_HLS_skip=YES' for index in range(3, LIVE_SEGMENTS))])
+        self.assertEqual(HTTPTestRequestHandler.not_modified, 0)
+
+    @unittest.skipUnless(hasattr(os, 'mkfifo'), 'named pipes are not supported')
+    def test_stream_merge(self):
+        def run_ffmpeg(pp, input_path_opts, output_path_opts, *, on_process_started=None, **kwargs):
+            # Concatenates the inputs instead of merging them
+            script = (
+                'import sys\n'
+                'data = [open(path, "rb").read() for path in sys.argv[1:-1]]\n'
+                'open(sys.argv[-1], "wb").write(b"".join(data))\n')
+            args = [path for path, _ in input_path_opts] + [output_path_opts[0][0]]
+            with Popen([sys.executable, '-c', script, *args]) as proc:
+                on_process_started(proc)
+                self.assertEqual(proc.wait(), 0)
+
+        filename = 'testfile.mp4'
+        self.filenames.append(filename)
+        info_dict = self.info_dict()
+        info_dict['requested_formats'][0].update({'protocol': 'https', 'url': f'http://127.0.0.1:{self.port}/f1/0'})
+        info_dict['requested_formats'][1]['protocol'] = 'http_dash_segments'
+        for fmt in info_dict['requested_formats']:
+            fmt['ext'] = 'mp4'
+        params = {'logger': FakeLogger(), 'concurrent_fragment_downloads': 4}
+        with patch.object(FFmpegMergerPP, 'real_run_ffmpeg', run_ffmpeg):
+            self.assertTrue(StreamMergeFD(YoutubeDL(params), params).real_download(filename, info_dict))
+        with open(encodeFilename(filename), 'rb') as f:
+            self.assertEqual(f.read(), fragment_content('f1', 0) + b''.join(
+                fragment_content('f2', index) for index in range(FRAGMENT_COUNT)))
+        # The formats were not written to disk
+        for filename in self.filenames[:2]:
+            self.assertFalse(os.path.exists(encodeFilename(filename)))
+            self.assertFalse(os.path.exists(encodeFilename(f'{filename}.part')))
+
+    def test_stream_merge_connection_limit(self):
+        formats = [{'url': 'http://a.test/video'}, {'url': 'http://a.test/audio'}]
+        try:
+            self.assertFalse(StreamMergeFD._serializes_formats(formats))
+            GLOBAL_BUDGET.connections_per_host = 2
+            self.assertFalse(StreamMergeFD._serializes_formats(formats))
+            GLOBAL_BUDGET.connections_per_host = 1
+            self.assertTrue(StreamMergeFD._serializes_formats(formats))
+            formats[1] = {'protocol': 'http_dash_segments', 'fragment_base_url': 'http://b.test/'}
+            self.assertFalse(StreamMergeFD._serializes_formats(formats))
+        finally:
+            GLOBAL_BUDGET.connections_per_host = None
+
+
+if __name__ == '__main__':
+    unittest.main()
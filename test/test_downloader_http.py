@@ -9,12 +9,17 @@
 
 
 import http.server
+import json
 import re
 import threading
+import time
+from unittest.mock import patch
 
 from test.helper import http_server_port, try_rm
 from yt_dlp import YoutubeDL
-from yt_dlp.downloader.http import HttpFD
+from yt_dlp.downloader.fragment import FragmentBuffer
+from yt_dlp.downloader.http import AdaptiveChunking, HttpFD
+from yt_dlp.networking.budget import GLOBAL_BUDGET
 from yt_dlp.utils import encodeFilename
 from yt_dlp.utils._utils import _YDLLogger as FakeLogger
 
@@ -25,6 +30,10 @@
 
 
 class HTTPTestRequestHandler(http.server.BaseHTTPRequestHandler):
+    requested_ranges = []
+    lock = threading.Lock()
+    active = max_active = 0
+
     def log_message(self, format, *args):
         pass
 
@@ -44,17 +53,35 @@ def send_content_range(self, total=None):
             self.send_header('Content-Range', content_range)
         return (end - start + 1) if valid_range else total
 
-    def serve(self, range=True, content_length=True):
-        self.send_response(200)
+    def serve(self, range=True, content_length=True, partial=False):
+        self.send_response(206 if partial and self.headers.get('Range') else 200)
         self.send_header('Content-Type', 'video/mp4')
         size = TEST_SIZE
         if range:
+            self.requested_ranges.append(self.headers.get('Range'))
             size = self.send_content_range(TEST_SIZE)
         if content_length:
             self.send_header('Content-Length', size)
         self.end_headers()
         self.wfile.write(b'#' * size)
 
+    def serve_throttled(self):
+        # Each response is throttled after its first 2048 bytes
+        self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.requested_ranges.append(self.headers.get('Range'))
+        size = self.send_content_range(TEST_SIZE)
+        self.send_header('Content-Length', size)
+        self.end_headers()
+        try:
+            self.wfile.write(b'#' * min(size, 2048))
+            for pos in range(2048, size, 128):
+                time.sleep(0.02)
+                self.wfile.write(b'#' * min(size - pos, 128))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
     def do_GET(self):
         if self.path == '/regular':
             self.serve()
@@ -64,13 +91,26 @@ def do_GET(self):
             self.serve(range=False)
         elif self.path == '/no-range-no-content-length':
             self.serve(range=False, content_length=False)
+        elif self.path == '/partial':
+            self.serve(partial=True)
+        elif self.path == '/throttled':
+            self.serve_throttled()
+        elif self.path == '/partial-slow':
+            cls = type(self)
+            with cls.lock:
+                cls.active += 1
+                cls.max_active = max(cls.max_active, cls.active)
+            time.sleep(0.05)
+            self.serve(partial=True)
+            with cls.lock:
+                cls.active -= 1
         else:
             assert False
 
 
 class TestHttpFD(unittest.TestCase):
     def setUp(self):
-        self.httpd = http.server.HTTPServer(
+        self.httpd = http.server.ThreadingHTTPServer(
             ('127.0.0.1', 0), HTTPTestRequestHandler)
         self.port = http_server_port(self.httpd)
         self.server_thread = threading.Thread(target=self.httpd.serve_forever)
@@ -90,7 +130,7 @@ def download(self, params, ep):
         try_rm(encodeFilename(filename))
 
     def download_all(self, params):
-        for ep in ('regular', 'no-content-length', 'no-range', 'no-range-no-content-length'):
+        for ep in ('regular', 'no-content-length', 'no-range', 'no-range-no-content-length', 'partial'):
             self.download(params, ep)
 
     def test_regular(self):
@@ -101,6 +141,148 @@ def test_chunked(self):
             'http_chunk_size': 1000,
         })
 
+    def test_adaptive_chunking(self):
+        self.download_all({'http_chunk_size': 'auto'})
+
+        statuses = []
+        params = {'http_chunk_size': 'auto', 'buffersize': 128, 'noresizebuffer': True}
+        HTTPTestRequestHandler.requested_ranges.clear()
+        with patch.multiple(AdaptiveChunking, MIN_CHUNK_SIZE=1024, WINDOW=0.05, THROTTLE_TIME=0.2):
+            params['logger'] = FakeLogger()
+            downloader = HttpFD(YoutubeDL(params), params)
+            downloader.add_progress_hook(
+                lambda s: s['status'] == 'downloading' and statuses.append(s['http_chunking']))
+            try_rm(encodeFilename('testfile.mp4'))
+            start = time.monotonic()
+            self.assertTrue(downloader.real_download('testfile.mp4', {
+                'url': f'http://127.0.0.1:{self.port}/throttled',
+            }))
+            # Without chunking, the download would take at least 1.28 seconds
+            self.assertLess(time.monotonic() - start, 1.2)
+        self.assertEqual(os.path.getsize(encodeFilename('testfile.mp4')), TEST_SIZE)
+        try_rm(encodeFilename('testfile.mp4'))
+
+        self.assertEqual(statuses[0]['strategy'], 'single')
+        self.assertEqual(statuses[-1]['strategy'], 'chunked')
+        throttled_after = statuses[-1]['throttled_after']
+        self.assertGreaterEqual(throttled_after, 2048)
+        self.assertLess(throttled_after, 4096)
+        self.assertIsNone(HTTPTestRequestHandler.requested_ranges[0])
+        self.assertGreater(len(HTTPTestRequestHandler.requested_ranges), 2)
+
+    def test_connections(self):
+        # Servers that do not respond with 206 Partial Content are downloaded sequentially
+        self.download_all({
+            'http_connections': 3,
+            'http_chunk_size': 1000,
+        })
+        self.download_all({'http_connections': 3})
+
+        HTTPTestRequestHandler.requested_ranges.clear()
+        self.download({'http_connections': 3, 'http_chunk_size': 4000}, 'partial')
+        self.assertCountEqual(HTTPTestRequestHandler.requested_ranges, [
+            'bytes=0-0', 'bytes=0-3999', 'bytes=4000-7999', 'bytes=8000-10239'])
+
+    def test_budget(self):
+        HTTPTestRequestHandler.max_active = 0
+        self.download({'http_connections': 3, 'http_chunk_size': 1000}, 'partial-slow')
+        self.assertGreater(HTTPTestRequestHandler.max_active, 1)
+
+        try:
+            HTTPTestRequestHandler.max_active = 0
+            self.download({'http_connections': 3, 'http_chunk_size': 1000, 'max_connections_per_host': 1}, 'partial-slow')
+            self.assertEqual(GLOBAL_BUDGET.connections_per_host, 1)
+            self.assertEqual(HTTPTestRequestHandler.max_active, 1)
+
+            GLOBAL_BUDGET.connections_per_host = None
+            start = time.monotonic()
+            self.download({'global_ratelimit': 20 * 1024}, 'regular')
+            self.assertGreaterEqual(time.monotonic() - start, 0.4)
+        finally:
+            GLOBAL_BUDGET.rate = GLOBAL_BUDGET.connections_per_host = None
+
+    def test_connections_resume(self):
+        filename = 'testfile.mp4'
+        params = {'http_connections': 3, 'http_chunk_size': 4000, 'logger': FakeLogger()}
+        downloader = HttpFD(YoutubeDL(params), params)
+        try_rm(encodeFilename(filename))
+        # Only the incomplete segments are downloaded
+        with open(encodeFilename(f'{filename}.part'), 'wb') as f:
+            f.write(b'#' * 5000 + b'-' * (TEST_SIZE - 5000))
+        with open(encodeFilename(f'{filename}.ytdl'), 'w') as f:
+            json.dump({'downloader': {'http_segments': {
+                'total': TEST_SIZE,
+                'segments': [[5000, 8000], [9000, 10240]],
+            }}}, f)
+        HTTPTestRequestHandler.requested_ranges.clear()
+        self.assertTrue(downloader.real_download(filename, {'url': f'http://127.0.0.1:{self.port}/partial'}))
+        self.assertCountEqual(HTTPTestRequestHandler.requested_ranges, [
+            'bytes=0-0', 'bytes=5000-7999', 'bytes=9000-10239'])
+        with open(encodeFilename(filename), 'rb') as f:
+            self.assertEqual(f.read(), b'#' * 8000 + b'-' * 1000 + b'#' * 1240)
+        self.assertFalse(os.path.exists(encodeFilename(f'{filename}.ytdl')))
+        try_rm(encodeFilename(filename))
+
+    def test_connections_resume_sequential(self):
+        # A file preallocated by a multi-connection download is resumed from its first missing byte
+        filename = 'testfile.mp4'
+        try_rm(encodeFilename(filename))
+        with open(encodeFilename(f'{filename}.part'), 'wb') as f:
+            f.write(b'#' * 5000 + b'-' * (TEST_SIZE - 5000))
+        with open(encodeFilename(f'{filename}.ytdl'), 'w') as f:
+            json.dump({'downloader': {'http_segments': {
+                'total': TEST_SIZE,
+                'segments': [[5000, 8000], [9000, 10240]],
+            }}}, f)
+        params = {'http_chunk_size': 4000, 'logger': FakeLogger()}
+        downloader = HttpFD(YoutubeDL(params), params)
+        HTTPTestRequestHandler.requested_ranges.clear()
+        self.assertTrue(downloader.real_download(filename, {'url': f'http://127.0.0.1:{self.port}/partial'}))
+        self.assertTrue(HTTPTestRequestHandler.requested_ranges[0].startswith('bytes=5000-'))
+        self.assertEqual(os.path.getsize(encodeFilename(filename)), TEST_SIZE)
+        with open(encodeFilename(filename), 'rb') as f:
+            self.assertEqual(f.read(), b'#' * TEST_SIZE)
+        self.assertFalse(os.path.exists(encodeFilename(f'{filename}.ytdl')))
+        try_rm(encodeFilename(filename))
+
+    @unittest.skipUnless(hasattr(os, 'mkfifo'), 'requires named pipes')
+    def test_connections_pipe(self):
+        # Named pipes cannot be seeked, so they are downloaded sequentially
+        filename = 'testfile.fifo'
+        try_rm(encodeFilename(filename))
+        os.mkfifo(encodeFilename(filename))
+        data = []
+
+        def read():
+            with open(encodeFilename(filename), 'rb') as f:
+                data.append(f.read())
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        try:
+            params = {'http_connections': 3, 'http_chunk_size': 4000, 'logger': FakeLogger()}
+            downloader = HttpFD(YoutubeDL(params), params)
+            HTTPTestRequestHandler.requested_ranges.clear()
+            self.assertTrue(downloader.real_download(filename, {'url': f'http://127.0.0.1:{self.port}/partial'}))
+            reader.join()
+            self.assertEqual(data, [b'#' * TEST_SIZE])
+            self.assertNotIn('bytes=0-0', HTTPTestRequestHandler.requested_ranges)
+        finally:
+            try_rm(encodeFilename(filename))
+
+    def test_buffer(self):
+        buffer = FragmentBuffer()
+        for params in ({}, {'http_chunk_size': 1000}):
+            for ep in ('regular', 'no-content-length', 'no-range', 'no-range-no-content-length'):
+                params['logger'] = FakeLogger()
+                downloader = HttpFD(YoutubeDL(params), params)
+                # The buffer is reused, so it must be emptied by the downloader
+                buffer.write(b'previous fragment')
+                self.assertTrue(downloader.real_download(buffer, {
+                    'url': f'http://127.0.0.1:{self.port}/{ep}',
+                }), ep)
+                self.assertEqual(buffer.getvalue(), b'#' * TEST_SIZE, ep)
+
 
 if __name__ == '__main__':
     unittest.main()
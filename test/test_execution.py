@@ -38,6 +38,26 @@ def test_cmdline_umlauts(self):
         _, stderr = self.run_yt_dlp(opts=('ä', '--version'))
         self.assertFalse(stderr)
 
+    def test_profile_startup(self):
+        stdout, stderr = Popen.run(
+            [sys.executable, '-m', 'yt_dlp', '--ignore-config', '--version'], cwd=rootDir, text=True,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, env={**os.environ, 'YTDLP_PROFILE_STARTUP': '1'})[:2]
+        self.assertTrue(stdout.strip())
+        self.assertRegex(stderr, r'(?m)^\[debug\] Imported \d+ modules')
+        self.assertRegex(stderr, r'(?m)^\[debug\] +[\d.]+ms +[\d.]+ms  yt_dlp\.YoutubeDL$')
+
+    def test_lazy_imports(self):
+        stdout, _ = self.run_yt_dlp(exe=(sys.executable, '-c', '''if 1:
+            import sys
+            import yt_dlp
+            print(*sorted(sys.modules))'''))
+        modules = stdout.split()
+        self.assertIn('yt_dlp.YoutubeDL', modules)
+        for module in ('asyncio', 'mutagen', 'secretstorage', 'xattr', 'yt_dlp.dependencies.Cryptodome',
+                       'websockets', 'curl_cffi', 'yt_dlp.networking._websockets', 'yt_dlp.networking._curlcffi',
+                       'yt_dlp.extractor.adobepass'):
+            self.assertNotIn(module, modules)
+
     def test_lazy_extractors(self):
         try:
             subprocess.check_call([sys.executable, 'devscripts/make_lazy_extractors.py', LAZY_EXTRACTORS],
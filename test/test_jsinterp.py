@@ -403,6 +403,15 @@ def test_split(self):
             self._test(jsi, [''], args=['', '-'])
             self._test(jsi, [], args=['', ''])
 
+    def test_separate_cache(self):
+        cache_info = JSInterpreter._split_cached.cache_info
+        size = cache_info().currsize
+        # Long code, like the rest of the player, is not kept alive by the cache
+        self.assertEqual(len(list(JSInterpreter._separate('a' + ',b' * 5000))), 5001)
+        self.assertEqual(cache_info().currsize, size)
+        self.assertEqual(list(JSInterpreter._separate('test_separate_cache,b')), ['test_separate_cache', 'b'])
+        self.assertEqual(cache_info().currsize, size + 1)
+
 
 if __name__ == '__main__':
     unittest.main()
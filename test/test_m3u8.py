@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+# Allow direct execution
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from yt_dlp.m3u8 import Playlist, Segment, Variant
+
+MEDIA_PLAYLIST = '''#EXTM3U
+#EXT-X-VERSION:6
+#EXT-X-TARGETDURATION:4
+#EXT-X-MEDIA-SEQUENCE:10
+#EXT-X-MAP:URI="init.mp4",BYTERANGE="100@0"
+#EXT-X-KEY:METHOD=AES-128,URI="key1",IV=0x1
+#EXTINF:4.0,
+#EXT-X-BYTERANGE:500
+media.mp4
+#EXTINF:3.5,title
+#EXT-X-BYTERANGE:500@1000
+media.mp4
+#UPLYNK-SEGMENT:abc,00000000,ad
+#EXTINF:2,
+ad.ts
+#UPLYNK-SEGMENT:abc,00000001,segment
+#EXT-X-DISCONTINUITY
+#EXT-X-KEY:METHOD=NONE
+#EXTINF:4,
+
+seg2.ts
+'''
+
+
+class TestM3U8Playlist(unittest.TestCase):
+    def test_media_playlist(self):
+        playlist = Playlist(MEDIA_PLAYLIST)
+        self.assertFalse(playlist.is_master)
+        self.assertFalse(playlist.ended)
+        self.assertEqual(playlist.target_duration, 4)
+        self.assertEqual(playlist.discontinuity, 1)
+        self.assertEqual(playlist.media_sequence, 14)
+        key = {'METHOD': 'AES-128', 'URI': 'key1', 'IV': '0x1'}
+        self.assertEqual(playlist.segments, [
+            Segment('init.mp4', 10, None, 0, None, (0, 100), True, False),
+            Segment('media.mp4', 10, 4.0, 0, key, (100, 600), False, False),
+            Segment('media.mp4', 11, 3.5, 0, key, (1000, 1500), False, False),
+            Segment('ad.ts', 12, 2.0, 0, key, None, False, True),
+            Segment('seg2.ts', 13, 4.0, 1, {'METHOD': 'NONE'}, None, False, False),
+        ])
+        # The records share the attributes of the key
+        self.assertIs(playlist.segments[1].key, playlist.segments[3].key)
+
+    def test_append(self):
+        playlist = Playlist()
+        self.assertEqual(len(playlist.feed(MEDIA_PLAYLIST)), 5)
+        segments = playlist.feed(MEDIA_PLAYLIST + '#EXTINF:4,\nseg3.ts\n#EXT-X-ENDLIST\n')
+        self.assertEqual(segments, [Segment('seg3.ts', 14, 4.0, 1, {'METHOD': 'NONE'}, None, False, False)])
+        self.assertTrue(playlist.ended)
+        self.assertEqual(len(playlist.segments), 6)
+
+    def test_sliding_window(self):
+        def window(first, last, discontinuity_sequence=0):
+            return ''.join((
+                '#EXTM3U\n#EXT-X-TARGETDURATION:2\n',
+                f'#EXT-X-MEDIA-SEQUENCE:{first}\n',
+                f'#EXT-X-DISCONTINUITY-SEQUENCE:{discontinuity_sequence}\n',
+                '#EXT-X-MAP:URI="init.mp4"\n#EXT-X-KEY:METHOD=AES-128,URI="key"\n',
+                *(f'#EXTINF:2,\n{index}.ts\n' for index in range(first, last + 1))))
+
+        playlist = Playlist(window(100, 104))
+        key = playlist.segments[1].key
+        self.assertEqual(
+            [segment.uri for segment in playlist.segments], ['init.mp4', *map('{}.ts'.format, range(100, 105))])
+        segments = playlist.feed(window(103, 107))
+        self.assertEqual([segment.uri for segment in segments], ['105.ts', '106.ts', '107.ts'])
+        self.assertEqual([segment.sequence for segment in segments], [105, 106, 107])
+        self.assertIs(segments[0].key, key)
+        self.assertEqual(playlist.feed(window(103, 107)), [])
+        # The window moved past all the known segments
+        segments = playlist.feed(window(110, 111, discontinuity_sequence=1))
+        self.assertEqual([segment.uri for segment in segments], ['init.mp4', '110.ts', '111.ts'])
+        self.assertEqual(segments[1].discontinuity, 1)
+
+    def test_delta_update(self):
+        playlist = Playlist('''#EXTM3U
+#EXT-X-TARGETDURATION:2
+#EXT-X-SERVER-CONTROL:CAN-BLOCK-RELOAD=YES,CAN-SKIP-UNTIL=12.0
+#EXT-X-MEDIA-SEQUENCE:7
+#EXT-X-KEY:METHOD=AES-128,URI="key"
+#EXTINF:2,
+7.ts
+#EXT-X-DISCONTINUITY
+#EXTINF:2,
+8.ts
+''')
+        self.assertEqual(playlist.server_control, {'CAN-BLOCK-RELOAD': 'YES', 'CAN-SKIP-UNTIL': '12.0'})
+        key = playlist.segments[0].key
+        segments = playlist.feed('''#EXTM3U
+#EXT-X-TARGETDURATION:2
+#EXT-X-SERVER-CONTROL:CAN-BLOCK-RELOAD=YES,CAN-SKIP-UNTIL=12.0
+#EXT-X-MEDIA-SEQUENCE:7
+#EXT-X-SKIP:SKIPPED-SEGMENTS=2
+#EXTINF:2,
+9.ts
+''')
+        # The skipped segments' tags still apply
+        self.assertEqual(segments, [Segment('9.ts', 9, 2.0, 1, key, None, False, False)])
+
+    def test_no_target_duration(self):
+        playlist = Playlist('#EXTM3U\n#EXT-X-MEDIA-SEQUENCE:0\n#EXTINF:10,\n/s0\n#EXTINF:10,\n/s1\n#EXT-X-ENDLIST\n')
+        self.assertFalse(playlist.is_master)
+        self.assertEqual(playlist.variants, [])
+        self.assertEqual(playlist.segments, [
+            Segment('/s0', 0, 10.0, 0, None, None, False, False),
+            Segment('/s1', 1, 10.0, 0, None, None, False, False),
+        ])
+
+    def test_master_playlist(self):
+        playlist = Playlist('''#EXTM3U
+#EXT-X-STREAM-INF:BANDWIDTH=1280000,RESOLUTION=1280x720,AUDIO="aac"
+720p.m3u8
+#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="aac",NAME="English",URI="audio.m3u8"
+#EXT-X-STREAM-INF:BANDWIDTH=640000,CODECS="avc1.4d401e,mp4a.40.2"
+360p.m3u8
+''')
+        self.assertTrue(playlist.is_master)
+        self.assertEqual(playlist.segments, [])
+        self.assertEqual(playlist.media, [{'TYPE': 'AUDIO', 'GROUP-ID': 'aac', 'NAME': 'English', 'URI': 'audio.m3u8'}])
+        self.assertEqual([(variant.uri, variant.stream_inf.get('BANDWIDTH')) for variant in playlist.variants], [
+            ('720p.m3u8', '1280000'), ('360p.m3u8', '640000')])
+
+    def test_master_playlist_without_stream_inf(self):
+        playlist = Playlist('#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=1000\nhi.m3u8\nlo.m3u8\n')
+        self.assertTrue(playlist.is_master)
+        self.assertEqual(playlist.segments, [])
+        self.assertEqual(playlist.variants, [Variant('hi.m3u8', {'BANDWIDTH': '1000'}), Variant('lo.m3u8', {})])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,6 +10,7 @@
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import collections
 import gzip
 import http.client
 import http.cookiejar
@@ -18,6 +19,7 @@
 import logging
 import pathlib
 import random
+import socket
 import ssl
 import tempfile
 import threading
@@ -46,6 +48,7 @@
     Response,
 )
 from yt_dlp.networking._urllib import UrllibRH
+from yt_dlp.networking.budget import HostConnectionLimit, TokenBucket
 from yt_dlp.networking.exceptions import (
     CertificateVerifyError,
     HTTPError,
@@ -611,6 +614,26 @@ def test_read(self, handler):
             assert res.read().decode().endswith('\n\n')
             assert res.read() == b''
 
+    def test_readinto(self, handler):
+        with handler() as rh:
+            res = validate_and_send(
+                rh, Request(f'http://127.0.0.1:{self.http_port}/headers'))
+            buffer = bytearray(4)
+            assert res.readinto(buffer) == 4
+            assert buffer == b'Host'
+            with memoryview(buffer) as view:
+                assert res.readinto(view[1:3]) == 2
+            assert buffer == b'H: t'
+            assert res.read().decode().endswith('\n\n')
+            assert res.readinto(buffer) == 0
+
+            res = validate_and_send(
+                rh, Request(
+                    f'http://127.0.0.1:{self.http_port}/content-encoding',
+                    headers={'ytdl-encoding': 'gzip'}))
+            buffer = bytearray(1024)
+            assert buffer[:res.readinto(buffer)] == b'<html><video src="/vid.mp4" /></html>'
+
     def test_request_disable_proxy(self, handler):
         for proxy_proto in handler._SUPPORTED_PROXY_SCHEMES or ['http']:
             # Given the handler is configured with a proxy
@@ -798,6 +821,50 @@ def test_verify_cert_error_text(self, handler):
             ):
                 validate_and_send(rh, Request(f'https://127.0.0.1:{self.https_port}/headers'))
 
+    @pytest.mark.parametrize('scheme', ['http', 'https'])
+    def test_keep_alive(self, handler, scheme):
+        url = f'{scheme}://127.0.0.1:{getattr(self, f"{scheme}_port")}'
+        with handler(verify=False) as rh:
+            for _ in range(3):
+                assert b'Host' in validate_and_send(rh, Request(f'{url}/headers')).read()
+            assert rh.connection_stats == {'opened': 1, 'reused': 2}
+
+            # Connections with an unread response body cannot be reused
+            res = validate_and_send(rh, Request(f'{url}/headers'))
+            res.read(1)
+            res.close()
+            validate_and_send(rh, Request(f'{url}/headers')).read()
+            assert rh.connection_stats == {'opened': 2, 'reused': 3}
+
+            # A response without a body does not need to be read
+            validate_and_send(rh, HEADRequest(f'{url}/method')).close()
+            validate_and_send(rh, Request(f'{url}/headers')).read()
+            assert rh.connection_stats == {'opened': 2, 'reused': 5}
+
+            rh._connection_pool.idle_timeout = 0
+            validate_and_send(rh, Request(f'{url}/headers')).read()
+            assert rh.connection_stats == {'opened': 3, 'reused': 5}
+
+    def test_keep_alive_dropped_connection(self, handler, monkeypatch):
+        def drop_idle_connection(rh):
+            for idle in rh._connection_pool._idle.values():
+                for conn, _ in idle:
+                    conn.sock.shutdown(socket.SHUT_RDWR)
+
+        with handler() as rh:
+            validate_and_send(rh, Request(f'http://127.0.0.1:{self.http_port}/headers')).read()
+            drop_idle_connection(rh)
+            # Closed connections are detected before they are reused
+            validate_and_send(rh, Request(f'http://127.0.0.1:{self.http_port}/headers')).read()
+            assert rh.connection_stats == {'opened': 2}
+
+            drop_idle_connection(rh)
+            monkeypatch.setattr(rh._connection_pool, '_is_dropped', lambda _: False)
+            # Requests over a connection closed in the meantime are retried with a new connection
+            res = validate_and_send(rh, Request(f'http://127.0.0.1:{self.http_port}/method', data=b'test'))
+            assert res.read().startswith(b'test')
+            assert rh.connection_stats == {'opened': 3, 'reused': 1}
+
     @pytest.mark.parametrize('req,match,version_check', [
         # https://github.com/python/cpython/blob/987b712b4aeeece336eed24fcc87a950a756c3e2/Lib/http/client.py#L1256
         # bpo-39603: Check implemented in 3.7.9+, 3.8.5+
@@ -1456,6 +1523,19 @@ def mock_close(*args, **kwargs):
         director.close()
         assert called
 
+    def test_connection_stats(self):
+        class SomeRH(RequestHandler):
+            def _send(self, request):
+                pass
+
+        director = RequestDirector(logger=FakeLogger())
+        assert director.connection_stats == {}
+        director.add_handler(FakeRH(logger=FakeLogger()))
+        director.add_handler(SomeRH(logger=FakeLogger()))
+        director.handlers[FakeRH.RH_KEY].connection_stats.update(opened=2, reused=3)
+        director.handlers[SomeRH.RH_KEY].connection_stats.update(opened=1)
+        assert director.connection_stats == {'opened': 3, 'reused': 3}
+
 
 # XXX: do we want to move this to test_YoutubeDL.py?
 class TestYoutubeDLNetworking:
@@ -1903,6 +1983,15 @@ def test_get_header(self):
         assert res.get_header('set-Cookie') == 'cookie1'
         assert res.get_header('notexist', 'default') == 'default'
 
+    def test_readinto(self):
+        res = Response(io.BytesIO(b'abcdef'), url='test://', headers={})
+        buffer = bytearray(4)
+        assert res.readinto(buffer) == 4
+        assert buffer == b'abcd'
+        assert res.readinto(buffer) == 2
+        assert buffer == b'efcd'
+        assert res.readinto(buffer) == 0
+
     def test_compat(self):
         res = Response(io.BytesIO(b''), url='test://', status=404, headers={'test': 'test'})
         with warnings.catch_warnings():
@@ -1913,6 +2002,68 @@ def test_compat(self):
             assert res.getheader('test') == res.get_header('test')
 
 
+class TestBudget:
+    def test_token_bucket(self):
+        bucket = TokenBucket()
+        start = time.monotonic()
+        bucket.consume(10 ** 9)
+        assert time.monotonic() - start < 0.1
+
+        bucket.rate = 10000
+        start = time.monotonic()
+        for _ in range(3):
+            bucket.consume(1000)
+        assert 0.25 <= time.monotonic() - start < 1
+
+        # Threads share the rate
+        start = time.monotonic()
+        threads = [threading.Thread(target=bucket.consume, args=(1000,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert 0.35 <= time.monotonic() - start < 1
+
+        # The rate can be changed at any time
+        bucket.rate = None
+        start = time.monotonic()
+        bucket.consume(10 ** 9)
+        assert time.monotonic() - start < 0.1
+
+    def test_host_connection_limit(self):
+        limit = HostConnectionLimit(2)
+        lock = threading.Lock()
+        active, max_active = collections.Counter(), collections.Counter()
+
+        def connect(host):
+            with limit.connection(host):
+                with lock:
+                    active[host] += 1
+                    max_active[host] = max(max_active[host], active[host])
+                time.sleep(0.02)
+                with lock:
+                    active[host] -= 1
+
+        threads = [threading.Thread(target=connect, args=(host,)) for host in ('a', 'b') * 5]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert max_active == {'a': 2, 'b': 2}
+        assert limit.active('a') == 0
+
+        # Raising the limit wakes up the waiting threads
+        limit.limit = 1
+        with limit.connection('a'):
+            thread = threading.Thread(target=connect, args=('a',))
+            thread.start()
+            time.sleep(0.05)
+            assert thread.is_alive()
+            limit.limit = None
+            thread.join(1)
+            assert not thread.is_alive()
+
+
 class TestImpersonateTarget:
     @pytest.mark.parametrize('target_str,expected', [
         ('abc', ImpersonateTarget('abc', None, None, None)),
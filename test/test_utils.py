@@ -15,6 +15,8 @@
 import itertools
 import json
 import subprocess
+import threading
+import time
 import xml.etree.ElementTree
 
 from yt_dlp.compat import (
@@ -24,6 +26,7 @@
 )
 from yt_dlp.utils import (
     Config,
+    CopyOnWriteDict,
     DateRange,
     ExtractorError,
     InAdvancePagedList,
@@ -712,13 +715,14 @@ def get_page(pagenum):
                 upto = min(size, pagenum * pagesize + pagesize)
                 yield from range(firstid, upto)
 
-            pl = OnDemandPagedList(get_page, pagesize)
-            got = pl.getslice(*sliceargs)
-            self.assertEqual(got, expected)
+            for prefetch in (0, 2):
+                pl = OnDemandPagedList(get_page, pagesize, prefetch=prefetch)
+                got = pl.getslice(*sliceargs)
+                self.assertEqual(got, expected)
 
-            iapl = InAdvancePagedList(get_page, size // pagesize + 1, pagesize)
-            got = iapl.getslice(*sliceargs)
-            self.assertEqual(got, expected)
+                iapl = InAdvancePagedList(get_page, size // pagesize + 1, pagesize, prefetch=prefetch)
+                got = iapl.getslice(*sliceargs)
+                self.assertEqual(got, expected)
 
         testPL(5, 2, (), [0, 1, 2, 3, 4])
         testPL(5, 2, (1,), [1, 2, 3, 4])
@@ -729,6 +733,60 @@ def get_page(pagenum):
         testPL(5, 2, (2, 99), [2, 3, 4])
         testPL(5, 2, (20, 99), [])
 
+    def test_paged_list_prefetch(self):
+        fetched, lock = [], threading.Lock()
+
+        def get_page(pagenum):
+            with lock:
+                fetched.append(pagenum)
+            time.sleep(0.05 * (pagenum % 3))  # Make the pages finish out of order
+            if pagenum == 7:
+                raise ValueError('page 7')
+            return range(pagenum * 2, min(pagenum * 2 + 2, 11))
+
+        pl = OnDemandPagedList(get_page, 2, prefetch=3)
+        self.assertEqual(pl.getslice(0, 5), [0, 1, 2, 3, 4])
+        self.assertEqual(sorted(fetched), [0, 1, 2])
+        # Errors while fetching pages that are not needed are ignored
+        self.assertEqual(pl.getslice(), list(range(11)))
+        self.assertLessEqual(set(range(6)), set(fetched))
+        self.assertLessEqual(set(fetched), set(range(9)))
+        self.assertEqual(sorted(pl._cache), [0, 1, 2, 3, 4, 5])
+
+        pl = OnDemandPagedList(get_page, 2, use_cache=False, prefetch=3)
+        self.assertEqual(pl.getslice(3), list(range(3, 11)))
+        self.assertEqual(pl._cache, {})
+
+        fetched.clear()
+        pl = InAdvancePagedList(get_page, 6, 2, prefetch=2)
+        self.assertEqual(pl.getslice(3), list(range(3, 11)))
+        self.assertEqual(sorted(fetched), [1, 2, 3, 4, 5])
+        pl = InAdvancePagedList(get_page, 9, 2, prefetch=2)
+        with self.assertRaisesRegex(ValueError, 'page 7'):
+            pl.getslice(10)
+
+        # The threads are stopped once the last page is reached
+        for pl in (OnDemandPagedList(get_page, 2, prefetch=3), InAdvancePagedList(get_page, 6, 2, prefetch=2)):
+            self.assertEqual(pl.getslice(), list(range(11)))
+            self.assertIsNone(pl._executor)
+
+        # Indexing fetches the next pages, like playlists do
+        fetched.clear()
+        pl = InAdvancePagedList(get_page, 6, 2, prefetch=2)
+        self.assertEqual(pl[0], 0)
+        self.assertEqual(sorted(fetched), [0, 1, 2])
+        self.assertEqual([pl[i] for i in range(1, 11)], list(range(1, 11)))
+        self.assertEqual(sorted(fetched), [0, 1, 2, 3, 4, 5])
+        self.assertIsNone(pl._executor)
+
+        pl = OnDemandPagedList(get_page, 2, prefetch=3)
+        self.assertEqual(pl[0], 0)
+        self.assertIsNotNone(pl._executor)
+        pl.close()
+        self.assertIsNone(pl._executor)
+        self.assertEqual(pl._prefetched, {})
+        self.assertEqual(pl[3], 3)
+
     def test_read_batch_urls(self):
         f = io.StringIO('''\xef\xbb\xbf foo
             bar\r
@@ -1881,6 +1939,55 @@ def test_clean_podcast_url(self):
         self.assertEqual(clean_podcast_url('https://pdst.fm/e/2.gum.fm/chtbl.com/track/chrt.fm/track/34D33/pscrb.fm/rss/p/traffic.megaphone.fm/ITLLC7765286967.mp3?updated=1687282661'), 'https://traffic.megaphone.fm/ITLLC7765286967.mp3?updated=1687282661')
         self.assertEqual(clean_podcast_url('https://pdst.fm/e/https://mgln.ai/e/441/www.buzzsprout.com/1121972/13019085-ep-252-the-deep-life-stack.mp3'), 'https://www.buzzsprout.com/1121972/13019085-ep-252-the-deep-life-stack.mp3')
 
+    def test_CopyOnWriteDict(self):
+        original = {'a': 1, 'b': {'c': 2}, 'd': 3}
+        view = CopyOnWriteDict(original, deleted=('d',))
+        self.assertEqual(view, {'a': 1, 'b': {'c': 2}})
+        self.assertIs(view['b'], original['b'])
+        self.assertNotIn('d', view)
+        self.assertIsNone(view.get('d'))
+        self.assertRaises(KeyError, lambda: view['d'])
+
+        view['a'] = 4
+        view['e'] = 5
+        del view['b']
+        self.assertEqual(view.pop('e'), 5)
+        self.assertEqual(view.pop('e', None), None)
+        self.assertEqual(list(view), ['a'])
+        self.assertEqual(len(view), 1)
+        self.assertEqual(original, {'a': 1, 'b': {'c': 2}, 'd': 3})
+
+        view['d'] = 6
+        self.assertEqual(view.to_dict(), {'a': 4, 'd': 6})
+        self.assertEqual(repr(view), repr({'a': 4, 'd': 6}))
+
+        # Views can be stacked
+        child = view.copy()
+        child['a'] = 7
+        self.assertEqual(child, {'a': 7, 'd': 6})
+        self.assertEqual(CopyOnWriteDict({'b': 8}, child).to_dict(), {'a': 7, 'd': 6, 'b': 8})
+        self.assertEqual(view['a'], 4)
+        child.clear()
+        self.assertFalse(child)
+        self.assertTrue(view)
+
+        # Copies are independent snapshots
+        view = CopyOnWriteDict({'a': 1})
+        copy = view.copy()
+        view['a'] = 2
+        copy['b'] = 3
+        self.assertEqual(copy, {'a': 1, 'b': 3})
+        self.assertEqual(view, {'a': 2})
+
+        view = CopyOnWriteDict({'x': 9}, original)
+        self.assertEqual(view.popitem(), ('x', 9))
+        self.assertEqual(view.popitem(), ('d', 3))
+        self.assertEqual(view, {'a': 1, 'b': {'c': 2}})
+        view.popitem()
+        view.popitem()
+        self.assertRaises(KeyError, view.popitem)
+        self.assertEqual(original, {'a': 1, 'b': {'c': 2}, 'd': 3})
+
     def test_LazyList(self):
         it = list(range(10))
 
@@ -10,6 +10,7 @@
 
 import contextlib
 import re
+import shutil
 import string
 import urllib.request
 
@@ -198,6 +199,43 @@ def test_youtube_extract_player_info(self):
             self.assertEqual(player_id, expected_player_id)
 
 
+class TestNsigResultCache(unittest.TestCase):
+    PLAYER_URL = 'https://www.youtube.com/s/player/b22ef6e7/player_ias.vflset/en_US/base.js'
+
+    def setUp(self):
+        TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+        self.cache_dir = os.path.join(TEST_DIR, 'testdata', 'nsig_cache_test')
+        self.tearDown()
+
+    def tearDown(self):
+        if os.path.exists(self.cache_dir):
+            shutil.rmtree(self.cache_dir)
+
+    def make_ie(self, func_code=None):
+        ie = YoutubeIE(FakeYDL({'cachedir': self.cache_dir}))
+
+        def extract_n_function_code(video_id, player_url):
+            if not func_code:
+                raise AssertionError('nsig function should not be extracted')
+            return JSInterpreter(''), 'b22ef6e7', func_code
+
+        ie._extract_n_function_code = extract_n_function_code
+        return ie
+
+    def test_nsig_result_cache(self):
+        ie = self.make_ie((['a'], 'return a.split("").reverse().join("")'))
+        ie._NSIG_RESULTS_CACHE_SIZE = 2
+        for n in ('abc', 'def', 'abc', 'ghi'):
+            self.assertEqual(ie._decrypt_nsig(n, None, self.PLAYER_URL), n[::-1])
+
+        # Results are reused by other processes, and the least recently used ones are evicted
+        ie = self.make_ie()
+        self.assertEqual(ie._decrypt_nsig('abc', None, self.PLAYER_URL), 'cba')
+        self.assertEqual(ie._decrypt_nsig('ghi', None, self.PLAYER_URL), 'ihg')
+        with self.assertRaises(Exception):
+            ie._decrypt_nsig('def', None, self.PLAYER_URL)
+
+
 @is_download_test
 class TestSignature(unittest.TestCase):
     def setUp(self):
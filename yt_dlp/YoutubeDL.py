@@ -1,10 +1,12 @@
 import collections
+import concurrent.futures
 import contextlib
 import copy
 import datetime as dt
 import errno
 import fileinput
 import functools
+import hashlib
 import http.cookiejar
 import io
 import itertools
@@ -19,23 +21,32 @@
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 import tokenize
 import traceback
 import unicodedata
 
+from .archive import IndexedDownloadArchive
 from .cache import Cache
 from .compat import urllib  # isort: split
 from .compat import compat_os_name, urllib_req_to_req
 from .cookies import LenientSimpleCookie, load_cookies
 from .downloader import FFmpegFD, get_suitable_downloader, shorten_protocol_name
+from .downloader.merge import StreamMergeFD
 from .downloader.rtmp import rtmpdump_version
-from .extractor import gen_extractor_classes, get_info_extractor
+from .extractor import (
+    gen_extractor_classes,
+    get_info_extractor,
+    is_url_indexed,
+    url_index_candidates,
+)
 from .extractor.common import UnsupportedURLIE
 from .extractor.openload import PhantomJSwrapper
 from .minicurses import format_text
 from .networking import HEADRequest, Request, RequestDirector
-from .networking.common import _REQUEST_HANDLERS, _RH_PREFERENCES
+from .networking.budget import GLOBAL_BUDGET
+from .networking.common import _RH_PREFERENCES, _load_request_handlers
 from .networking.exceptions import (
     HTTPError,
     NoSupportingHandlers,
@@ -80,6 +91,7 @@
     STR_FORMAT_RE_TMPL,
     STR_FORMAT_TYPES,
     ContentTooShortError,
+    CopyOnWriteDict,
     DateRange,
     DownloadCancelled,
     DownloadError,
@@ -99,10 +111,12 @@
     ReExtractInfo,
     RejectedVideoReached,
     SameFileError,
+    StreamingJSONWriter,
     UnavailableVideoError,
     UserNotLive,
     YoutubeDLError,
     age_restricted,
+    atomic_write_file,
     bug_reports_message,
     date_from_str,
     deprecation_warning,
@@ -234,6 +248,9 @@ class YoutubeDL:
     forcejson:         Force printing info_dict as JSON.
     dump_single_json:  Force printing the info_dict of the whole playlist
                        (or video) as a single JSON line.
+    stream_playlist_json: Write the entries of playlists to the output of
+                       dump_single_json and to the playlist infojson as they
+                       are processed, instead of holding them in memory
     force_write_download_archive: Force writing download archive regardless
                        of 'skip_download' or 'simulate'.
     simulate:          Do not download the video files. If unset (or None),
@@ -260,6 +277,11 @@ class YoutubeDL:
                        Can be True (check all), False (check none),
                        'selected' (check selected formats),
                        or None (check only if requested by extractor)
+    concurrent_format_checks: Number of formats to test at a time when
+                       checking formats (default: 4)
+    format_check_cache_ttl: Number of seconds for which the result of
+                       testing a format is kept in the cache. The result
+                       is cached per format URL (default: not cached)
     paths:             Dictionary of output paths. The allowed keys are 'home'
                        'temp' and the keys of OUTTMPL_TYPES (in utils/_utils.py)
     outtmpl:           Dictionary of templates for output names. Allowed keys
@@ -281,6 +303,15 @@ class YoutubeDL:
     playlist_items:    Specific indices of playlist to download.
     playlistrandom:    Download playlist items in random order.
     lazy_playlist:     Process playlist entries as they are received.
+    concurrent_entries: Number of playlist entries to process concurrently.
+                       The entries are still returned, and recorded in the
+                       download archive, in playlist order (default: 1)
+    concurrent_postprocessing: Number of videos that can be post-processed in
+                       the background while the next ones are downloaded.
+                       The "after_move" and "after_video" postprocessors,
+                       post_hooks and the download archive still follow the
+                       order of the downloads (default: 0, i.e. post-process
+                       each video before starting the next download)
     matchtitle:        Download only matching titles.
     rejecttitle:       Reject downloads for matching titles.
     logger:            Log messages to a logging.Logger instance.
@@ -328,6 +359,9 @@ class YoutubeDL:
                        downloaded. None for no limit.
     download_archive:  A set, or the name of a file where all downloads are recorded.
                        Videos already present in the file are not downloaded again.
+    download_archive_index: Look up the download_archive file through an
+                       on-disk index instead of loading it into memory.
+                       See archive.IndexedDownloadArchive
     break_on_existing: Stop the download process after attempting to download a
                        file that is in the archive.
     break_per_url:     Whether break_on_reject and break_on_existing
@@ -397,6 +431,10 @@ class YoutubeDL:
                                          downloaded video fragment.
                        * fragment_count: The number of fragments (= individual
                                          files that will be merged)
+                       * http_chunking: The state of the adaptive chunking when
+                                        http_chunk_size is "auto", with the keys
+                                        strategy ("single" or "chunked"), chunk_size,
+                                        block_size, throughput, latency and throttled_after
 
                        Progress hooks are guaranteed to be called at least once
                        (with status "finished") if the download is successful.
@@ -421,6 +459,11 @@ class YoutubeDL:
     source_address:    Client-side IP address to bind to.
     impersonate:       Client to impersonate for requests.
                        An ImpersonateTarget (from yt_dlp.networking.impersonate)
+    global_ratelimit:  Download speed limit in bytes/sec shared by all the downloads
+                       in the process. See yt_dlp.networking.budget.GLOBAL_BUDGET,
+                       which can also be used to change it at runtime
+    max_connections_per_host: Maximum number of simultaneous download connections
+                       to each host, shared by all the downloads in the process
     sleep_interval_requests: Number of seconds to sleep between requests
                        during extraction
     sleep_interval:    Number of seconds to sleep before each download when
@@ -495,8 +538,9 @@ class YoutubeDL:
     the downloader (see yt_dlp/downloader/common.py):
     nopart, updatetime, buffersize, ratelimit, throttledratelimit, min_filesize,
     max_filesize, test, noresizebuffer, retries, file_access_retries, fragment_retries,
-    continuedl, xattr_set_filesize, hls_use_mpegts, http_chunk_size,
-    external_downloader_args, concurrent_fragment_downloads, progress_delta.
+    continuedl, xattr_set_filesize, hls_use_mpegts, http_chunk_size, http_connections,
+    external_downloader_args, concurrent_fragment_downloads, async_fragments, in_memory_fragments,
+    progress_delta, stream_merge.
 
     The following options are used by the post processors:
     ffmpeg_location:   Location of the ffmpeg/avconv binary; either the path
@@ -624,6 +668,7 @@ def __init__(self, params=None, auto_init=True):
         self.params = params
         self._ies = {}
         self._ies_instances = {}
+        self._unindexed_ies = self._ie_positions = None
         self._pps = {k: [] for k in POSTPROCESS_WHEN}
         self._printed_messages = set()
         self._first_webpage_request = True
@@ -632,7 +677,13 @@ def __init__(self, params=None, auto_init=True):
         self._postprocessor_hooks = []
         self._download_retcode = 0
         self._num_downloads = 0
+        self._num_downloads_lock = threading.Lock()
         self._num_videos = 0
+        self._entry_worker = threading.local()
+        self._pp_pool, self._pp_jobs = None, collections.deque()
+        self._format_sorters, self._format_selectors = {}, {}
+        self._outtmpl_evaluators = {}
+        self._stream_single_json, self._single_json_writer = False, None
         self._playlist_level = 0
         self._playlist_urls = set()
         self.cache = Cache(self)
@@ -741,6 +792,11 @@ def check_deprecated(param, option, suggestion):
                     f'Use --list-impersonate-targets to see available targets. '
                     f'You may be missing dependencies required to support this target.')
 
+        if self.params.get('global_ratelimit') is not None:
+            GLOBAL_BUDGET.rate = self.params['global_ratelimit']
+        if self.params.get('max_connections_per_host') is not None:
+            GLOBAL_BUDGET.connections_per_host = self.params['max_connections_per_host']
+
         if 'list-formats' in self.params['compat_opts']:
             self.params['listformats_table'] = False
 
@@ -813,6 +869,13 @@ def preload_download_archive(fn):
             elif not is_path_like(fn):
                 return fn
 
+            if self.params.get('download_archive_index'):
+                self.write_debug(f'Using index of archive file {fn!r}')
+                try:
+                    return IndexedDownloadArchive(fn, write_debug=self.write_debug)
+                except Exception as e:
+                    self.report_warning(f'Unable to use the download archive index: {e}')
+
             self.write_debug(f'Loading archive file {fn!r}')
             try:
                 with locked_file(fn, 'r', encoding='utf-8') as archive_file:
@@ -844,6 +907,7 @@ def add_info_extractor(self, ie):
         """Add an InfoExtractor object to the end of the list."""
         ie_key = ie.ie_key()
         self._ies[ie_key] = ie
+        self._unindexed_ies = None
         if not isinstance(ie, type):
             self._ies_instances[ie_key] = ie
             ie.set_downloader(self)
@@ -860,6 +924,22 @@ def get_info_extractor(self, ie_key):
             self.add_info_extractor(ie)
         return ie
 
+    def _candidate_ies(self, url):
+        """
+        Return the extractors that may be suitable for the URL, in the order of the extractor list
+
+        The extractors that the URL index rules out are skipped, so that their
+        `_VALID_URL` does not have to be compiled and matched
+        """
+        candidates = url_index_candidates(url)
+        if candidates is None:
+            return self._ies
+        if self._unindexed_ies is None:
+            self._unindexed_ies = {ie_key for ie_key, ie in self._ies.items() if not is_url_indexed(ie)}
+            self._ie_positions = {ie_key: i for i, ie_key in enumerate(self._ies)}
+        ie_keys = (candidates & self._ie_positions.keys()) | self._unindexed_ies
+        return {ie_key: self._ies[ie_key] for ie_key in sorted(ie_keys, key=self._ie_positions.__getitem__)}
+
     def add_default_info_extractors(self):
         """
         Add the InfoExtractors returned by gen_extractors to the end of the list
@@ -988,8 +1068,16 @@ def __exit__(self, *args):
         self.close()
 
     def close(self):
+        if self._pp_pool is not None:
+            self._pp_pool.shutdown(wait=True)
+            self._pp_pool = None
         self.save_cookies()
+        if isinstance(self.archive, IndexedDownloadArchive):
+            self.archive.close()
         if '_request_director' in self.__dict__:
+            stats = self._request_director.connection_stats
+            if stats:
+                self.write_debug(f'Connections opened: {stats["opened"]}, reused: {stats["reused"]}')
             self._request_director.close()
             del self._request_director
 
@@ -1181,13 +1269,20 @@ def validate_outtmpl(cls, outtmpl):
         except ValueError as err:
             return err
 
-    @staticmethod
-    def _copy_infodict(info_dict):
-        info_dict = dict(info_dict)
-        info_dict.pop('__postprocessors', None)
-        info_dict.pop('__pending_error', None)
+    _UNCOPIED_INFO_KEYS = ('__postprocessors', '__pending_error')
+
+    @classmethod
+    def _copy_infodict(cls, info_dict):
+        info_dict = info_dict.to_dict() if isinstance(info_dict, CopyOnWriteDict) else dict(info_dict)
+        for key in cls._UNCOPIED_INFO_KEYS:
+            info_dict.pop(key, None)
         return info_dict
 
+    @classmethod
+    def _view_infodict(cls, info_dict, *maps, deleted=()):
+        """ Like _copy_infodict, but without copying info_dict. The given maps take precedence over it """
+        return CopyOnWriteDict(*maps, info_dict, deleted=(*cls._UNCOPIED_INFO_KEYS, *deleted))
+
     def prepare_outtmpl(self, outtmpl, info_dict, sanitize=False):
         """ Make the outtmpl and info_dict suitable for substitution: ydl.escape_outtmpl(outtmpl) % info_dict
         @param sanitize    Whether to sanitize the output as a filename.
@@ -1196,25 +1291,29 @@ def prepare_outtmpl(self, outtmpl, info_dict, sanitize=False):
 
         info_dict.setdefault('epoch', int(time.time()))  # keep epoch consistent once set
 
-        info_dict = self._copy_infodict(info_dict)
+        info_dict = self._view_infodict(info_dict)
         info_dict['duration_string'] = (  # %(duration>%H-%M-%S)s is wrong if duration > 24hrs
             formatSeconds(info_dict['duration'], '-' if sanitize else ':')
             if info_dict.get('duration', None) is not None
             else None)
-        info_dict['autonumber'] = int(self.params.get('autonumber_start', 1) - 1 + self._num_downloads)
-        info_dict['video_autonumber'] = self._num_videos
+        # Entries processed concurrently must not see each other's counts
+        info_dict['autonumber'] = int(
+            self.params.get('autonumber_start', 1) - 1 + info_dict.get('__autonumber', self._num_downloads))
+        info_dict['video_autonumber'] = info_dict.get('__video_autonumber', self._num_videos)
         if info_dict.get('resolution') is None:
             info_dict['resolution'] = self.format_resolution(info_dict, default=None)
 
-        # For fields playlist_index, playlist_autonumber and autonumber convert all occurrences
-        # of %(field)s to %(field)0Nd for backward compatibility
-        field_size_compat_map = {
-            'playlist_index': number_of_digits(info_dict.get('__last_playlist_index') or 0),
-            'playlist_autonumber': number_of_digits(info_dict.get('n_entries') or 0),
-            'autonumber': self.params.get('autonumber_size') or 5,
-        }
+        return self._get_outtmpl_evaluator(outtmpl, sanitize)(info_dict)
+
+    def _get_outtmpl_evaluator(self, outtmpl, sanitize=False):
+        # The same templates are evaluated for every video and on every progress update
+        key = (outtmpl, sanitize)
+        evaluator = self._outtmpl_evaluators.get(key)
+        if evaluator is None:
+            evaluator = self._outtmpl_evaluators[key] = self._compile_outtmpl(outtmpl, sanitize)
+        return evaluator
 
-        TMPL_DICT = {}
+    def _compile_outtmpl(self, outtmpl, sanitize=False):
         EXTERNAL_FORMAT_RE = re.compile(STR_FORMAT_RE_TMPL.format('[^)]*', f'[{STR_FORMAT_TYPES}ljhqBUDS]'))
         MATH_FUNCTIONS = {
             '+': float.__add__,
@@ -1250,7 +1349,7 @@ def _from_user_input(field):
                 return int(field)
             return field
 
-        def _traverse_infodict(fields):
+        def _compile_traversal(fields):
             fields = [f for x in re.split(r'\.({.+?})\.?', fields)
                       for f in ([x] if x.startswith('{') else x.split('.'))]
             for i in (0, -1):
@@ -1264,50 +1363,81 @@ def _traverse_infodict(fields):
                 assert f.endswith('}'), f'No closing brace for {f} in {fields}'
                 fields[i] = {k: list(map(_from_user_input, k.split('.'))) for k in f[1:-1].split(',')}
 
-            return traverse_obj(info_dict, fields, traverse_string=True)
+            if len(fields) == 1 and isinstance(fields[0], str):
+                # Most fields are top-level keys, which don't need the full traversal
+                def get_field(info_dict, key=fields[0]):
+                    value = info_dict.get(key)
+                    return None if value in (None, {}) else value
+                return get_field
+            return lambda info_dict: traverse_obj(info_dict, fields, traverse_string=True)
+
+        def _compile_maths(offset_key):
+            maths, operator = [], None
+            while offset_key:
+                item = re.match(
+                    MATH_FIELD_RE if operator else MATH_OPERATORS_RE,
+                    offset_key).group(0)
+                offset_key = offset_key[len(item):]
+                if operator is None:
+                    operator = MATH_FUNCTIONS[item]
+                    continue
+                item, multiplier = (item[1:], -1) if item[0] == '-' else (item, 1)
+                offset = float_or_none(item)
+                # The offset is either a number or a field
+                maths.append((operator, multiplier, offset, None if offset is not None else _compile_traversal(item)))
+                operator = None
+            return maths
+
+        def _compile_key(key):
+            """ Split the key into its alternate fields """
+            alternates = []
+            mobj = re.match(INTERNAL_FORMAT_RE, key)
+            while mobj:
+                mobj = mobj.groupdict()
+                alternates.append({
+                    'fields': mobj['fields'],
+                    'get_field': _compile_traversal(mobj['fields']),
+                    'negate': bool(mobj['negate']),
+                    'maths': _compile_maths(mobj['maths']) if mobj['maths'] else None,
+                    'strf_format': mobj['strf_format'] and mobj['strf_format'].replace('\\,', ','),
+                    'replacement': mobj['replacement'],
+                    'default': mobj['default'],
+                })
+                if not mobj['alternate']:
+                    break
+                mobj = re.match(INTERNAL_FORMAT_RE, mobj['remaining'][1:])
+            return alternates
 
-        def get_value(mdict):
+        def get_value(info_dict, field):
             # Object traversal
-            value = _traverse_infodict(mdict['fields'])
+            value = field['get_field'](info_dict)
             # Negative
-            if mdict['negate']:
+            if field['negate']:
                 value = float_or_none(value)
                 if value is not None:
                     value *= -1
             # Do maths
-            offset_key = mdict['maths']
-            if offset_key:
+            if field['maths']:
                 value = float_or_none(value)
-                operator = None
-                while offset_key:
-                    item = re.match(
-                        MATH_FIELD_RE if operator else MATH_OPERATORS_RE,
-                        offset_key).group(0)
-                    offset_key = offset_key[len(item):]
-                    if operator is None:
-                        operator = MATH_FUNCTIONS[item]
-                        continue
-                    item, multiplier = (item[1:], -1) if item[0] == '-' else (item, 1)
-                    offset = float_or_none(item)
-                    if offset is None:
-                        offset = float_or_none(_traverse_infodict(item))
+                for operator, multiplier, offset, get_field in field['maths']:
+                    if get_field is not None:
+                        offset = float_or_none(get_field(info_dict))
                     try:
                         value = operator(value, multiplier * offset)
                     except (TypeError, ZeroDivisionError):
                         return None
-                    operator = None
             # Datetime formatting
-            if mdict['strf_format']:
-                value = strftime_or_none(value, mdict['strf_format'].replace('\\,', ','))
+            if field['strf_format']:
+                value = strftime_or_none(value, field['strf_format'])
 
             # XXX: Workaround for https://github.com/yt-dlp/yt-dlp/issues/4485
             if sanitize and value == '':
                 value = None
             return value
 
-        na = self.params.get('outtmpl_na_placeholder', 'NA')
-
-        def filename_sanitizer(key, value, restricted=self.params.get('restrictfilenames')):
+        def filename_sanitizer(key, value, restricted=None):
+            if restricted is None:
+                restricted = self.params.get('restrictfilenames')
             return sanitize_filename(str(value), restricted=restricted, is_id=(
                 bool(re.search(r'(^|[_.])id(\.|$)', key))
                 if 'filename-sanitization' in self.params['compat_opts']
@@ -1319,6 +1449,8 @@ def filename_sanitizer(key, value, restricted=self.params.get('restrictfilenames
         def _dumpjson_default(obj):
             if isinstance(obj, (set, LazyList)):
                 return list(obj)
+            elif isinstance(obj, CopyOnWriteDict):
+                return obj.to_dict()
             return repr(obj)
 
         class _ReplacementFormatter(string.Formatter):
@@ -1329,33 +1461,25 @@ def get_field(self, field_name, args, kwargs):
 
         replacement_formatter = _ReplacementFormatter()
 
-        def create_key(outer_mobj):
-            if not outer_mobj.group('has_key'):
-                return outer_mobj.group(0)
-            key = outer_mobj.group('key')
-            mobj = re.match(INTERNAL_FORMAT_RE, key)
-            value, replacement, default, last_field = None, None, na, ''
-            while mobj:
-                mobj = mobj.groupdict()
-                default = mobj['default'] if mobj['default'] is not None else default
-                value = get_value(mobj)
-                last_field, replacement = mobj['fields'], mobj['replacement']
-                if value is None and mobj['alternate']:
-                    mobj = re.match(INTERNAL_FORMAT_RE, mobj['remaining'][1:])
-                else:
+        def evaluate_key(info_dict, field_size_compat_map, alternates, outer_fmt, flags):
+            value, replacement, default, last_field = None, None, self.params.get('outtmpl_na_placeholder', 'NA'), ''
+            for field in alternates:
+                default = field['default'] if field['default'] is not None else default
+                value = get_value(info_dict, field)
+                last_field, replacement = field['fields'], field['replacement']
+                if value is not None:
                     break
 
             if None not in (value, replacement):
                 try:
                     value = replacement_formatter.format(replacement, value)
                 except ValueError:
-                    value, default = None, na
+                    value, default = None, self.params.get('outtmpl_na_placeholder', 'NA')
 
-            fmt = outer_mobj.group('format')
+            fmt = outer_fmt
             if fmt == 's' and last_field in field_size_compat_map and isinstance(value, int):
                 fmt = f'0{field_size_compat_map[last_field]:d}d'
 
-            flags = outer_mobj.group('conversion') or ''
             str_fmt = f'{fmt[:-1]}s'
             if value is None:
                 value, fmt = default, 's'
@@ -1404,12 +1528,41 @@ def create_key(outer_mobj):
                     value, fmt = ascii(value), str_fmt
                 if fmt[-1] in 'csra':
                     value = sanitizer(last_field, value)
+            return value, fmt
+
+        # The template is split into the literal text and the keys to substitute
+        parts, last_end = [], 0
+        for outer_mobj in EXTERNAL_FORMAT_RE.finditer(outtmpl):
+            if not outer_mobj.group('has_key'):
+                continue
+            key = outer_mobj.group('key')
+            parts.append(outtmpl[last_end:outer_mobj.start()])
+            parts.append((
+                '{}\0{}'.format(key.replace('%', '%\0'), outer_mobj.group('format')), outer_mobj.group('prefix'),
+                _compile_key(key), outer_mobj.group('format'), outer_mobj.group('conversion') or ''))
+            last_end = outer_mobj.end()
+        parts.append(outtmpl[last_end:])
+
+        def evaluate(info_dict):
+            # For fields playlist_index, playlist_autonumber and autonumber convert all occurrences
+            # of %(field)s to %(field)0Nd for backward compatibility
+            field_size_compat_map = {
+                'playlist_index': number_of_digits(info_dict.get('__last_playlist_index') or 0),
+                'playlist_autonumber': number_of_digits(info_dict.get('n_entries') or 0),
+                'autonumber': self.params.get('autonumber_size') or 5,
+            }
 
-            key = '{}\0{}'.format(key.replace('%', '%\0'), outer_mobj.group('format'))
-            TMPL_DICT[key] = value
-            return '{prefix}%({key}){fmt}'.format(key=key, fmt=fmt, prefix=outer_mobj.group('prefix'))
+            TMPL_DICT, result = {}, []
+            for part in parts:
+                if isinstance(part, str):
+                    result.append(part)
+                    continue
+                key, prefix, alternates, outer_fmt, flags = part
+                TMPL_DICT[key], fmt = evaluate_key(info_dict, field_size_compat_map, alternates, outer_fmt, flags)
+                result.append(f'{prefix}%({key}){fmt}')
+            return ''.join(result), TMPL_DICT
 
-        return EXTERNAL_FORMAT_RE.sub(create_key, outtmpl), TMPL_DICT
+        return evaluate
 
     def evaluate_outtmpl(self, outtmpl, info_dict, *args, **kwargs):
         outtmpl, info_dict = self.prepare_outtmpl(outtmpl, info_dict, *args, **kwargs)
@@ -1591,7 +1744,7 @@ def extract_info(self, url, download=True, ie_key=None, extra_info=None,
         if ie_key:
             ies = {ie_key: self._ies[ie_key]} if ie_key in self._ies else {}
         else:
-            ies = self._ies
+            ies = self._candidate_ies(url)
 
         for key, ie in ies.items():
             if not ie.suitable(url):
@@ -2020,59 +2173,107 @@ def __process_playlist(self, ie_result, download):
         keep_resolved_entries = self.params.get('extract_flat') != 'discard'
         if self.params.get('extract_flat') == 'discard_in_playlist':
             keep_resolved_entries = ie_result['_type'] != 'playlist'
+
+        json_writers = []
+        if self._stream_single_json and self._playlist_level == 1 and not self._single_json_writer:
+            self._single_json_writer = StreamingJSONWriter(
+                functools.partial(self._write_string, out=self._out_files.out), 'entries')
+            json_writers.append(self._single_json_writer)
+        stream_infojson = (_infojson_written is True and self.params.get('stream_playlist_json')
+                           and not self.params.get('clean_infojson', True))
+        if (json_writers or stream_infojson) and not (
+                self._pps['playlist'] or self.params['forceprint'].get('playlist')
+                or self.params['print_to_file'].get('playlist')):
+            # The entries are written as they are processed, and nothing else needs them
+            keep_resolved_entries = False
         if keep_resolved_entries:
             self.write_debug('The information of all playlist entries will be held in memory')
 
-        failures = 0
-        max_failures = self.params.get('skip_playlist_after_errors') or float('inf')
-        for i, (playlist_index, entry) in enumerate(entries):
-            if lazy:
-                resolved_entries.append((playlist_index, entry))
-            if not entry:
-                continue
+        def requested_entries():
+            for i, (playlist_index, entry) in enumerate(entries):
+                if lazy:
+                    resolved_entries.append((playlist_index, entry))
+                if not entry:
+                    continue
 
-            entry['__x_forwarded_for_ip'] = ie_result.get('__x_forwarded_for_ip')
-            if not lazy and 'playlist-index' in self.params['compat_opts']:
-                playlist_index = ie_result['requested_entries'][i]
+                entry['__x_forwarded_for_ip'] = ie_result.get('__x_forwarded_for_ip')
+                if not lazy and 'playlist-index' in self.params['compat_opts']:
+                    playlist_index = ie_result['requested_entries'][i]
 
-            entry_copy = collections.ChainMap(entry, {
-                **common_info,
-                'n_entries': int_or_none(n_entries),
-                'playlist_index': playlist_index,
-                'playlist_autonumber': i + 1,
-            })
+                entry_copy = collections.ChainMap(entry, {
+                    **common_info,
+                    'n_entries': int_or_none(n_entries),
+                    'playlist_index': playlist_index,
+                    'playlist_autonumber': i + 1,
+                })
 
-            if self._match_entry(entry_copy, incomplete=True) is not None:
-                # For compatabilty with youtube-dl. See https://github.com/yt-dlp/yt-dlp/issues/4369
-                resolved_entries[i] = (playlist_index, NO_DEFAULT)
-                continue
+                if self._match_entry(entry_copy, incomplete=True) is not None:
+                    # For compatabilty with youtube-dl. See https://github.com/yt-dlp/yt-dlp/issues/4369
+                    resolved_entries[i] = (playlist_index, NO_DEFAULT)
+                    continue
 
-            self.to_screen(
-                f'[download] Downloading item {self._format_screen(i + 1, self.Styles.ID)} '
-                f'of {self._format_screen(n_entries, self.Styles.EMPHASIS)}')
-
-            entry_result = self.__process_iterable_entry(entry, download, collections.ChainMap({
-                'playlist_index': playlist_index,
-                'playlist_autonumber': i + 1,
-            }, extra))
-            if not entry_result:
-                failures += 1
-            if failures >= max_failures:
-                self.report_error(
-                    f'Skipping the remaining entries in playlist "{title}" since {failures} items failed extraction')
-                break
-            if keep_resolved_entries:
-                resolved_entries[i] = (playlist_index, entry_result)
+                self.to_screen(
+                    f'[download] Downloading item {self._format_screen(i + 1, self.Styles.ID)} '
+                    f'of {self._format_screen(n_entries, self.Styles.EMPHASIS)}')
 
-        # Update with processed data
-        ie_result['entries'] = [e for _, e in resolved_entries if e is not NO_DEFAULT]
-        ie_result['requested_entries'] = [i for i, e in resolved_entries if e is not NO_DEFAULT]
-        if ie_result['requested_entries'] == try_call(lambda: list(range(1, ie_result['playlist_count'] + 1))):
-            # Do not set for full playlist
-            ie_result.pop('requested_entries')
+                yield (i, playlist_index), (entry, download, collections.ChainMap({
+                    'playlist_index': playlist_index,
+                    'playlist_autonumber': i + 1,
+                }, extra))
+
+        failures = 0
+        max_failures = self.params.get('skip_playlist_after_errors') or float('inf')
+        with contextlib.ExitStack() as stack:
+            if stream_infojson:
+                infofn = self.prepare_filename(ie_copy, 'pl_infojson')
+                self.to_screen(f'[info] Writing updated playlist metadata as JSON to: {infofn}')
+                try:
+                    infojson = stack.enter_context(atomic_write_file(infofn))
+                except OSError:
+                    self.report_error(f'Cannot write updated playlist metadata to JSON file {infofn}')
+                    return
+                json_writers.append(StreamingJSONWriter(infojson.write, 'entries', ensure_ascii=False))
+
+            processed_entries = self.__map_entries(self.__process_iterable_entry, requested_entries())
+            try:
+                for (i, playlist_index), entry_result in processed_entries:
+                    if not entry_result:
+                        failures += 1
+                    if failures >= max_failures:
+                        self.report_error(
+                            f'Skipping the remaining entries in playlist "{title}" '
+                            f'since {failures} items failed extraction')
+                        processed_entries.close()
+                        break
+                    if keep_resolved_entries:
+                        resolved_entries[i] = (playlist_index, entry_result)
+                    if json_writers:
+                        # The entry must be post-processed before it is written
+                        self._wait_for_postprocessing()
+                        entry_json = self._sanitize_json(entry_result)
+                        for writer in json_writers:
+                            writer.add(entry_json)
+            except BaseException:
+                if self._single_json_writer in json_writers:
+                    # Keep the JSON valid. The entries that were written are not lost
+                    self._single_json_writer.close(self.sanitize_info(CopyOnWriteDict(ie_result, deleted=('entries',))))
+                raise
+
+            # The playlist postprocessors need the entries to be post-processed
+            self._wait_for_postprocessing()
+
+            # Update with processed data
+            ie_result['entries'] = [e for _, e in resolved_entries if e is not NO_DEFAULT]
+            ie_result['requested_entries'] = [i for i, e in resolved_entries if e is not NO_DEFAULT]
+            if ie_result['requested_entries'] == try_call(lambda: list(range(1, ie_result['playlist_count'] + 1))):
+                # Do not set for full playlist
+                ie_result.pop('requested_entries')
+
+            if stream_infojson:
+                json_writers[-1].close(self.sanitize_info(CopyOnWriteDict(ie_result, deleted=('entries',))))
 
         # Write the updated info to json
-        if _infojson_written is True and self._write_info_json(
+        if _infojson_written is True and not stream_infojson and self._write_info_json(
                 'updated playlist', ie_result,
                 self.prepare_filename(ie_copy, 'pl_infojson'), overwrite=True) is None:
             return
@@ -2086,6 +2287,65 @@ def __process_iterable_entry(self, entry, download, extra_info):
         return self.process_ie_result(
             entry, download=download, extra_info=extra_info)
 
+    def __map_entries(self, func, jobs):
+        """
+        Run func(*args) for each (key, args) in jobs and yield (key, result) in order
+
+        Up to `concurrent_entries` jobs are run at a time. Nested playlists
+        are always processed sequentially by the worker that found them.
+        Download archive entries recorded by a job are written only when
+        its result is yielded, so that the archive keeps the order of the jobs
+        """
+        max_workers = self.params.get('concurrent_entries') or 1
+        if max_workers <= 1 or getattr(self._entry_worker, 'archive_ids', None) is not None:
+            for key, args in jobs:
+                yield key, func(*args)
+            return
+
+        cancelled = threading.Event()
+
+        def worker(archive_ids, *args):
+            if cancelled.is_set():
+                return
+            self._entry_worker.archive_ids = archive_ids
+            try:
+                return func(*args)
+            finally:
+                self._entry_worker.archive_ids = None
+
+        def flush_archive(archive_ids):
+            for vid_id in archive_ids:
+                self._write_download_archive(vid_id)
+
+        def next_result():
+            key, future, archive_ids = pending.popleft()
+            try:
+                return key, future.result()
+            finally:
+                flush_archive(archive_ids)
+
+        pending = collections.deque()
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix='ytdl-entry')
+        try:
+            for key, args in jobs:
+                archive_ids = []
+                pending.append((key, pool.submit(worker, archive_ids, *args), archive_ids))
+                while len(pending) >= max_workers:
+                    yield next_result()
+            while pending:
+                yield next_result()
+        except KeyboardInterrupt:
+            self.to_screen('[download] Interrupted by user. Waiting for the running entries to finish ...')
+            raise
+        finally:
+            # Reached on errors (eg: MaxDownloadsReached) or when the consumer stops early
+            cancelled.set()
+            for _, future, _ in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+            for _, _, archive_ids in pending:
+                flush_archive(archive_ids)
+
     def _build_format_filter(self, filter_spec):
         " Returns a function to filter the formats according to the filter_spec "
 
@@ -2146,45 +2406,112 @@ def _build_format_filter(self, filter_spec):
         if not m:
             raise SyntaxError(f'Invalid filter specification {filter_spec!r}')
 
+        key, none_inclusive = m.group('key', 'none_inclusive')
+
         def _filter(f):
-            actual_value = f.get(m.group('key'))
+            actual_value = f.get(key)
             if actual_value is None:
-                return m.group('none_inclusive')
+                return none_inclusive
             return op(actual_value, comparison_value)
         return _filter
 
     def _check_formats(self, formats):
-        for f in formats:
-            working = f.get('__working')
-            if working is not None:
+        """
+        Yield the formats that are downloadable, in order
+
+        Up to `concurrent_format_checks` formats are tested at a time. The tests that have
+        not started yet are cancelled when the consumer stops early (eg: once the format
+        selector has found its format)
+        """
+        max_workers = self.params.get('concurrent_format_checks', 4) or 1
+        if max_workers <= 1:
+            for f in formats:
+                if self._check_format(f):
+                    yield f
+            return
+
+        def next_result():
+            f, future = pending.popleft()
+            return f, f['__working'] if future is None else future.result()
+
+        pending = collections.deque()
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix='ytdl-format-check')
+        try:
+            for f in formats:
+                pending.append((f, None if f.get('__working') is not None else pool.submit(self._check_format, f)))
+                while len(pending) >= max_workers:
+                    f, working = next_result()
+                    if working:
+                        yield f
+            while pending:
+                f, working = next_result()
                 if working:
                     yield f
-                continue
+        finally:
+            for _, future in pending:
+                if future:
+                    future.cancel()
+            pool.shutdown(wait=True)
+
+    def _check_format(self, f):
+        """Return whether the format is downloadable, testing it if it has not been already"""
+        working = f.get('__working')
+        if working is None:
+            working = self._load_format_check(f)
+        if working is None:
             self.to_screen('[info] Testing format {}'.format(f['format_id']))
-            path = self.get_output_path('temp')
-            if not self._ensure_dir_exists(f'{path}/'):
-                continue
-            temp_file = tempfile.NamedTemporaryFile(suffix='.tmp', delete=False, dir=path or None)
-            temp_file.close()
-            try:
-                success, _ = self.dl(temp_file.name, f, test=True)
-            except (DownloadError, OSError, ValueError, *network_exceptions):
-                success = False
-            finally:
-                if os.path.exists(temp_file.name):
-                    try:
-                        os.remove(temp_file.name)
-                    except OSError:
-                        self.report_warning(f'Unable to delete temporary file "{temp_file.name}"')
-            f['__working'] = success
-            if success:
-                yield f
-            else:
+            working = self._test_format(f)
+            if working is None:
+                return False
+            self._store_format_check(f, working)
+            if not working:
                 self.to_screen('[info] Unable to download format {}. Skipping...'.format(f['format_id']))
+        f['__working'] = working
+        return working
+
+    def _test_format(self, f):
+        path = self.get_output_path('temp')
+        if not self._ensure_dir_exists(f'{path}/'):
+            return None
+        temp_file = tempfile.NamedTemporaryFile(suffix='.tmp', delete=False, dir=path or None)
+        temp_file.close()
+        try:
+            success, _ = self.dl(temp_file.name, f, test=True)
+        except (DownloadError, OSError, ValueError, *network_exceptions):
+            success = False
+        finally:
+            if os.path.exists(temp_file.name):
+                try:
+                    os.remove(temp_file.name)
+                except OSError:
+                    self.report_warning(f'Unable to delete temporary file "{temp_file.name}"')
+        return success
+
+    def _format_check_cache_key(self, f):
+        if not self.params.get('format_check_cache_ttl') or not f.get('url'):
+            return None
+        return hashlib.sha256(f'{f.get("format_id")}\n{f["url"]}'.encode()).hexdigest()
+
+    def _load_format_check(self, f):
+        key = self._format_check_cache_key(f)
+        if not key:
+            return None
+        result = self.cache.load('format-checks', key)
+        age = time.time() - (float_or_none(traverse_obj(result, 'timestamp')) or 0)
+        if 0 <= age < self.params['format_check_cache_ttl']:
+            return traverse_obj(result, ('working', {bool}))
+        return None
+
+    def _store_format_check(self, f, working):
+        key = self._format_check_cache_key(f)
+        if key:
+            self.cache.store('format-checks', key, {'working': working, 'timestamp': time.time()})
 
     def _select_formats(self, formats, selector):
         return list(selector({
             'formats': formats,
+            # The results of the filters, shared by the parts of the selector
+            'filtered': {},
             'has_merged_format': any('none' not in (f.get('acodec'), f.get('vcodec')) for f in formats),
             'incomplete_formats': (all(f.get('vcodec') == 'none' for f in formats)  # No formats with video
                                    or all(f.get('acodec') == 'none' for f in formats)),  # OR, No formats with audio
@@ -2215,6 +2542,16 @@ def can_merge():
                 else 'bestvideo*+bestaudio/best')
 
     def build_format_selector(self, format_spec):
+        # The selectors are reused for every video, e.g. for the default format spec
+        key = (
+            format_spec, self.params.get('allow_multiple_audio_streams', False),
+            self.params.get('allow_multiple_video_streams', False))
+        selector = self._format_selectors.get(key)
+        if selector is None:
+            selector = self._format_selectors[key] = self._compile_format_selector(format_spec)
+        return selector
+
+    def _compile_format_selector(self, format_spec):
         def syntax_error(note, start):
             message = (
                 'Invalid format specification: '
@@ -2401,6 +2738,16 @@ def _merge(formats_pair):
 
             return new_dict
 
+        def _filter_formats(ctx, key, function, formats):
+            # The same filters are often applied to the same formats by the alternatives of a selector
+            filtered = ctx.get('filtered')
+            if filtered is None:
+                return list(filter(function, formats))
+            cached = filtered.get((key, id(formats)))
+            if cached is None or cached[0] is not formats:
+                cached = filtered[(key, id(formats))] = (formats, list(filter(function, formats)))
+            return cached[1]
+
         def _check_formats(formats):
             if self.params.get('check_formats') == 'selected':
                 yield from self._check_formats(formats)
@@ -2498,8 +2845,9 @@ def selector_function(ctx):
                             filter_f = lambda f: f.get('format_id') == format_spec  # id
 
                     def selector_function(ctx):
-                        formats = list(ctx['formats'])
-                        matches = list(filter(filter_f, formats)) if filter_f is not None else formats
+                        formats = ctx['formats']
+                        matches = (_filter_formats(ctx, format_spec, filter_f, formats)
+                                   if filter_f is not None else formats)
                         if not matches:
                             if format_fallback and ctx['incomplete_formats']:
                                 # for extractors with incomplete formats (audio only (soundcloud)
@@ -2515,12 +2863,12 @@ def selector_function(ctx):
                         except LazyList.IndexError:
                             return
 
-            filters = [self._build_format_filter(f) for f in selector.filters]
+            filters = [(f, self._build_format_filter(f)) for f in selector.filters]
 
             def final_selector(ctx):
                 ctx_copy = dict(ctx)
-                for _filter in filters:
-                    ctx_copy['formats'] = list(filter(_filter, ctx_copy['formats']))
+                for filter_spec, _filter in filters:
+                    ctx_copy['formats'] = _filter_formats(ctx, f'[{filter_spec}]', _filter, ctx_copy['formats'])
                 return selector_function(ctx_copy)
             return final_selector
 
@@ -2710,12 +3058,23 @@ def _raise_pending_errors(self, info):
 
     def sort_formats(self, info_dict):
         formats = self._get_formats(info_dict)
-        formats.sort(key=FormatSorter(
-            self, info_dict.get('_format_sort_fields') or []).calculate_preference)
+        formats.sort(key=self._get_format_sorter(info_dict.get('_format_sort_fields') or []).calculate_preference)
+
+    def _get_format_sorter(self, field_preference):
+        # A sorter only depends on these params and the fields given by the extractor
+        key = (
+            tuple(field_preference), self.params.get('prefer_free_formats'),
+            tuple(self.params.get('format_sort') or ()), self.params.get('format_sort_force'))
+        sorter = self._format_sorters.get(key)
+        if sorter is None:
+            sorter = self._format_sorters[key] = FormatSorter(self, field_preference)
+        return sorter
 
     def process_video_result(self, info_dict, download=True):
         assert info_dict.get('_type', 'video') == 'video'
-        self._num_videos += 1
+        with self._num_downloads_lock:
+            self._num_videos += 1
+            info_dict['__video_autonumber'] = self._num_videos
 
         if 'id' not in info_dict:
             raise ExtractorError('Missing "id" field in extractor result', ie=info_dict['extractor'])
@@ -2819,6 +3178,13 @@ def sanitize_numeric_fields(info):
         if not get_from_start:
             info_dict['title'] += ' ' + dt.datetime.now().strftime('%Y-%m-%d %H:%M')
         if info_dict.get('is_live') and formats:
+            if get_from_start and not any(f.get('is_from_start') for f in formats):
+                # The native HLS downloader can download from the start of playlists that keep all their segments.
+                # Other playlists only have a window of the latest segments
+                for f in formats:
+                    if (f.get('protocol') == 'm3u8_native'
+                            and traverse_obj(f, ('downloader_options', 'hls_keeps_history'))):
+                        f['is_from_start'] = True
             formats = [f for f in formats if bool(f.get('is_from_start')) == get_from_start]
             if get_from_start and not formats:
                 self.raise_no_formats(info_dict, msg=(
@@ -2990,42 +3356,78 @@ def to_screen(*msg):
                     to_screen(f'Downloading {len(requested_ranges)} time ranges:',
                               (f'{c["start_time"]:.1f}-{c["end_time"]:.1f}' for c in requested_ranges))
             max_downloads_reached = False
-
-            for fmt, chapter in itertools.product(formats_to_download, requested_ranges):
-                new_info = self._copy_infodict(info_dict)
-                new_info.update(fmt)
-                offset, duration = info_dict.get('section_start') or 0, info_dict.get('duration') or float('inf')
-                end_time = offset + min(chapter.get('end_time', duration), duration)
-                # duration may not be accurate. So allow deviations <1sec
-                if end_time == float('inf') or end_time > offset + duration + 1:
-                    end_time = None
-                if chapter or offset:
-                    new_info.update({
-                        'section_start': offset + chapter.get('start_time', 0),
-                        'section_end': end_time,
-                        'section_title': chapter.get('title'),
-                        'section_number': chapter.get('index'),
-                    })
-                downloaded_formats.append(new_info)
-                try:
-                    self.process_info(new_info)
-                except MaxDownloadsReached:
-                    max_downloads_reached = True
-                self._raise_pending_errors(new_info)
-                # Remove copied info
+            # process_info leaves the post-processing of the formats to be run in the background.
+            # Concurrent playlist entries already overlap it with the other downloads
+            deferred = None
+            if self.params.get('concurrent_postprocessing') and getattr(self._entry_worker, 'archive_ids', None) is None:
+                deferred = []
+            self._entry_worker.deferred_postprocessing = deferred
+
+            def remove_copied_info(new_info):
                 for key, val in tuple(new_info.items()):
                     if info_dict.get(key) == val:
                         new_info.pop(key)
-                if max_downloads_reached:
-                    break
 
-            write_archive = {f.get('__write_download_archive', False) for f in downloaded_formats}
-            assert write_archive.issubset({True, False, 'ignore'})
-            if True in write_archive and False not in write_archive:
-                self.record_download_archive(info_dict)
+            def run_deferred():
+                return [run_postprocessors() for run_postprocessors, _ in deferred]
 
-            info_dict['requested_downloads'] = downloaded_formats
-            info_dict = self.run_all_pps('after_video', info_dict)
+            def finish_deferred(results):
+                for success, (_, finish_postprocessing) in zip(results, deferred):
+                    if success:
+                        finish_postprocessing()
+                for new_info in downloaded_formats:
+                    remove_copied_info(new_info)
+
+            try:
+                for fmt, chapter in itertools.product(formats_to_download, requested_ranges):
+                    new_info = self._copy_infodict(info_dict)
+                    new_info.update(fmt)
+                    offset, duration = info_dict.get('section_start') or 0, info_dict.get('duration') or float('inf')
+                    end_time = offset + min(chapter.get('end_time', duration), duration)
+                    # duration may not be accurate. So allow deviations <1sec
+                    if end_time == float('inf') or end_time > offset + duration + 1:
+                        end_time = None
+                    if chapter or offset:
+                        new_info.update({
+                            'section_start': offset + chapter.get('start_time', 0),
+                            'section_end': end_time,
+                            'section_title': chapter.get('title'),
+                            'section_number': chapter.get('index'),
+                        })
+                    downloaded_formats.append(new_info)
+                    try:
+                        self.process_info(new_info)
+                    except MaxDownloadsReached:
+                        max_downloads_reached = True
+                    self._raise_pending_errors(new_info)
+                    if deferred is None:
+                        # Remove copied info
+                        remove_copied_info(new_info)
+                    if max_downloads_reached:
+                        break
+            except BaseException:
+                if deferred:
+                    # The formats that were downloaded are still post-processed
+                    self._submit_postprocessing(run_deferred, finish_deferred, info_dict, raise_errors=False)
+                raise
+            finally:
+                self._entry_worker.deferred_postprocessing = None
+
+            def finish_video(results=None):
+                if deferred is not None:
+                    finish_deferred(results)
+                write_archive = {f.get('__write_download_archive', False) for f in downloaded_formats}
+                assert write_archive.issubset({True, False, 'ignore'})
+                if True in write_archive and False not in write_archive:
+                    self.record_download_archive(info_dict)
+
+                info_dict['requested_downloads'] = downloaded_formats
+                return self.run_all_pps('after_video', info_dict)
+
+            if deferred is None:
+                info_dict = finish_video()
+            else:
+                self._submit_postprocessing(run_deferred, finish_video, info_dict)
             if max_downloads_reached:
                 raise MaxDownloadsReached
 
@@ -3096,7 +3498,7 @@ def process_subtitles(self, video_id, normal_subtitles, automatic_captions):
     def _forceprint(self, key, info_dict):
         if info_dict is None:
             return
-        info_copy = info_dict.copy()
+        info_copy = CopyOnWriteDict(info_dict)
         info_copy.setdefault('filename', self.prepare_filename(info_dict))
         if info_dict.get('requested_formats') is not None:
             # For RTMP URLs, also include the playpath
@@ -3231,9 +3633,17 @@ def replace_info_dict(new_info):
             info_dict.clear()
             info_dict.update(new_info)
 
+        def check_max_downloads():
+            if self._num_downloads >= float(self.params.get('max_downloads') or 'inf'):
+                raise MaxDownloadsReached
+
         new_info, _ = self.pre_process(info_dict, 'video')
         replace_info_dict(new_info)
-        self._num_downloads += 1
+        with self._num_downloads_lock:
+            # Other playlist entries may have reached the limit while this one was being processed
+            check_max_downloads()
+            self._num_downloads += 1
+            info_dict['__autonumber'] = self._num_downloads
 
         # info_dict['_filename'] needs to be set for backward compatibility
         info_dict['_filename'] = full_filename = self.prepare_filename(info_dict, warn=True)
@@ -3243,10 +3653,6 @@ def replace_info_dict(new_info):
         # Forced printings
         self.__forced_printings(info_dict, full_filename, incomplete=('format' not in info_dict))
 
-        def check_max_downloads():
-            if self._num_downloads >= float(self.params.get('max_downloads') or 'inf'):
-                raise MaxDownloadsReached
-
         if self.params.get('simulate'):
             info_dict['__write_download_archive'] = self.params.get('force_write_download_archive')
             check_max_downloads()
@@ -3416,7 +3822,7 @@ def correct_ext(filename, ext=new_ext):
                     if dl_filename is not None:
                         self.report_file_already_downloaded(dl_filename)
                     elif fd:
-                        for f in info_dict['requested_formats'] if fd != FFmpegFD else []:
+                        for f in info_dict['requested_formats'] if fd not in (FFmpegFD, StreamMergeFD) else []:
                             f['filepath'] = fname = prepend_extension(
                                 correct_ext(temp_filename, info_dict['ext']),
                                 'f{}'.format(f['format_id']), info_dict['ext'])
@@ -3446,9 +3852,7 @@ def correct_ext(filename, ext=new_ext):
                                 'The formats will be streamed one after the other')
                             fname = temp_filename
                         for f in info_dict['requested_formats']:
-                            new_info = dict(info_dict)
-                            del new_info['requested_formats']
-                            new_info.update(f)
+                            new_info = self._view_infodict(info_dict, f, deleted=('requested_formats',))
                             if temp_filename != '-':
                                 fname = prepend_extension(
                                     correct_ext(temp_filename, new_info['ext']),
@@ -3552,18 +3956,35 @@ def ffmpeg_fixup(cndn, msg, cls):
                     ffmpeg_fixup(downloader == 'web_socket_fragment', 'Malformed duration detected', FFmpegFixupDurationPP)
 
                 fixup()
-                try:
-                    replace_info_dict(self.post_process(dl_filename, info_dict, files_to_move))
-                except PostProcessingError as err:
-                    self.report_error(f'Postprocessing: {err}')
-                    return
-                try:
-                    for ph in self._post_hooks:
-                        ph(info_dict['filepath'])
-                except Exception as err:
-                    self.report_error(f'post hooks: {err}')
-                    return
-                info_dict['__write_download_archive'] = True
+
+                def run_postprocessors():
+                    try:
+                        replace_info_dict(self._post_process_and_move(dl_filename, info_dict, files_to_move))
+                    except PostProcessingError as err:
+                        self.report_error(f'Postprocessing: {err}')
+                        return False
+                    return True
+
+                def finish_postprocessing():
+                    try:
+                        replace_info_dict(self.run_all_pps('after_move', info_dict))
+                    except PostProcessingError as err:
+                        self.report_error(f'Postprocessing: {err}')
+                        return
+                    try:
+                        for ph in self._post_hooks:
+                            ph(info_dict['filepath'])
+                    except Exception as err:
+                        self.report_error(f'post hooks: {err}')
+                        return
+                    info_dict['__write_download_archive'] = True
+
+                deferred = getattr(self._entry_worker, 'deferred_postprocessing', None)
+                if deferred is not None:
+                    # Run by process_video_result in the post-processing stage
+                    deferred.append((run_postprocessors, finish_postprocessing))
+                elif run_postprocessors():
+                    finish_postprocessing()
 
         assert info_dict is original_infodict  # Make sure the info_dict was modified in-place
         if self.params.get('force_write_download_archive'):
@@ -3573,8 +3994,18 @@ def ffmpeg_fixup(cndn, msg, cls):
     def __download_wrapper(self, func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            self._stream_single_json = self._can_stream_single_json()
             try:
-                res = func(*args, **kwargs)
+                try:
+                    res = func(*args, **kwargs)
+                except BaseException:
+                    # The videos are post-processed even if the downloads were cancelled
+                    self._wait_for_postprocessing(raise_errors=False)
+                    raise
+                else:
+                    self._wait_for_postprocessing()
+                finally:
+                    self._stream_single_json = False
             except UnavailableVideoError as e:
                 self.report_error(e)
             except DownloadCancelled as e:
@@ -3585,9 +4016,28 @@ def wrapper(*args, **kwargs):
             else:
                 if self.params.get('dump_single_json', False):
                     self.post_extract(res)
-                    self.to_stdout(json.dumps(self.sanitize_info(res)))
+                    if self._single_json_writer:
+                        # The entries of the playlist were already written
+                        self._single_json_writer.close(
+                            res and self.sanitize_info(CopyOnWriteDict(res, deleted=('entries',))))
+                    else:
+                        self.to_stdout(json.dumps(self.sanitize_info(res)))
+            finally:
+                writer, self._single_json_writer = self._single_json_writer, None
+                if writer:
+                    writer.close()  # Only if the playlist failed before it could be closed
+                    self._write_string('\n', self._out_files.out)
         return wrapper
 
+    def _can_stream_single_json(self):
+        if not self.params.get('dump_single_json') or not self.params.get('stream_playlist_json'):
+            return False
+        # Any other output to stdout would be mixed with the JSON
+        prints_to_stdout = self.params.get('forcejson') or any(self.params['forceprint'].values()) or any(
+            self.params.get(f'force{field}')
+            for field in ('title', 'id', 'url', 'thumbnail', 'description', 'filename', 'duration', 'format'))
+        return not prints_to_stdout and self._out_files.screen is not self._out_files.out
+
     def download(self, url_list):
         """Download a given list of URLs."""
         url_list = variadic(url_list)  # Passing a single URL is a common mistake
@@ -3639,7 +4089,11 @@ def sanitize_info(info_dict, remove_private_keys=False):
             'release_git_head': RELEASE_GIT_HEAD,
             'repository': ORIGIN,
         })
+        return YoutubeDL._sanitize_json(info_dict, remove_private_keys)
 
+    @staticmethod
+    def _sanitize_json(obj, remove_private_keys=False):
+        """ Like sanitize_info, but for any part of the infodict """
         if remove_private_keys:
             reject = lambda k, v: v is None or k.startswith('__') or k in {
                 'requested_downloads', 'requested_formats', 'requested_subtitles', 'requested_entries',
@@ -3647,19 +4101,24 @@ def sanitize_info(info_dict, remove_private_keys=False):
                 'playlist_autonumber',
             }
         else:
-            reject = lambda k, v: False
+            reject = None
 
         def filter_fn(obj):
-            if isinstance(obj, dict):
+            # Most of the values are scalars, so they are checked first
+            if obj is None or isinstance(obj, (str, int, float, bool)):
+                return obj
+            elif isinstance(obj, dict):
+                if reject is None:
+                    return {k: filter_fn(v) for k, v in obj.items()}
                 return {k: filter_fn(v) for k, v in obj.items() if not reject(k, v)}
+            elif isinstance(obj, CopyOnWriteDict):
+                return filter_fn(obj.to_dict())
             elif isinstance(obj, (list, tuple, set, LazyList)):
                 return list(map(filter_fn, obj))
-            elif obj is None or isinstance(obj, (str, int, float, bool)):
-                return obj
             else:
                 return repr(obj)
 
-        return filter_fn(info_dict)
+        return filter_fn(obj)
 
     @staticmethod
     def filter_requested_info(info_dict, actually_filter=True):
@@ -3733,12 +4192,60 @@ def pre_process(self, ie_info, key='pre_process', files_to_move=None):
 
     def post_process(self, filename, info, files_to_move=None):
         """Run all the postprocessors on the given file."""
+        return self.run_all_pps('after_move', self._post_process_and_move(filename, info, files_to_move))
+
+    def _post_process_and_move(self, filename, info, files_to_move=None):
         info['filepath'] = filename
         info['__files_to_move'] = files_to_move or {}
         info = self.run_all_pps('post_process', info, additional_pps=info.get('__postprocessors'))
         info = self.run_pp(MoveFilesAfterDownloadPP(self), info)
         del info['__files_to_move']
-        return self.run_all_pps('after_move', info)
+        return info
+
+    def _submit_postprocessing(self, process, finish, info_dict, raise_errors=True):
+        """
+        Run process() in the post-processing stage, and then finish() once the earlier jobs are finished
+
+        Up to `concurrent_postprocessing` jobs run in the background; when the stage is full,
+        this waits for the oldest one. The errors of the jobs are raised in their order,
+        which may be while submitting a later video, so they name the video they belong to
+        """
+        max_workers = self.params['concurrent_postprocessing']
+        if self._pp_pool is None:
+            self._pp_pool = concurrent.futures.ThreadPoolExecutor(max_workers, thread_name_prefix='ytdl-postprocess')
+        previous = self._pp_jobs[-1] if self._pp_jobs else None
+        video_id = info_dict.get('id')
+
+        def job():
+            try:
+                try:
+                    result = process()
+                finally:
+                    if previous:
+                        concurrent.futures.wait([previous])
+                return finish(result)
+            except DownloadError as err:
+                raise DownloadError(f'{err.msg} (while post-processing {video_id})', err.exc_info) from err
+
+        self._pp_jobs.append(self._pp_pool.submit(job))
+        while self._pp_jobs and (len(self._pp_jobs) > max_workers or self._pp_jobs[0].done()):
+            self._finish_postprocessing_job(raise_errors)
+
+    def _wait_for_postprocessing(self, raise_errors=True):
+        while self._pp_jobs:
+            self._finish_postprocessing_job(raise_errors)
+
+    def _finish_postprocessing_job(self, raise_errors):
+        job = self._pp_jobs.popleft()
+        if raise_errors:
+            return job.result()
+        # Another exception is being raised, which must not be masked
+        try:
+            job.result()
+        except DownloadError:
+            pass  # Already reported by the job
+        except Exception as err:
+            self.report_warning(f'Post-processing failed: {err}')
 
     def _make_archive_id(self, info_dict):
         video_id = info_dict.get('id')
@@ -3776,10 +4283,22 @@ def record_download_archive(self, info_dict):
         assert vid_id
 
         self.write_debug(f'Adding to archive: {vid_id}')
+        archive_ids = getattr(self._entry_worker, 'archive_ids', None)
+        if archive_ids is not None:
+            # Written in playlist order once the entry is done. See __map_entries
+            archive_ids.append(vid_id)
+        else:
+            self._write_download_archive(vid_id)
+        self.archive.add(vid_id)
+
+    def _write_download_archive(self, vid_id):
+        if isinstance(self.archive, IndexedDownloadArchive):
+            self.archive.write(vid_id)
+            return
+        fn = self.params.get('download_archive')
         if is_path_like(fn):
             with locked_file(fn, 'a', encoding='utf-8') as archive_file:
                 archive_file.write(vid_id + '\n')
-        self.archive.add(vid_id)
 
     @staticmethod
     def format_resolution(format, default='unknown'):
@@ -4237,7 +4756,7 @@ def build_request_director(self, handlers, preferences=None):
 
     @functools.cached_property
     def _request_director(self):
-        return self.build_request_director(_REQUEST_HANDLERS.values(), _RH_PREFERENCES)
+        return self.build_request_director(_load_request_handlers().values(), _RH_PREFERENCES)
 
     def encode(self, s):
         if isinstance(s, bytes):
@@ -6,11 +6,16 @@
 
 __license__ = 'The Unlicense'
 
+import os
+
+if os.environ.get('YTDLP_PROFILE_STARTUP'):
+    from ._importtime import ImportProfiler
+    ImportProfiler.install()
+
 import collections
 import getpass
 import itertools
 import optparse
-import os
 import re
 import traceback
 
@@ -18,7 +23,6 @@
 from .cookies import SUPPORTED_BROWSERS, SUPPORTED_KEYRINGS
 from .downloader.external import get_external_downloader
 from .extractor import list_extractor_classes
-from .extractor.adobepass import MSO_INFO
 from .networking.impersonate import ImpersonateTarget
 from .options import parseOpts
 from .postprocessor import (
@@ -117,6 +121,7 @@ def print_extractor_information(opts, urls):
             ie.description(markdown=False, search_examples=_SEARCHES)
             for ie in list_extractor_classes(opts.age_limit) if ie.working() and ie.IE_DESC is not False)
     elif opts.ap_list_mso:
+        from .extractor.adobepass import MSO_INFO
         out = 'Supported TV Providers:\n{}\n'.format(render_table(
             ['mso', 'mso name'],
             [[mso_id, mso_info['name']] for mso_id, mso_info in MSO_INFO.items()]))
@@ -198,13 +203,21 @@ def validate_minmax(min_val, max_val, min_name, max_name=None):
     validate(opts.password is None or opts.username is not None, 'account username', msg='{name} missing')
     validate(opts.ap_password is None or opts.ap_username is not None,
              'TV Provider account username', msg='{name} missing')
-    validate_in('TV Provider', opts.ap_mso, MSO_INFO,
-                'Unsupported {name} "{value}", use --ap-list-mso to get a list of supported TV Providers')
+    if opts.ap_mso is not None:
+        from .extractor.adobepass import MSO_INFO
+        validate_in('TV Provider', opts.ap_mso, MSO_INFO,
+                    'Unsupported {name} "{value}", use --ap-list-mso to get a list of supported TV Providers')
 
     # Numbers
     validate_positive('autonumber start', opts.autonumber_start)
     validate_positive('autonumber size', opts.autonumber_size, True)
     validate_positive('concurrent fragments', opts.concurrent_fragment_downloads, True)
+    validate_positive('HTTP connections', opts.http_connections, True)
+    validate_positive('connections per host', opts.max_connections_per_host, True)
+    validate_positive('concurrent entries', opts.concurrent_entries, True)
+    validate_positive('concurrent post-processing', opts.concurrent_postprocessing)
+    validate_positive('concurrent format checks', opts.concurrent_format_checks, True)
+    validate_positive('format check cache TTL', opts.format_check_cache_ttl)
     validate_positive('playlist start', opts.playliststart, True)
     if opts.playlistend != -1:
         validate_minmax(opts.playliststart, opts.playlistend, 'playlist start', 'playlist end')
@@ -295,10 +308,12 @@ def validate_bytes(name, value):
 
     opts.ratelimit = validate_bytes('rate limit', opts.ratelimit)
     opts.throttledratelimit = validate_bytes('throttled rate limit', opts.throttledratelimit)
+    opts.global_ratelimit = validate_bytes('global rate limit', opts.global_ratelimit)
     opts.min_filesize = validate_bytes('min filesize', opts.min_filesize)
     opts.max_filesize = validate_bytes('max filesize', opts.max_filesize)
     opts.buffersize = validate_bytes('buffer size', opts.buffersize)
-    opts.http_chunk_size = validate_bytes('http chunk size', opts.http_chunk_size)
+    if opts.http_chunk_size != 'auto':
+        opts.http_chunk_size = validate_bytes('http chunk size', opts.http_chunk_size)
 
     # Output templates
     def validate_outtmpl(tmpl, msg):
@@ -804,6 +819,7 @@ def parse_options(argv=None):
         'print_to_file': opts.print_to_file,
         'forcejson': opts.dumpjson or opts.print_json,
         'dump_single_json': opts.dump_single_json,
+        'stream_playlist_json': opts.stream_playlist_json,
         'force_write_download_archive': opts.force_write_download_archive,
         'simulate': (print_only or any_getting or None) if opts.simulate is None else opts.simulate,
         'skip_download': opts.skip_download,
@@ -815,6 +831,8 @@ def parse_options(argv=None):
         'allow_multiple_video_streams': opts.allow_multiple_video_streams,
         'allow_multiple_audio_streams': opts.allow_multiple_audio_streams,
         'check_formats': opts.check_formats,
+        'concurrent_format_checks': opts.concurrent_format_checks,
+        'format_check_cache_ttl': opts.format_check_cache_ttl,
         'listformats': opts.listformats,
         'listformats_table': opts.listformats_table,
         'outtmpl': opts.outtmpl,
@@ -828,6 +846,8 @@ def parse_options(argv=None):
         'force_generic_extractor': opts.force_generic_extractor,
         'allowed_extractors': opts.allowed_extractors or ['default'],
         'ratelimit': opts.ratelimit,
+        'global_ratelimit': opts.global_ratelimit,
+        'max_connections_per_host': opts.max_connections_per_host,
         'throttledratelimit': opts.throttledratelimit,
         'overwrites': opts.overwrites,
         'retries': opts.retries,
@@ -837,10 +857,13 @@ def parse_options(argv=None):
         'retry_sleep_functions': opts.retry_sleep,
         'skip_unavailable_fragments': opts.skip_unavailable_fragments,
         'keep_fragments': opts.keep_fragments,
+        'in_memory_fragments': opts.in_memory_fragments,
         'concurrent_fragment_downloads': opts.concurrent_fragment_downloads,
+        'async_fragments': opts.async_fragments,
         'buffersize': opts.buffersize,
         'noresizebuffer': opts.noresizebuffer,
         'http_chunk_size': opts.http_chunk_size,
+        'http_connections': opts.http_connections,
         'continuedl': opts.continue_dl,
         'noprogress': opts.quiet if opts.noprogress is None else opts.noprogress,
         'progress_with_newline': opts.progress_with_newline,
@@ -851,6 +874,8 @@ def parse_options(argv=None):
         'playlistreverse': opts.playlist_reverse,
         'playlistrandom': opts.playlist_random,
         'lazy_playlist': opts.lazy_playlist,
+        'concurrent_entries': opts.concurrent_entries,
+        'concurrent_postprocessing': opts.concurrent_postprocessing,
         'noplaylist': opts.noplaylist,
         'logtostderr': opts.outtmpl.get('default') == '-',
         'consoletitle': opts.consoletitle,
@@ -894,6 +919,7 @@ def parse_options(argv=None):
         'youtube_print_sig_code': opts.youtube_print_sig_code,
         'age_limit': opts.age_limit,
         'download_archive': opts.download_archive,
+        'download_archive_index': opts.download_archive_index,
         'break_on_existing': opts.break_on_existing,
         'break_on_reject': opts.break_on_reject,
         'break_per_url': opts.break_per_url,
@@ -943,6 +969,7 @@ def parse_options(argv=None):
         'ffmpeg_location': opts.ffmpeg_location,
         'hls_prefer_native': opts.hls_prefer_native,
         'hls_use_mpegts': opts.hls_use_mpegts,
+        'stream_merge': opts.stream_merge,
         'hls_split_discontinuity': opts.hls_split_discontinuity,
         'external_downloader_args': opts.external_downloader_args,
         'postprocessor_args': opts.postprocessor_args,
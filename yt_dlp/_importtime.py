@@ -0,0 +1,71 @@
+"""
+Measure the time taken to import each module, similar to `python -X importtime`
+
+This is enabled by setting the environment variable YTDLP_PROFILE_STARTUP,
+and must not import anything that should be measured
+"""
+import atexit
+import contextlib
+import sys
+import threading
+import time
+
+
+class ImportProfiler:
+    """A meta path finder that times the execution of the modules found by the other finders"""
+
+    def __init__(self, min_time=0.001):
+        self.min_time = min_time
+        self.timings = {}  # name: (cumulative time, self time)
+        self.total = 0
+        self._local = threading.local()
+
+    @classmethod
+    def install(cls, **kwargs):
+        profiler = cls(**kwargs)
+        sys.meta_path.insert(0, profiler)
+        atexit.register(profiler.report)
+        return profiler
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            find_spec = getattr(finder, 'find_spec', None)
+            if finder is self or not find_spec:
+                continue
+            spec = find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        # Builtin and frozen modules use the importer class itself as the loader
+        loader = spec.loader
+        if loader is not None and not isinstance(loader, type) and hasattr(loader, 'exec_module'):
+            with contextlib.suppress(AttributeError, TypeError):
+                loader.exec_module = self._timed(name, loader.exec_module)
+        return spec
+
+    def _timed(self, name, exec_module):
+        def wrapper(module):
+            stack = self._local.__dict__.setdefault('stack', [])
+            stack.append(0)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.timings[name] = (elapsed, elapsed - stack.pop())
+                if stack:
+                    stack[-1] += elapsed
+                else:
+                    self.total += elapsed
+        return wrapper
+
+    def report(self, out=None):
+        out = out or sys.stderr
+        out.write(f'[debug] Imported {len(self.timings)} modules in {self.total * 1000:.0f}ms\n')
+        out.write(f'[debug] {"cumulative":>10} {"self":>8}  module\n')
+        for name, (cumulative, own) in sorted(self.timings.items(), key=lambda item: -item[1][0]):
+            if cumulative < self.min_time:
+                break
+            out.write(f'[debug] {cumulative * 1000:>8.1f}ms {own * 1000:>6.1f}ms  {name}\n')
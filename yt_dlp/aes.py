@@ -1,27 +1,27 @@
 import base64
+import functools
+import struct
 from math import ceil
 
+from . import dependencies
 from .compat import compat_ord
-from .dependencies import Cryptodome
 from .utils import bytes_to_intlist, intlist_to_bytes
 
-if Cryptodome.AES:
-    def aes_cbc_decrypt_bytes(data, key, iv):
-        """ Decrypt bytes with AES-CBC using pycryptodome """
-        return Cryptodome.AES.new(key, Cryptodome.AES.MODE_CBC, iv).decrypt(data)
 
-    def aes_gcm_decrypt_and_verify_bytes(data, key, tag, nonce):
-        """ Decrypt bytes with AES-GCM using pycryptodome """
-        return Cryptodome.AES.new(key, Cryptodome.AES.MODE_GCM, nonce).decrypt_and_verify(data, tag)
+def aes_cbc_decrypt_bytes(data, key, iv):
+    """ Decrypt bytes with AES-CBC using pycryptodome, or the native implementation if it is unavailable """
+    if dependencies.Cryptodome.AES:
+        AES = dependencies.Cryptodome.AES
+        return AES.new(key, AES.MODE_CBC, iv).decrypt(data)
+    return _cbc_decrypt(*map(bytes, (data, key, iv)))
 
-else:
-    def aes_cbc_decrypt_bytes(data, key, iv):
-        """ Decrypt bytes with AES-CBC using native implementation since pycryptodome is unavailable """
-        return intlist_to_bytes(aes_cbc_decrypt(*map(bytes_to_intlist, (data, key, iv))))
 
-    def aes_gcm_decrypt_and_verify_bytes(data, key, tag, nonce):
-        """ Decrypt bytes with AES-GCM using native implementation since pycryptodome is unavailable """
-        return intlist_to_bytes(aes_gcm_decrypt_and_verify(*map(bytes_to_intlist, (data, key, tag, nonce))))
+def aes_gcm_decrypt_and_verify_bytes(data, key, tag, nonce):
+    """ Decrypt bytes with AES-GCM using pycryptodome, or the native implementation if it is unavailable """
+    if dependencies.Cryptodome.AES:
+        AES = dependencies.Cryptodome.AES
+        return AES.new(key, AES.MODE_GCM, nonce).decrypt_and_verify(data, tag)
+    return _gcm_decrypt_and_verify(*map(bytes, (data, key, tag, nonce)))
 
 
 def aes_cbc_encrypt_bytes(data, key, iv, **kwargs):
@@ -134,19 +134,7 @@ def aes_ctr_encrypt(data, key, iv):
     @param {int[]} iv          16-Byte initialization vector
     @returns {int[]}           encrypted data
     """
-    expanded_key = key_expansion(key)
-    block_count = int(ceil(float(len(data)) / BLOCK_SIZE_BYTES))
-    counter = iter_vector(iv)
-
-    encrypted_data = []
-    for i in range(block_count):
-        counter_block = next(counter)
-        block = data[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES]
-        block += [0] * (BLOCK_SIZE_BYTES - len(block))
-
-        cipher_counter_block = aes_encrypt(counter_block, expanded_key)
-        encrypted_data += xor(block, cipher_counter_block)
-    return encrypted_data[:len(data)]
+    return bytes_to_intlist(_ctr_crypt(*map(bytes, (data, key, iv))))
 
 
 def aes_cbc_decrypt(data, key, iv):
@@ -158,19 +146,7 @@ def aes_cbc_decrypt(data, key, iv):
     @param {int[]} iv          16-Byte IV
     @returns {int[]}           decrypted data
     """
-    expanded_key = key_expansion(key)
-    block_count = int(ceil(float(len(data)) / BLOCK_SIZE_BYTES))
-
-    decrypted_data = []
-    previous_cipher_block = iv
-    for i in range(block_count):
-        block = data[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES]
-        block += [0] * (BLOCK_SIZE_BYTES - len(block))
-
-        decrypted_block = aes_decrypt(block, expanded_key)
-        decrypted_data += xor(decrypted_block, previous_cipher_block)
-        previous_cipher_block = block
-    return decrypted_data[:len(data)]
+    return bytes_to_intlist(_cbc_decrypt(*map(bytes, (data, key, iv))))
 
 
 def aes_cbc_encrypt(data, key, iv, *, padding_mode='pkcs7'):
@@ -212,37 +188,7 @@ def aes_gcm_decrypt_and_verify(data, key, tag, nonce):
     @param {int[]} nonce       IV (recommended 12-Byte)
     @returns {int[]}           decrypted data
     """
-
-    # XXX: check aes, gcm param
-
-    hash_subkey = aes_encrypt([0] * BLOCK_SIZE_BYTES, key_expansion(key))
-
-    if len(nonce) == 12:
-        j0 = [*nonce, 0, 0, 0, 1]
-    else:
-        fill = (BLOCK_SIZE_BYTES - (len(nonce) % BLOCK_SIZE_BYTES)) % BLOCK_SIZE_BYTES + 8
-        ghash_in = nonce + [0] * fill + bytes_to_intlist((8 * len(nonce)).to_bytes(8, 'big'))
-        j0 = ghash(hash_subkey, ghash_in)
-
-    # TODO: add nonce support to aes_ctr_decrypt
-
-    # nonce_ctr = j0[:12]
-    iv_ctr = inc(j0)
-
-    decrypted_data = aes_ctr_decrypt(data, key, iv_ctr + [0] * (BLOCK_SIZE_BYTES - len(iv_ctr)))
-    pad_len = len(data) // 16 * 16
-    s_tag = ghash(
-        hash_subkey,
-        data
-        + [0] * (BLOCK_SIZE_BYTES - len(data) + pad_len)        # pad
-        + bytes_to_intlist((0 * 8).to_bytes(8, 'big')           # length of associated data
-                           + ((len(data) * 8).to_bytes(8, 'big'))),  # length of data
-    )
-
-    if tag != aes_ctr_encrypt(s_tag, key, j0):
-        raise ValueError('Mismatching authentication tag')
-
-    return decrypted_data
+    return bytes_to_intlist(_gcm_decrypt_and_verify(*map(bytes, (data, key, tag, nonce))))
 
 
 def aes_encrypt(data, expanded_key):
@@ -421,12 +367,6 @@ def key_expansion(data):
     return data[:expanded_key_size_bytes]
 
 
-def iter_vector(iv):
-    while True:
-        yield iv
-        iv = inc(iv)
-
-
 def sub_bytes(data):
     return [SBOX[x] for x in data]
 
@@ -470,66 +410,187 @@ def shift_rows_inv(data):
     return [data[((column - row) & 0b11) * 4 + row] for column in range(4) for row in range(4)]
 
 
-def shift_block(data):
-    data_shifted = []
+# Table-driven implementation of the block modes, working on 32-bit words instead of lists of bytes
+# Ref: NIST FIPS 197 (5.3.5 Equivalent Inverse Cipher) and the T-tables from the Rijndael AES proposal
 
-    bit = 0
-    for n in data:
-        if bit:
-            n |= 0x100
-        bit = n & 1
-        n >>= 1
-        data_shifted.append(n)
+def _gf_mul(a, b):
+    return RIJNDAEL_EXP_TABLE[(RIJNDAEL_LOG_TABLE[a] + RIJNDAEL_LOG_TABLE[b]) % 0xFF] if a and b else 0
 
-    return data_shifted
 
+def _rotate_tables(table):
+    tables = [table]
+    for _ in range(3):
+        tables.append(tuple((x >> 8) | ((x & 0xFF) << 24) for x in tables[-1]))
+    return tables
 
-def inc(data):
-    data = data[:]  # copy
-    for i in range(len(data) - 1, -1, -1):
-        if data[i] == 255:
-            data[i] = 0
-        else:
-            data[i] = data[i] + 1
-            break
-    return data
 
+@functools.cache
+def _t_tables():
+    """ Tables combining SubBytes, ShiftRows and MixColumns for each byte of a column """
+    te = tuple(
+        _gf_mul(s, 2) << 24 | s << 16 | s << 8 | _gf_mul(s, 3)
+        for s in SBOX)
+    td = tuple(
+        _gf_mul(s, 0xE) << 24 | _gf_mul(s, 0x9) << 16 | _gf_mul(s, 0xD) << 8 | _gf_mul(s, 0xB)
+        for s in SBOX_INV)
+    return _rotate_tables(te), _rotate_tables(td)
 
-def block_product(block_x, block_y):
-    # NIST SP 800-38D, Algorithm 1
 
-    if len(block_x) != BLOCK_SIZE_BYTES or len(block_y) != BLOCK_SIZE_BYTES:
-        raise ValueError(f'Length of blocks need to be {BLOCK_SIZE_BYTES} bytes')
+@functools.lru_cache(maxsize=16)
+def _block_cipher(key):
+    """
+    Get the block functions for a key
 
-    block_r = [0xE1] + [0] * (BLOCK_SIZE_BYTES - 1)
-    block_v = block_y[:]
-    block_z = [0] * BLOCK_SIZE_BYTES
+    The expanded key is cached, so that it is only computed once for all fragments of a stream
 
-    for i in block_x:
+    @param {bytes} key  16/24/32-Byte cipher key
+    @returns            (encrypt, decrypt) functions mapping 4 words to 4 words
+    """
+    (te0, te1, te2, te3), (td0, td1, td2, td3) = _t_tables()
+    sbox, sbox_inv = SBOX, SBOX_INV
+    rk = struct.unpack(f'>{len(key) // 4 * 4 + 28}I', bytes(key_expansion(list(key))))
+    rounds = len(rk) // 4 - 1
+
+    # Equivalent inverse cipher: reversed round keys, with InvMixColumns applied to all but the first and last
+    dk = list(rk[-4:])
+    for i in range(rounds - 1, 0, -1):
+        dk.extend(
+            td0[sbox[w >> 24]] ^ td1[sbox[(w >> 16) & 0xFF]] ^ td2[sbox[(w >> 8) & 0xFF]] ^ td3[sbox[w & 0xFF]]
+            for w in rk[i * 4: i * 4 + 4])
+    dk.extend(rk[:4])
+
+    rk = [rk[i: i + 4] for i in range(0, len(rk), 4)]
+    (k0, k1, k2, k3), enc_round_keys, (f0, f1, f2, f3) = rk[0], rk[1:-1], rk[-1]
+    dk = [dk[i: i + 4] for i in range(0, len(dk), 4)]
+    (dk0, dk1, dk2, dk3), dec_round_keys, (df0, df1, df2, df3) = dk[0], dk[1:-1], dk[-1]
+
+    def encrypt(s0, s1, s2, s3):
+        s0, s1, s2, s3 = s0 ^ k0, s1 ^ k1, s2 ^ k2, s3 ^ k3
+        for r0, r1, r2, r3 in enc_round_keys:
+            s0, s1, s2, s3 = (
+                te0[s0 >> 24] ^ te1[(s1 >> 16) & 0xFF] ^ te2[(s2 >> 8) & 0xFF] ^ te3[s3 & 0xFF] ^ r0,
+                te0[s1 >> 24] ^ te1[(s2 >> 16) & 0xFF] ^ te2[(s3 >> 8) & 0xFF] ^ te3[s0 & 0xFF] ^ r1,
+                te0[s2 >> 24] ^ te1[(s3 >> 16) & 0xFF] ^ te2[(s0 >> 8) & 0xFF] ^ te3[s1 & 0xFF] ^ r2,
+                te0[s3 >> 24] ^ te1[(s0 >> 16) & 0xFF] ^ te2[(s1 >> 8) & 0xFF] ^ te3[s2 & 0xFF] ^ r3)
+        return (
+            (sbox[s0 >> 24] << 24 | sbox[(s1 >> 16) & 0xFF] << 16 | sbox[(s2 >> 8) & 0xFF] << 8 | sbox[s3 & 0xFF]) ^ f0,
+            (sbox[s1 >> 24] << 24 | sbox[(s2 >> 16) & 0xFF] << 16 | sbox[(s3 >> 8) & 0xFF] << 8 | sbox[s0 & 0xFF]) ^ f1,
+            (sbox[s2 >> 24] << 24 | sbox[(s3 >> 16) & 0xFF] << 16 | sbox[(s0 >> 8) & 0xFF] << 8 | sbox[s1 & 0xFF]) ^ f2,
+            (sbox[s3 >> 24] << 24 | sbox[(s0 >> 16) & 0xFF] << 16 | sbox[(s1 >> 8) & 0xFF] << 8 | sbox[s2 & 0xFF]) ^ f3)
+
+    def decrypt(s0, s1, s2, s3):
+        s0, s1, s2, s3 = s0 ^ dk0, s1 ^ dk1, s2 ^ dk2, s3 ^ dk3
+        for r0, r1, r2, r3 in dec_round_keys:
+            s0, s1, s2, s3 = (
+                td0[s0 >> 24] ^ td1[(s3 >> 16) & 0xFF] ^ td2[(s2 >> 8) & 0xFF] ^ td3[s1 & 0xFF] ^ r0,
+                td0[s1 >> 24] ^ td1[(s0 >> 16) & 0xFF] ^ td2[(s3 >> 8) & 0xFF] ^ td3[s2 & 0xFF] ^ r1,
+                td0[s2 >> 24] ^ td1[(s1 >> 16) & 0xFF] ^ td2[(s0 >> 8) & 0xFF] ^ td3[s3 & 0xFF] ^ r2,
+                td0[s3 >> 24] ^ td1[(s2 >> 16) & 0xFF] ^ td2[(s1 >> 8) & 0xFF] ^ td3[s0 & 0xFF] ^ r3)
+        return (
+            (sbox_inv[s0 >> 24] << 24 | sbox_inv[(s3 >> 16) & 0xFF] << 16
+             | sbox_inv[(s2 >> 8) & 0xFF] << 8 | sbox_inv[s1 & 0xFF]) ^ df0,
+            (sbox_inv[s1 >> 24] << 24 | sbox_inv[(s0 >> 16) & 0xFF] << 16
+             | sbox_inv[(s3 >> 8) & 0xFF] << 8 | sbox_inv[s2 & 0xFF]) ^ df1,
+            (sbox_inv[s2 >> 24] << 24 | sbox_inv[(s1 >> 16) & 0xFF] << 16
+             | sbox_inv[(s0 >> 8) & 0xFF] << 8 | sbox_inv[s3 & 0xFF]) ^ df2,
+            (sbox_inv[s3 >> 24] << 24 | sbox_inv[(s2 >> 16) & 0xFF] << 16
+             | sbox_inv[(s1 >> 8) & 0xFF] << 8 | sbox_inv[s0 & 0xFF]) ^ df3)
+
+    return encrypt, decrypt
+
+
+def _to_words(data):
+    """ Split bytes into 32-bit words, padding the last block with zeros """
+    data += bytes(-len(data) % BLOCK_SIZE_BYTES)
+    return struct.unpack(f'>{len(data) // 4}I', data)
+
+
+def _cbc_decrypt(data, key, iv):
+    _, decrypt = _block_cipher(key)
+    words = _to_words(data)
+    p0, p1, p2, p3 = struct.unpack('>4I', iv)
+    decrypted = []
+    for i in range(0, len(words), 4):
+        c0, c1, c2, c3 = words[i: i + 4]
+        d0, d1, d2, d3 = decrypt(c0, c1, c2, c3)
+        decrypted.extend((d0 ^ p0, d1 ^ p1, d2 ^ p2, d3 ^ p3))
+        p0, p1, p2, p3 = c0, c1, c2, c3
+    return struct.pack(f'>{len(decrypted)}I', *decrypted)[:len(data)]
+
+
+def _ctr_crypt(data, key, iv):
+    if not data:
+        return b''
+    encrypt, _ = _block_cipher(key)
+    counter = int.from_bytes(iv, 'big')
+    keystream = []
+    for _ in range(-(-len(data) // BLOCK_SIZE_BYTES)):
+        keystream.extend(encrypt(
+            counter >> 96, (counter >> 64) & 0xFFFFFFFF, (counter >> 32) & 0xFFFFFFFF, counter & 0xFFFFFFFF))
+        counter = (counter + 1) & ((1 << 128) - 1)
+    keystream = struct.pack(f'>{len(keystream)}I', *keystream)[:len(data)]
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(keystream, 'big')).to_bytes(len(data), 'big')
+
+
+@functools.lru_cache(maxsize=16)
+def _ghash_tables(subkey):
+    """ Products of the hash subkey with each block of a single leading byte, and the reductions for each trailing byte """
+    def multiply_by_x(value):
+        return (value >> 1) ^ (0xE1 << 120) if value & 1 else value >> 1
+
+    products = []
+    for byte in range(256):
+        product, value = 0, subkey
         for bit in range(7, -1, -1):
-            if i & (1 << bit):
-                block_z = xor(block_z, block_v)
-
-            do_xor = block_v[-1] & 1
-            block_v = shift_block(block_v)
-            if do_xor:
-                block_v = xor(block_v, block_r)
+            if byte & (1 << bit):
+                product ^= value
+            value = multiply_by_x(value)
+        products.append(product)
+
+    reductions = []
+    for byte in range(256):
+        value = byte
+        for _ in range(8):
+            value = multiply_by_x(value)
+        reductions.append(value)
+    return tuple(products), tuple(reductions)
+
+
+def _ghash(subkey, data):
+    # NIST SP 800-38D, Algorithm 2, multiplying a byte at a time
+    products, reductions = _ghash_tables(subkey)
+    last_y = 0
+    for i in range(0, len(data), BLOCK_SIZE_BYTES):
+        block = last_y ^ int.from_bytes(data[i: i + BLOCK_SIZE_BYTES], 'big')
+        last_y = products[block & 0xFF]
+        for shift in range(8, 128, 8):
+            last_y = (last_y >> 8) ^ reductions[last_y & 0xFF] ^ products[(block >> shift) & 0xFF]
+    return last_y
 
-    return block_z
 
+def _gcm_decrypt_and_verify(data, key, tag, nonce):
+    encrypt, _ = _block_cipher(key)
+    hash_subkey = int.from_bytes(struct.pack('>4I', *encrypt(0, 0, 0, 0)), 'big')
 
-def ghash(subkey, data):
-    # NIST SP 800-38D, Algorithm 2
+    if len(nonce) == 12:
+        j0 = nonce + b'\x00\x00\x00\x01'
+    else:
+        ghash_in = nonce + bytes(-len(nonce) % BLOCK_SIZE_BYTES + 8) + (8 * len(nonce)).to_bytes(8, 'big')
+        j0 = _ghash(hash_subkey, ghash_in).to_bytes(BLOCK_SIZE_BYTES, 'big')
+    iv_ctr = ((int.from_bytes(j0, 'big') + 1) & ((1 << 128) - 1)).to_bytes(BLOCK_SIZE_BYTES, 'big')
 
-    if len(data) % BLOCK_SIZE_BYTES:
-        raise ValueError(f'Length of data should be {BLOCK_SIZE_BYTES} bytes')
+    decrypted_data = _ctr_crypt(data, key, iv_ctr)
+    s_tag = _ghash(
+        hash_subkey,
+        data
+        + bytes(-len(data) % BLOCK_SIZE_BYTES)                 # pad
+        + (0 * 8).to_bytes(8, 'big')                           # length of associated data
+        + (len(data) * 8).to_bytes(8, 'big'))                  # length of data
 
-    last_y = [0] * BLOCK_SIZE_BYTES
-    for i in range(0, len(data), BLOCK_SIZE_BYTES):
-        block = data[i: i + BLOCK_SIZE_BYTES]
-        last_y = block_product(xor(last_y, block), subkey)
+    if tag != _ctr_crypt(s_tag.to_bytes(BLOCK_SIZE_BYTES, 'big'), key, j0):
+        raise ValueError('Mismatching authentication tag')
 
-    return last_y
+    return decrypted_data
 
 
 __all__ = [
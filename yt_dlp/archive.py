@@ -0,0 +1,141 @@
+import hashlib
+import os
+import threading
+import time
+
+from .dependencies import sqlite3
+from .utils import locked_file
+
+
+class IndexedDownloadArchive:
+    """
+    A download archive that is looked up through an on-disk SQLite index
+
+    The text archive (one ID per line) remains the source of truth and is only ever
+    appended to, so it stays interchangeable with the default archive.
+    The index is kept next to it as "<archive>.sqlite". On every lookup, only the lines
+    appended to the text archive since the last update of the index are read,
+    so neither startup time nor memory usage depend on the size of the archive.
+
+    New IDs are visible to lookups immediately, but are written out in batches.
+    Call `flush` or `close` to write them
+    """
+
+    _INDEX_VERSION = 1
+    _TAIL_SIZE = 4096  # Bytes before the indexed offset that are checked for modifications
+
+    def __init__(self, filename, *, batch_size=100, batch_interval=10, write_debug=None):
+        if not sqlite3:
+            raise ImportError('sqlite3 is required for an indexed download archive')
+        self.filename = filename
+        self.index_filename = f'{filename}.sqlite'
+        self.batch_size, self.batch_interval = batch_size, batch_interval
+        self._write_debug = write_debug or (lambda _: None)
+        self._lock = threading.RLock()
+        self._pending, self._pending_since = [], None
+        self._recorded = set()
+        self._size = None
+
+        self._conn = sqlite3.connect(self.index_filename, check_same_thread=False)
+        with self._conn:
+            self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS archive (id TEXT PRIMARY KEY) WITHOUT ROWID')
+        if self._get_meta('version') != self._INDEX_VERSION:
+            self._reset_index()
+        self.update_index()
+
+    def _get_meta(self, key, default=None):
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, **kwargs):
+        self._conn.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)', kwargs.items())
+
+    def _reset_index(self):
+        with self._conn:
+            self._conn.execute('DELETE FROM archive')
+            self._set_meta(version=self._INDEX_VERSION, offset=0, tail_hash=None)
+
+    def update_index(self):
+        """Add the lines appended to the text archive since the last update to the index"""
+        with self._lock:
+            try:
+                size = os.path.getsize(self.filename)
+            except FileNotFoundError:
+                size = 0
+            if size == self._size:
+                return
+            self._size = size
+
+            offset = self._get_meta('offset', 0)
+            if size < offset:
+                self._write_debug('Download archive has been truncated; rebuilding the index')
+                self._reset_index()
+                offset = 0
+            if size == offset:
+                return
+
+            with locked_file(self.filename, 'rb') as archive_file:
+                if offset and self._get_meta('tail_hash') != self._read_tail_hash(archive_file, offset):
+                    self._write_debug('Download archive has been modified; rebuilding the index')
+                    self._reset_index()
+                    offset = 0
+                archive_file.seek(offset)
+                data = archive_file.read(size - offset)
+                # The last line may not have been completely written yet
+                data = data[:data.rfind(b'\n') + 1]
+                if not data:
+                    return
+                self._write_debug(f'Indexing {len(data)} bytes of the download archive')
+                lines = (line.strip() for line in data.decode('utf-8', 'replace').splitlines())
+                offset += len(data)
+                with self._conn:
+                    self._conn.executemany(
+                        'INSERT OR IGNORE INTO archive VALUES (?)', ((line,) for line in lines if line))
+                    self._set_meta(offset=offset, tail_hash=self._read_tail_hash(archive_file, offset))
+
+    def _read_tail_hash(self, archive_file, offset):
+        start = max(offset - self._TAIL_SIZE, 0)
+        archive_file.seek(start)
+        return hashlib.sha256(archive_file.read(offset - start)).hexdigest()
+
+    def __contains__(self, vid_id):
+        with self._lock:
+            if vid_id in self._recorded:
+                return True
+            self.update_index()
+            return self._conn.execute('SELECT 1 FROM archive WHERE id = ?', (vid_id,)).fetchone() is not None
+
+    def __bool__(self):
+        return True
+
+    def add(self, vid_id):
+        """Make the ID visible to lookups. See `write` to persist it"""
+        with self._lock:
+            self._recorded.add(vid_id)
+
+    def write(self, vid_id):
+        """Queue the ID to be appended to the text archive"""
+        with self._lock:
+            self._recorded.add(vid_id)
+            self._pending.append(vid_id)
+            self._pending_since = self._pending_since or time.monotonic()
+            if (len(self._pending) >= self.batch_size
+                    or time.monotonic() - self._pending_since >= self.batch_interval):
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            self._write_debug(f'Writing {len(self._pending)} IDs to the download archive')
+            with locked_file(self.filename, 'a', encoding='utf-8') as archive_file:
+                archive_file.write(''.join(f'{vid_id}\n' for vid_id in self._pending))
+            # The index is updated from the text archive on the next lookup,
+            # so that lines appended by other processes are not skipped
+            self._pending, self._pending_since = [], None
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._conn.close()
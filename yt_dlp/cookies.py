@@ -26,11 +26,7 @@
     unpad_pkcs7,
 )
 from .compat import compat_os_name
-from .dependencies import (
-    _SECRETSTORAGE_UNAVAILABLE_REASON,
-    secretstorage,
-    sqlite3,
-)
+from .dependencies import sqlite3
 from .minicurses import MultilinePrinter, QuietMultilinePrinter
 from .utils import (
     DownloadError,
@@ -917,6 +913,8 @@ def _get_kwallet_password(browser_keyring_name, keyring, logger):
 
 
 def _get_gnome_keyring_password(browser_keyring_name, logger):
+    from .dependencies import _SECRETSTORAGE_UNAVAILABLE_REASON, secretstorage
+
     if not secretstorage:
         logger.error(f'secretstorage not available {_SECRETSTORAGE_UNAVAILABLE_REASON}')
         return b''
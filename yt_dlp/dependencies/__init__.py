@@ -1,6 +1,10 @@
 # flake8: noqa: F401
 """Imports all optional dependencies for the project.
-An attribute "_yt_dlp__identifier" may be inserted into the module if it uses an ambiguous namespace"""
+An attribute "_yt_dlp__identifier" may be inserted into the module if it uses an ambiguous namespace
+
+The dependencies that are only needed by some features are imported on first access"""
+
+import importlib
 
 try:
     import brotlicffi as brotli
@@ -23,24 +27,6 @@
         certifi = None
 
 
-try:
-    import mutagen
-except ImportError:
-    mutagen = None
-
-
-secretstorage = None
-try:
-    import secretstorage
-    _SECRETSTORAGE_UNAVAILABLE_REASON = None
-except ImportError:
-    _SECRETSTORAGE_UNAVAILABLE_REASON = (
-        'as the `secretstorage` module is not installed. '
-        'Please install by running `python3 -m pip install secretstorage`')
-except Exception as _err:
-    _SECRETSTORAGE_UNAVAILABLE_REASON = f'as the `secretstorage` module could not be initialized. {_err}'
-
-
 try:
     import sqlite3
     # We need to get the underlying `sqlite` version, see https://github.com/yt-dlp/yt-dlp/issues/8152
@@ -51,11 +37,6 @@
     sqlite3 = None
 
 
-try:
-    import websockets
-except ImportError:
-    websockets = None
-
 try:
     import urllib3
 except ImportError:
@@ -66,31 +47,97 @@
 except ImportError:
     requests = None
 
-try:
-    import xattr  # xattr or pyxattr
-except ImportError:
-    xattr = None
-else:
-    if hasattr(xattr, 'set'):  # pyxattr
-        xattr._yt_dlp__identifier = 'pyxattr'
+_LAZY_IMPORTERS = {}
 
-try:
-    import curl_cffi
-except ImportError:
-    curl_cffi = None
 
-from . import Cryptodome
+def _lazy_import(*names):
+    def decorator(func):
+        _LAZY_IMPORTERS.update(dict.fromkeys(names, func))
+        return func
+    return decorator
+
+
+@_lazy_import('mutagen')
+def _import_mutagen():
+    try:
+        import mutagen
+    except ImportError:
+        mutagen = None
+    return {'mutagen': mutagen}
+
+
+@_lazy_import('websockets')
+def _import_websockets():
+    try:
+        import websockets
+    except ImportError:
+        websockets = None
+    return {'websockets': websockets}
+
+
+@_lazy_import('curl_cffi')
+def _import_curl_cffi():
+    try:
+        import curl_cffi
+    except ImportError:
+        curl_cffi = None
+    return {'curl_cffi': curl_cffi}
+
+
+@_lazy_import('secretstorage', '_SECRETSTORAGE_UNAVAILABLE_REASON')
+def _import_secretstorage():
+    secretstorage = None
+    try:
+        import secretstorage
+        reason = None
+    except ImportError:
+        reason = (
+            'as the `secretstorage` module is not installed. '
+            'Please install by running `python3 -m pip install secretstorage`')
+    except Exception as err:
+        reason = f'as the `secretstorage` module could not be initialized. {err}'
+    return {'secretstorage': secretstorage, '_SECRETSTORAGE_UNAVAILABLE_REASON': reason}
+
+
+@_lazy_import('xattr')
+def _import_xattr():
+    try:
+        import xattr  # xattr or pyxattr
+    except ImportError:
+        xattr = None
+    else:
+        if hasattr(xattr, 'set'):  # pyxattr
+            xattr._yt_dlp__identifier = 'pyxattr'
+    return {'xattr': xattr}
+
+
+@_lazy_import('Cryptodome')
+def _import_cryptodome():
+    # Not `from . import Cryptodome`, since that would call `__getattr__` again
+    return {'Cryptodome': importlib.import_module(f'{__name__}.Cryptodome')}
+
 
-all_dependencies = {k: v for k, v in globals().items() if not k.startswith('_')}
-available_dependencies = {k: v for k, v in all_dependencies.items() if v}
+_DEPENDENCIES = (
+    'brotli', 'certifi', 'mutagen', 'secretstorage', 'sqlite3', 'websockets',
+    'urllib3', 'requests', 'xattr', 'curl_cffi', 'Cryptodome')
 
 
-# Deprecated
-Cryptodome_AES = Cryptodome.AES
+def __getattr__(name):
+    if name == 'all_dependencies':
+        return {k: __getattr__(k) if k in _LAZY_IMPORTERS else globals()[k] for k in _DEPENDENCIES}
+    elif name == 'available_dependencies':
+        return {k: v for k, v in __getattr__('all_dependencies').items() if v}
+    elif name == 'Cryptodome_AES':  # Deprecated
+        return __getattr__('Cryptodome').AES
+    elif name not in _LAZY_IMPORTERS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    if name not in globals():
+        globals().update(_LAZY_IMPORTERS[name]())
+    return globals()[name]
 
 
 __all__ = [
     'all_dependencies',
     'available_dependencies',
-    *all_dependencies.keys(),
+    *_DEPENDENCIES,
 ]
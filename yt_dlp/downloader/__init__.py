@@ -11,6 +11,8 @@ def get_suitable_downloader(info_dict, params={}, default=NO_DEFAULT, protocol=N
 
     if set(downloaders) == {FFmpegFD} and FFmpegFD.can_merge_formats(info_copy, params):
         return FFmpegFD
+    elif set(downloaders) <= {HttpFD, DashSegmentsFD} and StreamMergeFD.can_merge_formats(info_copy, params):
+        return StreamMergeFD
     elif (set(downloaders) == {DashSegmentsFD}
           and not (to_stdout and len(protocols) > 1)
           and set(protocols) == {'http_dash_segments_generator'}):
@@ -29,6 +31,7 @@ def get_suitable_downloader(info_dict, params={}, default=NO_DEFAULT, protocol=N
 from .hls import HlsFD
 from .http import HttpFD
 from .ism import IsmFD
+from .merge import StreamMergeFD
 from .mhtml import MhtmlFD
 from .niconico import NiconicoDmcFD, NiconicoLiveFD
 from .rtmp import RtmpFD
@@ -109,7 +112,7 @@ def _get_suitable_downloader(info_dict, protocol, params, default):
             return FFmpegFD
 
     if protocol in ('m3u8', 'm3u8_native'):
-        if info_dict.get('is_live'):
+        if info_dict.get('is_live') and not info_dict.get('is_from_start'):
             return FFmpegFD
         elif (external_downloader or '').lower() == 'native':
             return HlsFD
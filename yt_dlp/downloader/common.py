@@ -4,6 +4,7 @@
 import os
 import random
 import re
+import stat
 import threading
 import time
 
@@ -73,7 +74,9 @@ class FileDownloader:
     hls_use_mpegts:     Use the mpegts container for HLS videos.
     http_chunk_size:    Size of a chunk for chunk-based HTTP downloading. May be
                         useful for bypassing bandwidth throttling imposed by
-                        a webserver (experimental)
+                        a webserver (experimental). If "auto", the chunk and
+                        read sizes are adapted to the measured throughput
+                        (see http.AdaptiveChunking)
     progress_template:  See YoutubeDL.py
     retry_sleep_functions: See YoutubeDL.py
 
@@ -180,6 +183,15 @@ def filesize_or_none(unencoded_filename):
             return os.path.getsize(unencoded_filename)
         return 0
 
+    @staticmethod
+    def is_pipe(filename):
+        """Whether the data is written to stdout or a named pipe, which cannot be read back"""
+        if filename == '-':
+            return True
+        with contextlib.suppress(OSError):
+            return stat.S_ISFIFO(os.stat(encodeFilename(filename)).st_mode)
+        return False
+
     @staticmethod
     def best_block_size(elapsed_time, bytes):
         new_min = max(bytes / 2.0, 1.0)
@@ -1,3 +1,4 @@
+import collections
 import concurrent.futures
 import contextlib
 import json
@@ -24,6 +25,43 @@ def to_screen(self, *args, **kargs):
     to_console_title = to_screen
 
 
+class FragmentBuffer:
+    """
+    An in-memory destination for a fragment download
+
+    Clearing the buffer keeps its memory allocated,
+    so that a single buffer can be reused for many fragments
+    """
+
+    def __init__(self):
+        self._data = bytearray()
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def write(self, data):
+        end = self._size + len(data)
+        # Overwrites the old contents in place and only grows the bytearray when needed
+        self._data[self._size:end] = data
+        self._size = end
+        return len(data)
+
+    def truncate(self, size=0):
+        self._size = min(size, self._size)
+        return self._size
+
+    def getvalue(self):
+        with memoryview(self._data) as view:
+            return view[:self._size].tobytes()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
 class FragmentFD(FileDownloader):
     """
     A base file downloader class for fragmented media (e.g. f4m/m3u8 manifests).
@@ -37,6 +75,10 @@ class FragmentFD(FileDownloader):
     keep_fragments:     Keep downloaded fragments on disk after downloading is
                         finished
     concurrent_fragment_downloads:  The number of threads to use for native hls and dash downloads
+    async_fragments:    Schedule the fragments of all the formats on one event loop,
+                        sharing concurrent_fragment_downloads threads between them
+    in_memory_fragments:  Download the fragments into reusable memory buffers
+                        instead of temporary files. Resuming works per fragment
     _no_ytdl_file:      Don't use .ytdl file
 
     For each incomplete fragment download yt-dlp keeps on disk a special
@@ -118,21 +160,40 @@ def _download_fragment(self, ctx, frag_url, info_dict, headers=None, request_dat
             'ctx_id': ctx.get('ctx_id'),
         }
         frag_resume_len = 0
-        if ctx['dl'].params.get('continuedl', True):
+        buffers = ctx.get('fragment_buffers')
+        if buffers is not None:
+            try:
+                fragment_buffer = buffers.pop()
+            except IndexError:
+                fragment_buffer = FragmentBuffer()
+            fragment_buffer.truncate(0)
+        elif ctx['dl'].params.get('continuedl', True):
             frag_resume_len = self.filesize_or_none(self.temp_name(fragment_filename))
         fragment_info_dict['frag_resume_len'] = ctx['frag_resume_len'] = frag_resume_len
 
-        success, _ = ctx['dl'].download(fragment_filename, fragment_info_dict)
+        if buffers is None:
+            success, _ = ctx['dl'].download(fragment_filename, fragment_info_dict)
+        else:
+            success, _ = ctx['dl'].download(fragment_buffer, fragment_info_dict)
+            if not success:
+                buffers.append(fragment_buffer)
+            elif self.params.get('keep_fragments', False):
+                with open(encodeFilename(fragment_filename), 'wb') as f:
+                    f.write(fragment_buffer.getvalue())
         if not success:
             return False
         if fragment_info_dict.get('filetime'):
             ctx['fragment_filetime'] = fragment_info_dict.get('filetime')
+        if buffers is not None:
+            ctx['fragment_buffer'] = fragment_buffer
         ctx['fragment_filename_sanitized'] = fragment_filename
         return True
 
     def _read_fragment(self, ctx):
         if not ctx.get('fragment_filename_sanitized'):
             return None
+        if ctx.get('fragment_buffer') is not None:
+            return ctx['fragment_buffer'].getvalue()
         try:
             down, frag_sanitized = self.sanitize_open(ctx['fragment_filename_sanitized'], 'rb')
         except FileNotFoundError:
@@ -151,7 +212,10 @@ def _append_fragment(self, ctx, frag_content):
         finally:
             if self.__do_ytdl_file(ctx):
                 self._write_ytdl_file(ctx)
-            if not self.params.get('keep_fragments', False):
+            fragment_buffer = ctx.pop('fragment_buffer', None)
+            if fragment_buffer is not None:
+                ctx['fragment_buffers'].append(fragment_buffer)
+            elif not self.params.get('keep_fragments', False):
                 self.try_remove(encodeFilename(ctx['fragment_filename_sanitized']))
             del ctx['fragment_filename_sanitized']
 
@@ -169,6 +233,7 @@ def _prepare_frag_download(self, ctx):
             **self.params,
             'noprogress': True,
             'test': False,
+            'http_connections': 1,
             'sleep_interval': 0,
             'max_sleep_interval': 0,
             'sleep_interval_subtitles': 0,
@@ -221,6 +286,8 @@ def _prepare_frag_download(self, ctx):
             'tmpfilename': tmpfilename,
             # Total complete fragments downloaded so far in bytes
             'complete_frags_downloaded_bytes': resume_len,
+            # Idle buffers for in_memory_fragments. A deque is used since it is thread-safe
+            'fragment_buffers': collections.deque() if self.params.get('in_memory_fragments') else None,
         })
 
     def _start_frag_download(self, ctx, info_dict):
@@ -289,7 +356,7 @@ def _finish_frag_download(self, ctx, info_dict):
             self.try_remove(self.ytdl_filename(ctx['filename']))
         elapsed = time.time() - ctx['started']
 
-        to_file = ctx['tmpfilename'] != '-'
+        to_file = not self.is_pipe(ctx['tmpfilename'])
         if to_file:
             downloaded_bytes = self.filesize_or_none(ctx['tmpfilename'])
         else:
@@ -375,9 +442,11 @@ def download_and_append_fragments_multiple(self, *args, **kwargs):
         if max_progress == 1:
             return self.download_and_append_fragments(*args[0], **kwargs)
         max_workers = self.params.get('concurrent_fragment_downloads', 1)
+        is_live = any(traverse_obj(args, (..., 2, 'is_live')))
+        if self.params.get('async_fragments') and max_workers > 1 and not is_live:
+            return self.download_and_append_fragments_async(*args, **kwargs)
         if max_progress > 1:
             self._prepare_multiline_status(max_progress)
-        is_live = any(traverse_obj(args, (..., 2, 'is_live')))
 
         def thread_func(idx, ctx, fragments, info_dict, tpe):
             ctx['max_progress'] = max_progress
@@ -429,11 +498,13 @@ def interrupt_trigger_iter(fg):
         # so returning a intermediate result here instead of KeyboardInterrupt on live
         return result
 
-    def download_and_append_fragments(
-            self, ctx, fragments, info_dict, *, is_fatal=(lambda idx: False),
-            pack_func=(lambda content, idx: content), finish_func=None,
-            tpe=None, interrupt_trigger=(True, )):
-
+    def _fragment_handlers(self, ctx, info_dict, *, is_fatal, pack_func, interrupt_trigger):
+        """
+        Returns the functions that
+            * download a fragment into ctx
+            * download a fragment into a copy of ctx, so that it can run concurrently
+            * append a fragment that was downloaded into a copy of ctx
+        """
         if not self.params.get('skip_unavailable_fragments', True):
             is_fatal = lambda _: True
 
@@ -470,7 +541,23 @@ def error_callback(err, count, retries):
                     if fatal:
                         raise
 
-        def append_fragment(frag_content, frag_index, ctx):
+        def download_fragment_copy(fragment):
+            ctx_copy = ctx.copy()
+            download_fragment(fragment, ctx_copy)
+            return (fragment, fragment['frag_index'], ctx_copy.get('fragment_filename_sanitized'),
+                    ctx_copy.get('fragment_buffer'))
+
+        decrypt_fragment = self.decrypter(info_dict)
+
+        def append_fragment(fragment, frag_index, *downloaded):
+            if downloaded:
+                frag_filename, frag_buffer = downloaded
+                ctx.update({
+                    'fragment_filename_sanitized': frag_filename,
+                    'fragment_buffer': frag_buffer,
+                    'fragment_index': frag_index,
+                })
+            frag_content = decrypt_fragment(fragment, self._read_fragment(ctx))
             if frag_content:
                 self._append_fragment(ctx, pack_func(frag_content, frag_index))
             elif not is_fatal(frag_index - 1):
@@ -481,24 +568,43 @@ def append_fragment(frag_content, frag_index, ctx):
                 return False
             return True
 
-        decrypt_fragment = self.decrypter(info_dict)
+        return download_fragment, download_fragment_copy, append_fragment
+
+    def _finish_fragments(self, ctx, info_dict, finish_func=None):
+        if finish_func is not None:
+            ctx['dest_stream'].write(finish_func())
+            ctx['dest_stream'].flush()
+        return self._finish_frag_download(ctx, info_dict)
+
+    def download_and_append_fragments(
+            self, ctx, fragments, info_dict, *, is_fatal=(lambda idx: False),
+            pack_func=(lambda content, idx: content), finish_func=None,
+            tpe=None, interrupt_trigger=(True, )):
 
         max_workers = math.ceil(
             self.params.get('concurrent_fragment_downloads', 1) / ctx.get('max_progress', 1))
-        if max_workers > 1:
-            def _download_fragment(fragment):
-                ctx_copy = ctx.copy()
-                download_fragment(fragment, ctx_copy)
-                return fragment, fragment['frag_index'], ctx_copy.get('fragment_filename_sanitized')
+        if max_workers > 1 and tpe is None and self.params.get('async_fragments') and not info_dict.get('is_live'):
+            return self.download_and_append_fragments_async(
+                (ctx, fragments, info_dict), is_fatal=is_fatal, pack_func=pack_func, finish_func=finish_func)
+
+        download_fragment, download_fragment_copy, append_fragment = self._fragment_handlers(
+            ctx, info_dict, is_fatal=is_fatal, pack_func=pack_func, interrupt_trigger=interrupt_trigger)
 
+        if max_workers > 1:
             with tpe or concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
+                # Only max_workers fragments are downloaded ahead, so that the fragments
+                # waiting for an earlier one to be appended are not all kept in memory
+                fragments, pending = iter(fragments), collections.deque()
                 try:
-                    for fragment, frag_index, frag_filename in pool.map(_download_fragment, fragments):
-                        ctx.update({
-                            'fragment_filename_sanitized': frag_filename,
-                            'fragment_index': frag_index,
-                        })
-                        if not append_fragment(decrypt_fragment(fragment, self._read_fragment(ctx)), frag_index, ctx):
+                    while True:
+                        while len(pending) < max_workers:
+                            fragment = next(fragments, None)
+                            if fragment is None:
+                                break
+                            pending.append(pool.submit(download_fragment_copy, fragment))
+                        if not pending:
+                            break
+                        if not append_fragment(*pending.popleft().result()):
                             return False
                 except KeyboardInterrupt:
                     self._finish_multiline_status()
@@ -506,14 +612,16 @@ def _download_fragment(fragment):
                         'Interrupted by user. Waiting for all threads to shutdown...', is_error=False, tb=False)
                     pool.shutdown(wait=False)
                     raise
+                finally:
+                    for future in pending:
+                        future.cancel()
         else:
             for fragment in fragments:
                 if not interrupt_trigger[0]:
                     break
                 try:
                     download_fragment(fragment, ctx)
-                    result = append_fragment(
-                        decrypt_fragment(fragment, self._read_fragment(ctx)), fragment['frag_index'], ctx)
+                    result = append_fragment(fragment, fragment['frag_index'])
                 except KeyboardInterrupt:
                     if info_dict.get('is_live'):
                         break
@@ -521,7 +629,62 @@ def _download_fragment(fragment):
                 if not result:
                     return False
 
-        if finish_func is not None:
-            ctx['dest_stream'].write(finish_func())
-            ctx['dest_stream'].flush()
-        return self._finish_frag_download(ctx, info_dict)
+        return self._finish_fragments(ctx, info_dict, finish_func)
+
+    def download_and_append_fragments_async(
+            self, *args, is_fatal=(lambda idx: False), pack_func=(lambda content, idx: content), finish_func=None):
+        """
+        Download the fragments of all the formats with a single event loop
+
+        @params (ctx1, fragments1, info_dict1), (ctx2, fragments2, info_dict2), ...
+
+        The downloads are blocking, and run in a single pool of concurrent_fragment_downloads
+        threads that is shared by all the formats. The event loop schedules them and
+        appends the fragments of each format in order, as they complete
+        """
+        import asyncio
+
+        max_workers = self.params.get('concurrent_fragment_downloads', 1)
+        if len(args) > 1:
+            self._prepare_multiline_status(len(args))
+        interrupt_trigger = [True]
+
+        async def download_format(pool, idx, ctx, fragments, info_dict):
+            ctx['max_progress'], ctx['progress_idx'] = len(args), idx
+            _, download_fragment_copy, append_fragment = self._fragment_handlers(
+                ctx, info_dict, is_fatal=is_fatal, pack_func=pack_func, interrupt_trigger=interrupt_trigger)
+            loop = asyncio.get_running_loop()
+            fragments, pending = iter(fragments), collections.deque()
+            try:
+                while True:
+                    # Each format keeps up to max_workers fragments queued in the shared pool
+                    while len(pending) < max_workers:
+                        fragment = next(fragments, None)
+                        if fragment is None:
+                            break
+                        pending.append(loop.run_in_executor(pool, download_fragment_copy, fragment))
+                    if not pending:
+                        break
+                    if not append_fragment(*await pending.popleft()):
+                        return False
+            finally:
+                for future in pending:
+                    future.cancel()
+            return self._finish_fragments(ctx, info_dict, finish_func)
+
+        async def download_formats():
+            pool = concurrent.futures.ThreadPoolExecutor(max_workers)
+            try:
+                results = await asyncio.gather(*(
+                    download_format(pool, idx, *job) for idx, job in enumerate(args)))
+            except (KeyboardInterrupt, asyncio.CancelledError):
+                interrupt_trigger[0] = False
+                self._finish_multiline_status()
+                self.report_error(
+                    'Interrupted by user. Waiting for all threads to shutdown...', is_error=False, tb=False)
+                raise
+            finally:
+                pool.shutdown(wait=interrupt_trigger[0])
+            return all(results)
+
+        return asyncio.run(download_formats())
@@ -1,21 +1,23 @@
 import binascii
 import io
 import re
+import time
 import urllib.parse
 
 from . import get_suitable_downloader
 from .external import FFmpegFD
 from .fragment import FragmentFD
-from .. import webvtt
-from ..dependencies import Cryptodome
+from .. import dependencies, m3u8, webvtt
+from ..networking import Request
+from ..networking.exceptions import HTTPError, RequestError
 from ..utils import (
     bug_reports_message,
-    parse_m3u8_attributes,
     remove_start,
     traverse_obj,
     update_url_query,
     urljoin,
 )
+from ..utils.networking import HTTPHeaderDict, conditional_headers
 
 
 class HlsFD(FragmentFD):
@@ -27,6 +29,9 @@ class HlsFD(FragmentFD):
 
     FD_NAME = 'hlsnative'
 
+    # How long a live playlist may go without new segments before it is considered ended, in target durations
+    _LIVE_TIMEOUT = 10
+
     @staticmethod
     def _has_drm(manifest):  # TODO: https://github.com/yt-dlp/yt-dlp/pull/5039
         return bool(re.search('|'.join((
@@ -63,13 +68,60 @@ def can_download(cls, manifest, info_dict, allow_unplayable_formats=False):
             ]
 
         def check_results():
-            yield not info_dict.get('is_live')
+            # Live playlists can only be downloaded natively from the start
+            yield not info_dict.get('is_live') or info_dict.get('is_from_start')
             for feature in UNSUPPORTED_FEATURES:
                 yield not re.search(feature, manifest)
             if not allow_unplayable_formats:
                 yield not cls._has_drm(manifest)
         return all(check_results())
 
+    def _refresh_live_playlist(self, url, playlist, info_dict, headers):
+        """
+        Reload a live playlist until it ends, and yield the segments that are added to it
+
+        The reloads are conditional requests, and use the Playlist Delta Updates and
+        Blocking Playlist Reloads of Low-Latency HLS when the server supports them
+
+        @param headers  The headers of the response that the playlist was last fed from
+        """
+        conditions = conditional_headers(headers)
+        last_update = time.monotonic()
+        changed = True
+        while not playlist.ended:
+            target_duration = playlist.target_duration or 6
+            query = {}
+            blocking = playlist.server_control.get('CAN-BLOCK-RELOAD') == 'YES'
+            if blocking:
+                # The server holds the request until the next segment is available
+                query['_HLS_msn'] = playlist.media_sequence
+            if not (blocking and changed):
+                # RFC 8216 §6.3.4: wait for a target duration, or half of it if the playlist did not change
+                time.sleep(target_duration if changed else target_duration / 2)
+            if playlist.server_control.get('CAN-SKIP-UNTIL'):
+                query['_HLS_skip'] = 'YES'
+
+            segments = []
+            try:
+                urlh = self.ydl.urlopen(Request(
+                    update_url_query(url, query), None, HTTPHeaderDict(info_dict.get('http_headers'), conditions)))
+            except HTTPError as e:
+                if e.status != 304:
+                    self.report_warning(f'Unable to reload the playlist: {e}')
+            except RequestError as e:
+                self.report_warning(f'Unable to reload the playlist: {e}')
+            else:
+                conditions = conditional_headers(urlh.headers)
+                segments = playlist.feed(urlh.read().decode('utf-8', 'ignore'))
+
+            changed = bool(segments)
+            if changed:
+                last_update = time.monotonic()
+                yield segments
+            elif time.monotonic() - last_update > self._LIVE_TIMEOUT * target_duration:
+                self.report_warning('The playlist has not been updated in a while; assuming that the stream has ended')
+                return
+
     def real_download(self, filename, info_dict):
         man_url = info_dict['url']
         self.to_screen(f'[{self.FD_NAME}] Downloading m3u8 manifest')
@@ -81,7 +133,7 @@ def real_download(self, filename, info_dict):
         can_download, message = self.can_download(s, info_dict, self.params.get('allow_unplayable_formats')), None
         if can_download:
             has_ffmpeg = FFmpegFD.available()
-            no_crypto = not Cryptodome.AES and '#EXT-X-KEY:METHOD=AES-128' in s
+            no_crypto = not dependencies.Cryptodome.AES and '#EXT-X-KEY:METHOD=AES-128' in s
             if no_crypto and has_ffmpeg:
                 can_download, message = False, 'The stream has AES-128 encryption and pycryptodomex is not available'
             elif no_crypto:
@@ -107,9 +159,14 @@ def real_download(self, filename, info_dict):
         elif message:
             self.report_warning(message)
 
+        playlist = m3u8.Playlist(s)
+        is_live = info_dict.get('is_live') and not playlist.ended
+
         is_webvtt = info_dict['ext'] == 'vtt'
         if is_webvtt:
             real_downloader = None  # Packing the fragments is not currently supported for external downloader
+        elif is_live:
+            real_downloader = None  # No external FD can support refreshing the playlist
         else:
             real_downloader = get_suitable_downloader(
                 info_dict, self.params, None, protocol='m3u8_frag_urls', to_stdout=(filename == '-'))
@@ -118,38 +175,20 @@ def real_download(self, filename, info_dict):
         if real_downloader:
             self.to_screen(f'[{self.FD_NAME}] Fragment downloads will be delegated to {real_downloader.get_basename()}')
 
-        def is_ad_fragment_start(s):
-            return (s.startswith('#ANVATO-SEGMENT-INFO') and 'type=ad' in s
-                    or s.startswith('#UPLYNK-SEGMENT') and s.endswith(',ad'))
-
-        def is_ad_fragment_end(s):
-            return (s.startswith('#ANVATO-SEGMENT-INFO') and 'type=master' in s
-                    or s.startswith('#UPLYNK-SEGMENT') and s.endswith(',segment'))
-
-        fragments = []
-
-        media_frags = 0
-        ad_frags = 0
-        ad_frag_next = False
-        for line in s.splitlines():
-            line = line.strip()
-            if not line:
+        media_frags = ad_frags = 0
+        for segment in playlist.segments:
+            if segment.init:
                 continue
-            if line.startswith('#'):
-                if is_ad_fragment_start(line):
-                    ad_frag_next = True
-                elif is_ad_fragment_end(line):
-                    ad_frag_next = False
-                continue
-            if ad_frag_next:
+            elif segment.ad:
                 ad_frags += 1
-                continue
-            media_frags += 1
+            else:
+                media_frags += 1
 
         ctx = {
             'filename': filename,
-            'total_frags': media_frags,
+            'total_frags': None if is_live else media_frags,
             'ad_frags': ad_frags,
+            'live': is_live,
         }
 
         if real_downloader:
@@ -166,9 +205,6 @@ def is_ad_fragment_end(s):
         extra_key_query = None
         if extra_param_to_key_url := info_dict.get('extra_param_to_key_url'):
             extra_key_query = urllib.parse.parse_qs(extra_param_to_key_url)
-        i = 0
-        media_sequence = 0
-        decrypt_info = {'METHOD': 'NONE'}
         external_aes_key = traverse_obj(info_dict, ('hls_aes', 'key'))
         if external_aes_key:
             external_aes_key = binascii.unhexlify(remove_start(external_aes_key, '0x'))
@@ -176,103 +212,82 @@ def is_ad_fragment_end(s):
         external_aes_iv = traverse_obj(info_dict, ('hls_aes', 'iv'))
         if external_aes_iv:
             external_aes_iv = binascii.unhexlify(remove_start(external_aes_iv, '0x').zfill(32))
-        byte_range = {}
-        discontinuity_count = 0
+
+        def make_decrypt_info(key, previous):
+            if key is None:
+                return {'METHOD': 'NONE'}
+            decrypt_info = dict(key)
+            if decrypt_info['METHOD'] == 'AES-128':
+                if external_aes_iv:
+                    decrypt_info['IV'] = external_aes_iv
+                elif 'IV' in decrypt_info:
+                    decrypt_info['IV'] = binascii.unhexlify(decrypt_info['IV'][2:].zfill(32))
+                if external_aes_key:
+                    decrypt_info['KEY'] = external_aes_key
+                else:
+                    decrypt_info['URI'] = urljoin(man_url, decrypt_info['URI'])
+                    if extra_key_query or extra_segment_query:
+                        # Fall back to extra_segment_query to key for backwards compat
+                        decrypt_info['URI'] = update_url_query(
+                            decrypt_info['URI'], extra_key_query or extra_segment_query)
+                    if previous.get('URI') != decrypt_info['URI']:
+                        decrypt_info['KEY'] = None
+            return decrypt_info
+
+        key, decrypt_info = None, {'METHOD': 'NONE'}
         frag_index = 0
-        ad_frag_next = False
-        for line in s.splitlines():
-            line = line.strip()
-            if line:
-                if not line.startswith('#'):
-                    if format_index and discontinuity_count != format_index:
-                        continue
-                    if ad_frag_next:
-                        continue
-                    frag_index += 1
-                    if frag_index <= ctx['fragment_index']:
-                        continue
-                    frag_url = urljoin(man_url, line)
-                    if extra_segment_query:
-                        frag_url = update_url_query(frag_url, extra_segment_query)
-
-                    fragments.append({
-                        'frag_index': frag_index,
-                        'url': frag_url,
-                        'decrypt_info': decrypt_info,
-                        'byte_range': byte_range,
-                        'media_sequence': media_sequence,
-                    })
-                    media_sequence += 1
-
-                elif line.startswith('#EXT-X-MAP'):
-                    if format_index and discontinuity_count != format_index:
-                        continue
+
+        def make_fragments(segments):
+            nonlocal key, decrypt_info, frag_index
+            fragments = []
+            for segment in segments:
+                if format_index and segment.discontinuity != format_index:
+                    continue
+                if segment.init:
                     if frag_index > 0:
                         self.report_error(
                             'Initialization fragment found after media fragments, unable to download')
-                        return False
-                    frag_index += 1
-                    map_info = parse_m3u8_attributes(line[11:])
-                    frag_url = urljoin(man_url, map_info.get('URI'))
-                    if extra_segment_query:
-                        frag_url = update_url_query(frag_url, extra_segment_query)
-
-                    if map_info.get('BYTERANGE'):
-                        splitted_byte_range = map_info.get('BYTERANGE').split('@')
-                        sub_range_start = int(splitted_byte_range[1]) if len(splitted_byte_range) == 2 else byte_range['end']
-                        byte_range = {
-                            'start': sub_range_start,
-                            'end': sub_range_start + int(splitted_byte_range[0]),
-                        }
-
-                    fragments.append({
-                        'frag_index': frag_index,
-                        'url': frag_url,
-                        'decrypt_info': decrypt_info,
-                        'byte_range': byte_range,
-                        'media_sequence': media_sequence,
-                    })
-                    media_sequence += 1
-
-                elif line.startswith('#EXT-X-KEY'):
-                    decrypt_url = decrypt_info.get('URI')
-                    decrypt_info = parse_m3u8_attributes(line[11:])
-                    if decrypt_info['METHOD'] == 'AES-128':
-                        if external_aes_iv:
-                            decrypt_info['IV'] = external_aes_iv
-                        elif 'IV' in decrypt_info:
-                            decrypt_info['IV'] = binascii.unhexlify(decrypt_info['IV'][2:].zfill(32))
-                        if external_aes_key:
-                            decrypt_info['KEY'] = external_aes_key
-                        else:
-                            decrypt_info['URI'] = urljoin(man_url, decrypt_info['URI'])
-                            if extra_key_query or extra_segment_query:
-                                # Fall back to extra_segment_query to key for backwards compat
-                                decrypt_info['URI'] = update_url_query(
-                                    decrypt_info['URI'], extra_key_query or extra_segment_query)
-                            if decrypt_url != decrypt_info['URI']:
-                                decrypt_info['KEY'] = None
-
-                elif line.startswith('#EXT-X-MEDIA-SEQUENCE'):
-                    media_sequence = int(line[22:])
-                elif line.startswith('#EXT-X-BYTERANGE'):
-                    splitted_byte_range = line[17:].split('@')
-                    sub_range_start = int(splitted_byte_range[1]) if len(splitted_byte_range) == 2 else byte_range['end']
-                    byte_range = {
-                        'start': sub_range_start,
-                        'end': sub_range_start + int(splitted_byte_range[0]),
-                    }
-                elif is_ad_fragment_start(line):
-                    ad_frag_next = True
-                elif is_ad_fragment_end(line):
-                    ad_frag_next = False
-                elif line.startswith('#EXT-X-DISCONTINUITY'):
-                    discontinuity_count += 1
-                i += 1
+                        return None
+                elif segment.ad:
+                    continue
+                frag_index += 1
+                if not segment.init and frag_index <= ctx['fragment_index']:
+                    continue
+                if segment.key is not key:
+                    key, decrypt_info = segment.key, make_decrypt_info(segment.key, decrypt_info)
+                frag_url = urljoin(man_url, segment.uri)
+                if extra_segment_query:
+                    frag_url = update_url_query(frag_url, extra_segment_query)
+
+                fragments.append({
+                    'frag_index': frag_index,
+                    'url': frag_url,
+                    'decrypt_info': decrypt_info,
+                    'byte_range': segment.byte_range and {
+                        'start': segment.byte_range[0],
+                        'end': segment.byte_range[1],
+                    },
+                    'media_sequence': segment.sequence,
+                })
+            return fragments
+
+        fragments = make_fragments(playlist.segments)
+        if fragments is None:
+            return False
+        if is_live:
+            def live_fragments(fragments):
+                yield from fragments
+                for segments in self._refresh_live_playlist(man_url, playlist, info_dict, urlh.headers):
+                    fragments = make_fragments(segments)
+                    if fragments is None:
+                        return
+                    yield from fragments
+
+            fragments = live_fragments(fragments)
 
         # We only download the first fragment during the test
         if self.params.get('test', False):
-            fragments = [fragments[0] if fragments else None]
+            fragments = [next(iter(fragments), None)]
 
         if real_downloader:
             info_dict['fragments'] = fragments
@@ -372,7 +387,7 @@ def fin_fragments():
 
                 return output.getvalue().encode()
 
-            if len(fragments) == 1:
+            if not is_live and len(fragments) == 1:
                 self.download_and_append_fragments(ctx, fragments, info_dict)
             else:
                 self.download_and_append_fragments(
@@ -1,9 +1,15 @@
+import concurrent.futures
+import json
+import math
 import os
 import random
+import threading
 import time
+import urllib.parse
 
 from .common import FileDownloader
 from ..networking import Request
+from ..networking.budget import GLOBAL_BUDGET
 from ..networking.exceptions import (
     CertificateVerifyError,
     HTTPError,
@@ -18,13 +24,140 @@
     encodeFilename,
     int_or_none,
     parse_http_range,
+    timeconvert,
     try_call,
     write_xattr,
 )
 from ..utils.networking import HTTPHeaderDict
 
 
+class BlockBuffer:
+    """A buffer that is reused for reading the blocks of a response, instead of allocating each of them"""
+
+    def __init__(self, size=0):
+        self._view = memoryview(bytearray(size))
+
+    def read(self, response, size):
+        """Read up to `size` bytes, returning a view of them that is only valid until the next read"""
+        if len(self._view) < size:
+            self._view.release()
+            self._view = memoryview(bytearray(size))
+        return self._view[:response.readinto(self._view[:size])]
+
+
+class AdaptiveChunking:
+    """
+    Chooses the size of the ranged requests and of the reads from the measured throughput
+
+    The download starts as a single request, or in chunks of the given size.
+    When the speed of a request drops far below its peak and stays there, the server is
+    assumed to throttle every request after some number of bytes, and the download switches
+    to chunks that end before that point. The chunks are grown while establishing
+    the connection takes up a significant part of the time spent on each of them
+    """
+
+    MIN_CHUNK_SIZE = 256 * 1024
+    MAX_CHUNK_SIZE = 256 * 1024 * 1024
+    MIN_BLOCK_SIZE = 1024
+    MAX_BLOCK_SIZE = 4 * 1024 * 1024
+    READ_INTERVAL = 0.1  # The targeted duration of a read, in seconds
+    SMOOTHING = 0.3  # The weight of the latest read in the throughput
+    WINDOW = 0.5  # The interval over which the speed of a request is measured, in seconds
+    THROTTLE_RATIO = 0.25  # A request is throttled if its speed drops below this fraction of its peak ...
+    THROTTLE_TIME = 3  # ... for this many seconds
+    THROTTLE_MARGIN = 0.9  # The fraction of the throttling threshold used as the chunk size
+    LATENCY_RATIO = 0.1  # The chunk size is doubled if the latency takes up more than this fraction of a chunk
+
+    def __init__(self, chunk_size=None, block_size=1024):
+        self.chunk_size = chunk_size or 0
+        self.block_size = block_size
+        self.strategy = 'chunked' if chunk_size else 'single'
+        self.throughput = self.latency = self.throttled_after = None
+        self.start_request()
+
+    def start_request(self):
+        self._request_start = time.monotonic()
+        self._request_bytes = self._peak_speed = 0
+        self._window = (self._request_start, 0)
+        self._slow_since = None
+        self.latency = None
+
+    def connected(self):
+        now = time.monotonic()
+        self.latency = now - self._request_start
+        self._window = (now, 0)
+
+    def update(self, elapsed, size):
+        """Account for a read of `size` bytes, returning whether the request should be restarted in smaller chunks"""
+        self._request_bytes += size
+        if elapsed > 0:
+            rate = size / elapsed
+            self.throughput = rate if self.throughput is None else (
+                self.throughput + (rate - self.throughput) * self.SMOOTHING)
+            self.block_size = int(min(
+                max(self.throughput * self.READ_INTERVAL, self.block_size / 2, self.MIN_BLOCK_SIZE),
+                self.block_size * 2, self.MAX_BLOCK_SIZE))
+
+        now = time.monotonic()
+        window_start, window_bytes = self._window
+        if now - window_start < self.WINDOW:
+            return False
+        speed = (self._request_bytes - window_bytes) / (now - window_start)
+        self._window = (now, self._request_bytes)
+        if speed >= self._peak_speed * self.THROTTLE_RATIO:
+            self._peak_speed = max(self._peak_speed, speed)
+            self._slow_since = None
+            return False
+        self._slow_since = self._slow_since or (window_start, window_bytes)
+        if now - self._slow_since[0] < self.THROTTLE_TIME:
+            return False
+
+        self.throttled_after = self._slow_since[1]
+        self.chunk_size = max(int(self.throttled_after * self.THROTTLE_MARGIN), self.MIN_CHUNK_SIZE)
+        self.strategy = 'chunked'
+        return True
+
+    def end_request(self):
+        """Account for a chunk that has been downloaded completely"""
+        duration = time.monotonic() - self._request_start
+        if self.strategy != 'chunked' or not duration or self.latency is None:
+            return
+        if self.latency / duration > self.LATENCY_RATIO:
+            max_chunk_size = self.MAX_CHUNK_SIZE if self.throttled_after is None else max(
+                int(self.throttled_after * self.THROTTLE_MARGIN), self.MIN_CHUNK_SIZE)
+            self.chunk_size = min(self.chunk_size * 2, max(max_chunk_size, self.chunk_size))
+
+    def status(self):
+        return {
+            'strategy': self.strategy,
+            'chunk_size': self.chunk_size or None,
+            'block_size': self.block_size,
+            'throughput': self.throughput,
+            'latency': self.latency,
+            'throttled_after': self.throttled_after,
+        }
+
+
 class HttpFD(FileDownloader):
+    """
+    Downloads a file over HTTP
+
+    Instead of a filename, a writable buffer (see fragment.FragmentBuffer) can be given.
+    The data is then written directly into it and no file is touched
+
+    Available options:
+
+    http_connections:   The number of connections to use for a single file.
+                        If the server supports ranged requests, the file is split into
+                        segments of http_chunk_size (or into http_connections equal parts)
+                        that are downloaded concurrently into a preallocated .part file.
+                        The remaining byte ranges are kept in the .ytdl file
+                        (see fragment.FragmentFD) as downloader.http_segments
+                        so that the download can be resumed
+    """
+
+    _MIN_SEGMENT_SIZE = 1024 * 1024
+
     def real_download(self, filename, info_dict):
         url = info_dict['url']
         request_data = info_dict.get('request_data', None)
@@ -36,7 +169,8 @@ class DownloadContext(dict):
 
         ctx = DownloadContext()
         ctx.filename = filename
-        ctx.tmpfilename = self.temp_name(filename)
+        ctx.to_buffer = hasattr(filename, 'write')
+        ctx.tmpfilename = filename if ctx.to_buffer else self.temp_name(filename)
         ctx.stream = None
 
         # Disable compression
@@ -53,15 +187,42 @@ class DownloadContext(dict):
         ctx.block_size = self.params.get('buffersize', 1024)
         ctx.start_time = time.time()
 
+        adaptive = None
+        if chunk_size == 'auto':
+            adaptive = AdaptiveChunking(
+                info_dict.get('downloader_options', {}).get('http_chunk_size'), ctx.block_size)
+            chunk_size = adaptive.chunk_size
+
         # parse given Range
         req_start, req_end, _ = parse_http_range(headers.get('Range'))
 
-        if self.params.get('continuedl', True):
+        if self.params.get('continuedl', True) and not ctx.to_buffer:
             # Establish possible resume length
             if os.path.isfile(encodeFilename(ctx.tmpfilename)):
                 ctx.resume_len = os.path.getsize(
                     encodeFilename(ctx.tmpfilename))
 
+        # Segments are written out of order, which is impossible for stdout and named pipes
+        if ((self.params.get('http_connections') or 1) > 1 and not is_test and not ctx.to_buffer
+                and not self.is_pipe(ctx.tmpfilename) and req_start is None and req_end is None):
+            success = self._download_segmented(ctx.filename, ctx.tmpfilename, info_dict, headers, chunk_size)
+            if success is not None:
+                return success
+
+        if ctx.resume_len:
+            segments = self._read_segments_state(ctx.filename)
+            if segments is not None:
+                # The file was preallocated by a multi-connection download,
+                # so only the data before the first missing segment can be resumed
+                ctx.resume_len = min((start for start, _ in segments), default=ctx.resume_len)
+                try:
+                    with open(encodeFilename(ctx.tmpfilename), 'r+b') as stream:
+                        stream.truncate(ctx.resume_len)
+                except OSError as err:
+                    self.report_error(f'unable to open for writing: {err}')
+                    return False
+                self.try_remove(self.ytdl_filename(ctx.filename))
+
         ctx.is_resume = ctx.resume_len > 0
 
         class SucceedDownload(Exception):
@@ -75,8 +236,12 @@ class NextFragment(Exception):
             pass
 
         def establish_connection():
-            ctx.chunk_size = (random.randint(int(chunk_size * 0.95), chunk_size)
-                              if not is_test and chunk_size else chunk_size)
+            if adaptive:
+                ctx.chunk_size = adaptive.chunk_size
+                adaptive.start_request()
+            else:
+                ctx.chunk_size = (random.randint(int(chunk_size * 0.95), chunk_size)
+                                  if not is_test and chunk_size else chunk_size)
             if ctx.resume_len > 0:
                 range_start = ctx.resume_len
                 if req_start is not None:
@@ -118,6 +283,8 @@ def establish_connection():
             # Establish connection
             try:
                 ctx.data = self.ydl.urlopen(request)
+                if adaptive:
+                    adaptive.connected()
                 # When trying to resume, Content-Range HTTP header of response has to be checked
                 # to match the value of requested Range HTTP header. This is due to a webservers
                 # that don't support resuming and serve a whole file with no Content-Range
@@ -135,6 +302,7 @@ def establish_connection():
                             or content_range_end == range_end
                             or content_len < range_end):
                         ctx.content_len = content_len
+                        ctx.ranges_supported = True
                         if content_len or req_end:
                             ctx.data_len = min(content_len or req_end, req_end or content_len) - (req_start or 0)
                         return
@@ -146,6 +314,7 @@ def establish_connection():
                     ctx.resume_len = 0
                     ctx.open_mode = 'wb'
                 ctx.data_len = ctx.content_len = int_or_none(ctx.data.headers.get('Content-length', None))
+                ctx.ranges_supported = not has_range and ctx.data.headers.get('Accept-Ranges') == 'bytes'
             except HTTPError as err:
                 if err.status == 416:
                     # Unable to resume (requested range not satisfiable)
@@ -229,6 +398,7 @@ def download():
 
             byte_counter = 0 + ctx.resume_len
             block_size = ctx.block_size
+            ctx.block_buffer = ctx.block_buffer or BlockBuffer(block_size)
             start = time.time()
 
             # measure time over whole while-loop, so slow_down() and best_block_size() work together properly
@@ -237,7 +407,7 @@ def download():
 
             def retry(e):
                 close_stream()
-                if ctx.tmpfilename == '-':
+                if ctx.to_buffer or self.is_pipe(ctx.tmpfilename):
                     ctx.resume_len = byte_counter
                 else:
                     try:
@@ -249,7 +419,8 @@ def retry(e):
             while True:
                 try:
                     # Download and write
-                    data_block = ctx.data.read(block_size if not is_test else min(block_size, data_len - byte_counter))
+                    data_block = ctx.block_buffer.read(
+                        ctx.data, block_size if not is_test else min(block_size, data_len - byte_counter))
                 except TransportError as err:
                     retry(err)
 
@@ -260,7 +431,11 @@ def retry(e):
                     break
 
                 # Open destination file just in time
-                if ctx.stream is None:
+                if ctx.stream is None and ctx.to_buffer:
+                    ctx.stream = ctx.tmpfilename
+                    if ctx.open_mode == 'wb':
+                        ctx.stream.truncate(0)
+                elif ctx.stream is None:
                     try:
                         ctx.stream, ctx.tmpfilename = self.sanitize_open(
                             ctx.tmpfilename, ctx.open_mode)
@@ -285,6 +460,7 @@ def retry(e):
                     return False
 
                 # Apply rate limit
+                GLOBAL_BUDGET.bandwidth.consume(len(data_block))
                 self.slow_down(start, now, byte_counter - ctx.resume_len)
 
                 # end measuring of one loop run
@@ -292,7 +468,12 @@ def retry(e):
                 after = now
 
                 # Adjust block size
-                if not self.params.get('noresizebuffer', False):
+                restart = adaptive and adaptive.update(after - before, len(data_block))
+                if self.params.get('noresizebuffer', False):
+                    pass
+                elif adaptive:
+                    block_size = adaptive.block_size
+                else:
                     block_size = self.best_block_size(after - before, len(data_block))
 
                 before = after
@@ -304,7 +485,7 @@ def retry(e):
                 else:
                     eta = self.calc_eta(start, time.time(), ctx.data_len - ctx.resume_len, byte_counter - ctx.resume_len)
 
-                self._hook_progress({
+                progress = {
                     'status': 'downloading',
                     'downloaded_bytes': byte_counter,
                     'total_bytes': ctx.data_len,
@@ -314,11 +495,22 @@ def retry(e):
                     'speed': speed,
                     'elapsed': now - ctx.start_time,
                     'ctx_id': info_dict.get('ctx_id'),
-                }, info_dict)
+                }
+                if adaptive:
+                    progress['http_chunking'] = adaptive.status()
+                self._hook_progress(progress, info_dict)
 
                 if data_len is not None and byte_counter == data_len:
                     break
 
+                if restart and ctx.ranges_supported and not is_test and ctx.content_len is not None:
+                    self.write_debug(
+                        f'Download is throttled after {adaptive.throttled_after} bytes per request; '
+                        f'continuing in chunks of {adaptive.chunk_size} bytes')
+                    ctx.data.close()
+                    ctx.resume_len = byte_counter
+                    raise NextFragment
+
                 if speed and speed < (self.params.get('throttledratelimit') or 0):
                     # The speed must stay below the limit for 3 seconds
                     # This prevents raising error when the speed temporarily goes down
@@ -337,6 +529,8 @@ def retry(e):
                 return False
 
             if not is_test and ctx.chunk_size and ctx.content_len is not None and byte_counter < ctx.content_len:
+                if adaptive:
+                    adaptive.end_request()
                 ctx.resume_len = byte_counter
                 raise NextFragment
 
@@ -350,7 +544,9 @@ def retry(e):
             self.try_rename(ctx.tmpfilename, ctx.filename)
 
             # Update file modification time
-            if self.params.get('updatetime', True):
+            if ctx.to_buffer:
+                info_dict['filetime'] = timeconvert(ctx.data.headers.get('last-modified', None))
+            elif self.params.get('updatetime', True):
                 info_dict['filetime'] = self.try_utime(ctx.filename, ctx.data.headers.get('last-modified', None))
 
             self._hook_progress({
@@ -364,10 +560,12 @@ def retry(e):
 
             return True
 
+        host = urllib.parse.urlparse(url).hostname
         for retry in RetryManager(self.params.get('retries'), self.report_retry):
             try:
-                establish_connection()
-                return download()
+                with GLOBAL_BUDGET.connections.connection(host):
+                    establish_connection()
+                    return download()
             except RetryDownload as err:
                 retry.error = err.source_error
                 continue
@@ -381,3 +579,192 @@ def retry(e):
                 close_stream()
                 raise
         return False
+
+    def _read_segments_state(self, filename, total=None):
+        try:
+            with open(encodeFilename(self.ytdl_filename(filename)), encoding='utf-8') as f:
+                state = json.load(f)['downloader']['http_segments']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if total is not None and state.get('total') != total:
+            return None
+        return [list(segment) for segment in state['segments']]
+
+    def _write_segments_state(self, filename, total, segments):
+        if self.params.get('_no_ytdl_file'):
+            return
+        stream, _ = self.sanitize_open(self.ytdl_filename(filename), 'w')
+        with stream:
+            stream.write(json.dumps({'downloader': {'http_segments': {
+                'total': total,
+                'segments': [segment for segment in segments if segment[0] < segment[1]],
+            }}}))
+
+    def _download_segmented(self, filename, tmpfilename, info_dict, headers, chunk_size):
+        """
+        Download the file in byte ranges over several connections at once
+
+        Returns None if the server does not support ranged requests,
+        in which case the file should be downloaded sequentially instead
+        """
+        url, request_data = info_dict['url'], info_dict.get('request_data')
+        host = urllib.parse.urlparse(url).hostname
+        start_time = time.time()
+
+        def make_request(start, end):
+            return Request(url, request_data, HTTPHeaderDict(headers, {'Range': f'bytes={start}-{end}'}))
+
+        try:
+            with GLOBAL_BUDGET.connections.connection(host), self.ydl.urlopen(make_request(0, 0)) as probe:
+                range_start, _, total = parse_http_range(probe.headers.get('Content-Range'))
+                if probe.status != 206 or range_start != 0 or not total or probe.headers.get('Content-Encoding'):
+                    return None
+                last_modified = probe.headers.get('Last-Modified')
+        except CertificateVerifyError:
+            raise
+        except (HTTPError, TransportError):
+            # Leave the error handling to the sequential download
+            return None
+
+        min_data_len = self.params.get('min_filesize')
+        max_data_len = self.params.get('max_filesize')
+        if min_data_len is not None and total < min_data_len:
+            self.to_screen(
+                f'\r[download] File is smaller than min-filesize ({total} bytes < {min_data_len} bytes). Aborting.')
+            return False
+        if max_data_len is not None and total > max_data_len:
+            self.to_screen(
+                f'\r[download] File is larger than max-filesize ({total} bytes > {max_data_len} bytes). Aborting.')
+            return False
+
+        segments, resume_len = None, 0
+        if self.params.get('continuedl', True) and os.path.isfile(encodeFilename(tmpfilename)):
+            size = os.path.getsize(encodeFilename(tmpfilename))
+            if size == total:
+                segments = self._read_segments_state(filename, total)
+            elif size < total:
+                # The data of a partial sequential download is kept
+                resume_len = size
+
+        if segments is None:
+            connections = self.params['http_connections']
+            segment_size = chunk_size or max(math.ceil((total - resume_len) / connections), self._MIN_SEGMENT_SIZE)
+            segments = [[start, min(start + segment_size, total)] for start in range(resume_len, total, segment_size)]
+            if len(segments) < 2:
+                return None
+        else:
+            resume_len = total - sum(end - start for start, end in segments)
+
+        if resume_len:
+            self.report_resuming_byte(resume_len)
+        try:
+            stream, tmpfilename = self.sanitize_open(tmpfilename, 'ab' if resume_len else 'wb')
+            with stream:
+                stream.truncate(total)
+        except OSError as err:
+            self.report_error(f'unable to open for writing: {err}')
+            return False
+        filename = self.undo_temp_name(tmpfilename)
+        self.report_destination(filename)
+        self._write_segments_state(filename, total, segments)
+
+        if self.params.get('xattr_set_filesize', False):
+            try:
+                write_xattr(tmpfilename, 'user.ytdl.filesize', str(total).encode())
+            except (XAttrUnavailableError, XAttrMetadataError) as err:
+                self.report_error(f'unable to set filesize xattr: {err}')
+
+        lock, abort = threading.Lock(), threading.Event()
+        progress = {'downloaded': resume_len, 'saved_at': time.monotonic()}
+
+        def report_progress():
+            now = time.time()
+            speed = self.calc_speed(start_time, now, progress['downloaded'] - resume_len)
+            self._hook_progress({
+                'status': 'downloading',
+                'downloaded_bytes': progress['downloaded'],
+                'total_bytes': total,
+                'tmpfilename': tmpfilename,
+                'filename': filename,
+                'eta': self.calc_eta(start_time, now, total - resume_len, progress['downloaded'] - resume_len),
+                'speed': speed,
+                'elapsed': now - start_time,
+                'ctx_id': info_dict.get('ctx_id'),
+            }, info_dict)
+            if time.monotonic() - progress['saved_at'] > 1:
+                progress['saved_at'] = time.monotonic()
+                self._write_segments_state(filename, total, segments)
+
+        def download_segment(segment):
+            block_size = self.params.get('buffersize', 1024)
+            block_buffer = BlockBuffer(block_size)
+            for retry in RetryManager(self.params.get('retries'), self.report_retry):
+                if abort.is_set():
+                    return False
+                try:
+                    with GLOBAL_BUDGET.connections.connection(host), \
+                            self.ydl.urlopen(make_request(segment[0], segment[1] - 1)) as data, \
+                            open(encodeFilename(tmpfilename), 'r+b') as stream:
+                        if parse_http_range(data.headers.get('Content-Range'))[0] != segment[0]:
+                            raise TransportError(f'Server ignored the requested range starting at byte {segment[0]}')
+                        stream.seek(segment[0])
+                        while segment[0] < segment[1]:
+                            if abort.is_set():
+                                return False
+                            before = time.time()
+                            data_block = block_buffer.read(data, min(block_size, segment[1] - segment[0]))
+                            if not data_block:
+                                raise ContentTooShortError(segment[0], segment[1])
+                            stream.write(data_block)
+                            with lock:
+                                segment[0] += len(data_block)
+                                progress['downloaded'] += len(data_block)
+                                report_progress()
+                            GLOBAL_BUDGET.bandwidth.consume(len(data_block))
+                            self.slow_down(start_time, None, progress['downloaded'] - resume_len)
+                            if not self.params.get('noresizebuffer', False):
+                                block_size = self.best_block_size(time.time() - before, len(data_block))
+                    return True
+                except HTTPError as err:
+                    if err.status < 500 or err.status >= 600:
+                        raise
+                    retry.error = err
+                except (TransportError, ContentTooShortError) as err:
+                    retry.error = err
+            return False
+
+        # The segments are split ahead of time, so the pool's queue balances them between the connections
+        success = True
+        pool = concurrent.futures.ThreadPoolExecutor(self.params['http_connections'])
+        futures = [pool.submit(download_segment, segment) for segment in segments]
+        try:
+            for future in futures:
+                if not future.result():
+                    success = False
+                    abort.set()
+        except BaseException:
+            abort.set()
+            raise
+        finally:
+            for future in futures:
+                future.cancel()
+            pool.shutdown(wait=True)
+            self._write_segments_state(filename, total, segments)
+
+        if not success:
+            return False
+
+        self.try_remove(self.ytdl_filename(filename))
+        self.try_rename(tmpfilename, filename)
+        if self.params.get('updatetime', True):
+            info_dict['filetime'] = self.try_utime(filename, last_modified)
+
+        self._hook_progress({
+            'downloaded_bytes': total,
+            'total_bytes': total,
+            'filename': filename,
+            'status': 'finished',
+            'elapsed': time.time() - start_time,
+            'ctx_id': info_dict.get('ctx_id'),
+        }, info_dict)
+        return True
@@ -0,0 +1,125 @@
+import collections
+import contextlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+import urllib.parse
+
+from . import get_suitable_downloader
+from .common import FileDownloader
+from ..networking.budget import GLOBAL_BUDGET
+from ..postprocessor.ffmpeg import FFmpegMergerPP, FFmpegPostProcessorError
+from ..utils import encodeFilename, prepend_extension
+
+
+class StreamMergeFD(FileDownloader):
+    """
+    Downloads the requested formats with the native downloaders and merges them with ffmpeg
+    while they are being downloaded
+
+    Each format is written to a named pipe that ffmpeg reads from,
+    so the formats are never stored on disk separately
+    """
+
+    @classmethod
+    def can_merge_formats(cls, info_dict, params):
+        return (
+            params.get('stream_merge')
+            and hasattr(os, 'mkfifo')
+            and len(info_dict.get('requested_formats') or []) > 1
+            and not info_dict.get('to_stdout')
+            and not info_dict.get('is_live')
+            and not (info_dict.get('section_start') or info_dict.get('section_end'))
+            and not params.get('allow_unplayable_formats')
+            # The formats are not kept as separate files
+            and not params.get('keepvideo')
+            and not cls._serializes_formats(info_dict['requested_formats'])
+            and FFmpegMergerPP().available)
+
+    @staticmethod
+    def _serializes_formats(formats):
+        """Whether the connection limit would make the formats wait for each other, which deadlocks ffmpeg"""
+        limit = GLOBAL_BUDGET.connections_per_host
+        if not limit:
+            return False
+        hosts = collections.Counter(
+            urllib.parse.urlparse(fmt.get('fragment_base_url') or fmt.get('url') or '').hostname for fmt in formats)
+        return max(hosts.values()) > limit
+
+    def real_download(self, filename, info_dict):
+        self.report_destination(filename)
+        formats = info_dict['requested_formats']
+        tmpdir = tempfile.mkdtemp(prefix='yt-dlp-merge-')
+        pipes = [os.path.join(tmpdir, f'f{fmt["format_id"]}.{fmt["ext"]}') for fmt in formats]
+
+        threads, results, errors, killed = [], [None] * len(formats), [], []
+
+        def download(i, proc):
+            pipe = pipes[i]
+            new_info = dict(info_dict)
+            del new_info['requested_formats']
+            new_info.update(formats[i])
+            # DashSegmentsFD would write to it instead
+            new_info.pop('filepath', None)
+            try:
+                fd = get_suitable_downloader(new_info, self.params)(self.ydl, self.params)
+                for ph in self._progress_hooks:
+                    fd.add_progress_hook(ph)
+                # Holding the pipe open lets the downloader reopen it when retrying,
+                # without ffmpeg seeing the end of the input
+                keep_open = os.open(pipe, os.O_WRONLY)
+                try:
+                    results[i] = fd.real_download(pipe, new_info)
+                finally:
+                    os.close(keep_open)
+            except BaseException as e:
+                errors.append(e)
+            if not results[i] and proc.poll() is None:
+                # The merged file would be incomplete
+                killed.append(i)
+                proc.kill()
+
+        def on_process_started(proc):
+            for i in range(len(formats)):
+                thread = threading.Thread(target=download, args=(i, proc), daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        started, merge_error = time.time(), None
+        try:
+            for pipe in pipes:
+                os.mkfifo(pipe)
+            FFmpegMergerPP(self.ydl).merge(formats, pipes, filename, on_process_started=on_process_started)
+        except FFmpegPostProcessorError as e:
+            merge_error = e
+        finally:
+            # The downloads that are still waiting for ffmpeg to open their pipe fail to write to it instead
+            while any(thread.is_alive() for thread in threads):
+                for pipe in pipes:
+                    with contextlib.suppress(OSError):
+                        os.close(os.open(pipe, os.O_RDONLY | os.O_NONBLOCK))
+                for thread in threads:
+                    thread.join(0.1)
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+        if errors or merge_error or not all(results):
+            self.try_remove(prepend_extension(filename, 'temp'))
+        if merge_error and not killed:
+            self.report_error(f'Unable to merge the formats: {merge_error}')
+            return False
+        elif errors:
+            raise errors[0]
+        elif not all(results):
+            return False
+
+        fsize = os.path.getsize(encodeFilename(filename))
+        self._hook_progress({
+            'downloaded_bytes': fsize,
+            'total_bytes': fsize,
+            'filename': filename,
+            'status': 'finished',
+            'elapsed': time.time() - started,
+        }, info_dict)
+        return True
@@ -1,4 +1,3 @@
-import asyncio
 import contextlib
 import os
 import signal
@@ -6,7 +5,6 @@
 
 from .common import FileDownloader
 from .external import FFmpegFD
-from ..dependencies import websockets
 
 
 class FFmpegSinkFD(FileDownloader):
@@ -33,6 +31,8 @@ def get_basename(cls):
                 return FFmpegFD.get_basename()
 
             def on_process_started(self, proc, stdin):
+                import asyncio
+
                 thread = threading.Thread(target=asyncio.run, daemon=True, args=(call_conn(proc, stdin), ))
                 thread.start()
 
@@ -45,6 +45,8 @@ async def real_connection(self, sink, info_dict):
 
 class WebSocketFragmentFD(FFmpegSinkFD):
     async def real_connection(self, sink, info_dict):
+        from ..dependencies import websockets
+
         async with websockets.connect(info_dict['url'], extra_headers=info_dict.get('http_headers', {})) as ws:
             while True:
                 recv = await ws.recv()
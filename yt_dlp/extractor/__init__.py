@@ -35,6 +35,35 @@ def list_extractors(age_limit=None):
     return [ie() for ie in list_extractor_classes(age_limit)]
 
 
+def url_index_candidates(url):
+    """
+    Return the keys of the indexed extractors that may be suitable for the URL,
+    or None if the index cannot be used. See is_url_indexed
+    """
+    from .extractors import _URL_INDEX
+
+    if not _URL_INDEX or not url.isascii():
+        return None
+    size, index, _ = _URL_INDEX
+    url = url.lower()
+    return {ie_key for i in range(len(url) - size + 1) for ie_key in index.get(url[i:i + size], ())}
+
+
+def is_url_indexed(ie):
+    """Whether the URL index applies to the extractor (class or instance)"""
+    from . import extractors
+
+    ie_key = ie.ie_key()
+    if not extractors._URL_INDEX or ie_key not in extractors._URL_INDEX[2]:
+        return False
+    cls = ie if isinstance(ie, type) else type(ie)
+    if 'PLUGIN_NAME' in cls.__dict__:
+        return False
+    indexed_ie = getattr(extractors, f'{ie_key}IE', None)
+    # An instance of a lazy extractor is an instance of its real class
+    return cls is indexed_ie or cls is getattr(indexed_ie, '__dict__', {}).get('_real_class')
+
+
 def get_info_extractor(ie_name):
     """Returns the info extractor class with the given ie_name"""
     from . import extractors
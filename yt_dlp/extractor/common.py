@@ -22,6 +22,7 @@
 import urllib.request
 import xml.etree.ElementTree
 
+from .. import m3u8
 from ..compat import (
     compat_etree_fromstring,
     compat_expanduser,
@@ -75,7 +76,6 @@
     parse_codecs,
     parse_duration,
     parse_iso8601,
-    parse_m3u8_attributes,
     parse_resolution,
     sanitize_filename,
     sanitize_url,
@@ -255,6 +255,10 @@ class InfoExtractor:
                                  * http_chunk_size Chunk size for HTTP downloads
                                  * ffmpeg_args     Extra arguments for ffmpeg downloader (input)
                                  * ffmpeg_args_out Extra arguments for ffmpeg downloader (output)
+                                 * hls_keeps_history Whether the HLS media playlist keeps all
+                                                     its segments while it is live, e.g. since it
+                                                     is an EVENT playlist. Such live formats can be
+                                                     downloaded from the start by the native downloader
                     * is_dash_periods  Whether the format is a result of merging
                                  multiple DASH periods.
                     RTMP formats can also have the additional fields: page_url,
@@ -2063,13 +2067,14 @@ def _parse_m3u8_formats_and_subtitles(
             video_id=None):
         formats, subtitles = [], {}
         has_drm = HlsFD._has_drm(m3u8_doc)
+        playlist = m3u8.Playlist(m3u8_doc)
 
         def format_url(url):
             return url if re.match(r'^https?://', url) else urllib.parse.urljoin(m3u8_url, url)
 
         if self.get_param('hls_split_discontinuity', False):
-            def _extract_m3u8_playlist_indices(manifest_url=None, m3u8_doc=None):
-                if not m3u8_doc:
+            def _extract_m3u8_playlist_indices(manifest_url=None, playlist=None):
+                if not playlist:
                     if not manifest_url:
                         return []
                     m3u8_doc = self._download_webpage(
@@ -2077,7 +2082,8 @@ def _extract_m3u8_playlist_indices(manifest_url=None, m3u8_doc=None):
                         note=False, errnote='Failed to download m3u8 playlist information')
                     if m3u8_doc is False:
                         return []
-                return range(1 + sum(line.startswith('#EXT-X-DISCONTINUITY') for line in m3u8_doc.splitlines()))
+                    playlist = m3u8.Playlist(m3u8_doc)
+                return range(playlist.discontinuity_sequence, playlist.discontinuity + 1)
 
         else:
             def _extract_m3u8_playlist_indices(*args, **kwargs):
@@ -2099,7 +2105,7 @@ def _extract_m3u8_playlist_indices(*args, **kwargs):
         # media playlist and MUST NOT appear in master playlist thus we can
         # clearly detect media playlist with this criterion.
 
-        if '#EXT-X-TARGETDURATION' in m3u8_doc:  # media playlist, return as is
+        if playlist.target_duration is not None:  # media playlist, return as is
             formats = [{
                 'format_id': join_nonempty(m3u8_id, idx),
                 'format_index': idx,
@@ -2109,15 +2115,15 @@ def _extract_m3u8_playlist_indices(*args, **kwargs):
                 'preference': preference,
                 'quality': quality,
                 'has_drm': has_drm,
-            } for idx in _extract_m3u8_playlist_indices(m3u8_doc=m3u8_doc)]
+                # Segments are only ever appended to EVENT playlists
+                **({'downloader_options': {'hls_keeps_history': True}} if playlist.playlist_type == 'EVENT' else {}),
+            } for idx in _extract_m3u8_playlist_indices(playlist=playlist)]
 
             return formats, subtitles
 
         groups = {}
-        last_stream_inf = {}
 
-        def extract_media(x_media_line):
-            media = parse_m3u8_attributes(x_media_line)
+        def extract_media(media):
             # As per [1, 4.3.4.1] TYPE, GROUP-ID and NAME are REQUIRED
             media_type, group_id, name = media.get('TYPE'), media.get('GROUP-ID'), media.get('NAME')
             if not (media_type and group_id and name):
@@ -2186,98 +2192,92 @@ def build_stream_name():
         # parse EXT-X-MEDIA tags before EXT-X-STREAM-INF in order to have the
         # chance to detect video only formats when EXT-X-STREAM-INF tags
         # precede EXT-X-MEDIA tags in HLS manifest such as [3].
-        for line in m3u8_doc.splitlines():
-            if line.startswith('#EXT-X-MEDIA:'):
-                extract_media(line)
-
-        for line in m3u8_doc.splitlines():
-            if line.startswith('#EXT-X-STREAM-INF:'):
-                last_stream_inf = parse_m3u8_attributes(line)
-            elif line.startswith('#') or not line.strip():
-                continue
-            else:
-                tbr = float_or_none(
-                    last_stream_inf.get('AVERAGE-BANDWIDTH')
-                    or last_stream_inf.get('BANDWIDTH'), scale=1000)
-                manifest_url = format_url(line.strip())
-
-                for idx in _extract_m3u8_playlist_indices(manifest_url):
-                    format_id = [m3u8_id, None, idx]
-                    # Bandwidth of live streams may differ over time thus making
-                    # format_id unpredictable. So it's better to keep provided
-                    # format_id intact.
-                    if not live:
-                        stream_name = build_stream_name()
-                        format_id[1] = stream_name or '%d' % (tbr or len(formats))
-                    f = {
-                        'format_id': join_nonempty(*format_id),
-                        'format_index': idx,
-                        'url': manifest_url,
-                        'manifest_url': m3u8_url,
-                        'tbr': tbr,
-                        'ext': ext,
-                        'fps': float_or_none(last_stream_inf.get('FRAME-RATE')),
-                        'protocol': entry_protocol,
-                        'preference': preference,
-                        'quality': quality,
-                        'has_drm': has_drm,
-                    }
+        for media in playlist.media:
+            extract_media(media)
+
+        for variant in playlist.variants:
+            last_stream_inf = variant.stream_inf
+            tbr = float_or_none(
+                last_stream_inf.get('AVERAGE-BANDWIDTH')
+                or last_stream_inf.get('BANDWIDTH'), scale=1000)
+            manifest_url = format_url(variant.uri)
+
+            for idx in _extract_m3u8_playlist_indices(manifest_url):
+                format_id = [m3u8_id, None, idx]
+                # Bandwidth of live streams may differ over time thus making
+                # format_id unpredictable. So it's better to keep provided
+                # format_id intact.
+                if not live:
+                    stream_name = build_stream_name()
+                    format_id[1] = stream_name or '%d' % (tbr or len(formats))
+                f = {
+                    'format_id': join_nonempty(*format_id),
+                    'format_index': idx,
+                    'url': manifest_url,
+                    'manifest_url': m3u8_url,
+                    'tbr': tbr,
+                    'ext': ext,
+                    'fps': float_or_none(last_stream_inf.get('FRAME-RATE')),
+                    'protocol': entry_protocol,
+                    'preference': preference,
+                    'quality': quality,
+                    'has_drm': has_drm,
+                }
 
-                    # YouTube-specific
-                    if yt_audio_content_id := last_stream_inf.get('YT-EXT-AUDIO-CONTENT-ID'):
-                        f['language'] = yt_audio_content_id.split('.')[0]
-
-                    resolution = last_stream_inf.get('RESOLUTION')
-                    if resolution:
-                        mobj = re.search(r'(?P<width>\d+)[xX](?P<height>\d+)', resolution)
-                        if mobj:
-                            f['width'] = int(mobj.group('width'))
-                            f['height'] = int(mobj.group('height'))
-                    # Unified Streaming Platform
-                    mobj = re.search(
-                        r'audio.*?(?:%3D|=)(\d+)(?:-video.*?(?:%3D|=)(\d+))?', f['url'])
+                # YouTube-specific
+                if yt_audio_content_id := last_stream_inf.get('YT-EXT-AUDIO-CONTENT-ID'):
+                    f['language'] = yt_audio_content_id.split('.')[0]
+
+                resolution = last_stream_inf.get('RESOLUTION')
+                if resolution:
+                    mobj = re.search(r'(?P<width>\d+)[xX](?P<height>\d+)', resolution)
                     if mobj:
-                        abr, vbr = mobj.groups()
-                        abr, vbr = float_or_none(abr, 1000), float_or_none(vbr, 1000)
-                        f.update({
-                            'vbr': vbr,
-                            'abr': abr,
-                        })
-                    codecs = parse_codecs(last_stream_inf.get('CODECS'))
-                    f.update(codecs)
-                    audio_group_id = last_stream_inf.get('AUDIO')
-                    # As per [1, 4.3.4.1.1] any EXT-X-STREAM-INF tag which
-                    # references a rendition group MUST have a CODECS attribute.
-                    # However, this is not always respected. E.g. [2]
-                    # contains EXT-X-STREAM-INF tag which references AUDIO
-                    # rendition group but does not have CODECS and despite
-                    # referencing an audio group it represents a complete
-                    # (with audio and video) format. So, for such cases we will
-                    # ignore references to rendition groups and treat them
-                    # as complete formats.
-                    if audio_group_id and codecs and f.get('vcodec') != 'none':
-                        audio_group = groups.get(audio_group_id)
-                        if audio_group and audio_group[0].get('URI'):
-                            # TODO: update acodec for audio only formats with
-                            # the same GROUP-ID
-                            f['acodec'] = 'none'
-                    if not f.get('ext'):
-                        f['ext'] = 'm4a' if f.get('vcodec') == 'none' else 'mp4'
-                    formats.append(f)
-
-                    # for DailyMotion
-                    progressive_uri = last_stream_inf.get('PROGRESSIVE-URI')
-                    if progressive_uri:
-                        http_f = f.copy()
-                        del http_f['manifest_url']
-                        http_f.update({
-                            'format_id': f['format_id'].replace('hls-', 'http-'),
-                            'protocol': 'http',
-                            'url': progressive_uri,
-                        })
-                        formats.append(http_f)
+                        f['width'] = int(mobj.group('width'))
+                        f['height'] = int(mobj.group('height'))
+                # Unified Streaming Platform
+                mobj = re.search(
+                    r'audio.*?(?:%3D|=)(\d+)(?:-video.*?(?:%3D|=)(\d+))?', f['url'])
+                if mobj:
+                    abr, vbr = mobj.groups()
+                    abr, vbr = float_or_none(abr, 1000), float_or_none(vbr, 1000)
+                    f.update({
+                        'vbr': vbr,
+                        'abr': abr,
+                    })
+                codecs = parse_codecs(last_stream_inf.get('CODECS'))
+                f.update(codecs)
+                audio_group_id = last_stream_inf.get('AUDIO')
+                # As per [1, 4.3.4.1.1] any EXT-X-STREAM-INF tag which
+                # references a rendition group MUST have a CODECS attribute.
+                # However, this is not always respected. E.g. [2]
+                # contains EXT-X-STREAM-INF tag which references AUDIO
+                # rendition group but does not have CODECS and despite
+                # referencing an audio group it represents a complete
+                # (with audio and video) format. So, for such cases we will
+                # ignore references to rendition groups and treat them
+                # as complete formats.
+                if audio_group_id and codecs and f.get('vcodec') != 'none':
+                    audio_group = groups.get(audio_group_id)
+                    if audio_group and audio_group[0].get('URI'):
+                        # TODO: update acodec for audio only formats with
+                        # the same GROUP-ID
+                        f['acodec'] = 'none'
+                if not f.get('ext'):
+                    f['ext'] = 'm4a' if f.get('vcodec') == 'none' else 'mp4'
+                formats.append(f)
+
+                # for DailyMotion
+                progressive_uri = last_stream_inf.get('PROGRESSIVE-URI')
+                if progressive_uri:
+                    http_f = f.copy()
+                    del http_f['manifest_url']
+                    http_f.update({
+                        'format_id': f['format_id'].replace('hls-', 'http-'),
+                        'protocol': 'http',
+                        'url': progressive_uri,
+                    })
+                    formats.append(http_f)
 
-                last_stream_inf = {}
         return formats, subtitles
 
     def _extract_m3u8_vod_duration(
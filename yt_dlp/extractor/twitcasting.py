@@ -3,7 +3,6 @@
 import re
 
 from .common import InfoExtractor
-from ..dependencies import websockets
 from ..utils import (
     ExtractorError,
     UserNotLive,
@@ -183,6 +182,8 @@ def find_dmu(x):
                     note='Downloading source quality m3u8',
                     headers=self._M3U8_HEADERS, fatal=False))
 
+            from ..dependencies import websockets
+
             if websockets:
                 qq = qualities(['base', 'mobilesource', 'main'])
                 streams = traverse_obj(stream_server_data, ('llfmp4', 'streams')) or {}
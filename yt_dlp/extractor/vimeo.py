@@ -1217,8 +1217,9 @@ def _real_extract(self, url):
                 if isinstance(e.cause, HTTPError) and e.cause.status == 401:
                     raise ExtractorError('Wrong password', expected=True)
                 raise
+        # The pages are independent API requests, so the next ones are fetched in the background
         entries = OnDemandPagedList(functools.partial(
-            self._fetch_page, album_id, jwt, hashed_pass), self._PAGE_SIZE)
+            self._fetch_page, album_id, jwt, hashed_pass), self._PAGE_SIZE, prefetch=2)
         return self.playlist_result(
             entries, album_id, album.get('name'), album.get('description'))
 
@@ -28,6 +28,7 @@
     ExtractorError,
     LazyList,
     UserNotLive,
+    base_url,
     bug_reports_message,
     classproperty,
     clean_html,
@@ -67,6 +68,7 @@
     urljoin,
     variadic,
 )
+from ..utils.networking import conditional_headers
 
 STREAMING_DATA_CLIENT_NAME = '__yt_dlp_client'
 # any clients starting with _ cannot be explicitly requested by the user
@@ -1184,6 +1186,7 @@ class YoutubeIE(YoutubeBaseInfoExtractor):
         r'/(?P<id>[a-zA-Z0-9_-]{8,})/player(?:_ias\.vflset(?:/[a-zA-Z]{2,3}_[a-zA-Z]{2,3})?|-plasma-ias-(?:phone|tablet)-[a-z]{2}_[A-Z]{2}\.vflset)/base\.js$',
         r'\b(?P<id>vfl[a-zA-Z0-9_-]+)\b.*?\.js$',
     )
+    _NSIG_RESULTS_CACHE_SIZE = 1000  # Per player
     _formats = {  # NB: Used in YoutubeWebArchiveIE and GoogleDriveIE
         '5': {'ext': 'flv', 'width': 400, 'height': 240, 'acodec': 'mp3', 'abr': 64, 'vcodec': 'h263'},
         '6': {'ext': 'flv', 'width': 450, 'height': 270, 'acodec': 'mp3', 'abr': 64, 'vcodec': 'h263'},
@@ -2785,6 +2788,7 @@ def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._code_cache = {}
         self._player_cache = {}
+        self._nsig_results = {}
 
     def _prepare_live_from_start_formats(self, formats, video_id, live_start_time, url, webpage_url, smuggled_data, is_live):
         lock = threading.Lock()
@@ -2851,6 +2855,30 @@ def _live_dash_fragments(self, video_id, format_id, live_start_time, mpd_feed, m
 
         known_idx, no_fragment_score, last_segment_url = begin_index, 0, None
         fragments, fragment_base_url = None, None
+        # The url, response headers and formats of the last MPD, to only parse it again when it changes
+        last_mpd = None
+
+        def _refresh_mpd_formats():
+            nonlocal last_mpd
+            conditions = conditional_headers(last_mpd[1]) if last_mpd and last_mpd[0] == mpd_url else {}
+            try:
+                res = self._download_webpage_handle(
+                    mpd_url, None, note=False, errnote=False, fatal=False,
+                    headers=conditions, expected_status=304 if conditions else None)
+            except ExtractorError:
+                res = False
+            if not res:
+                return None
+            mpd_doc, urlh = res
+            if urlh.status == 304:
+                return last_mpd[2]
+            mpd_doc = self._parse_xml(mpd_doc, None, fatal=False, errnote=False)
+            if mpd_doc is None:
+                return None
+            fmts, _ = self._parse_mpd_formats_and_subtitles(
+                mpd_doc, mpd_base_url=base_url(urlh.url), mpd_url=urlh.url)
+            last_mpd = (mpd_url, urlh.headers, fmts)
+            return fmts
 
         def _extract_sequence_from_mpd(refresh_sequence, immediate):
             nonlocal mpd_url, stream_number, is_live, no_fragment_score, fragments, fragment_base_url
@@ -2868,11 +2896,7 @@ def _extract_sequence_from_mpd(refresh_sequence, immediate):
             if manifestless_orig_fmt:
                 fmt_info = manifestless_orig_fmt
             else:
-                try:
-                    fmts, _ = self._extract_mpd_formats_and_subtitles(
-                        mpd_url, None, note=False, errnote=False, fatal=False)
-                except ExtractorError:
-                    fmts = None
+                fmts = _refresh_mpd_formats()
                 if not fmts:
                     no_fragment_score += 2
                     return False, last_seq
@@ -3100,11 +3124,18 @@ def _decrypt_nsig(self, s, video_id, player_url):
             raise ExtractorError('Cannot decrypt nsig without player_url')
         player_url = urljoin('https://www.youtube.com', player_url)
 
+        print_sig_code = self.get_param('youtube_print_sig_code')
+        nsig_results = self._load_nsig_results(self._extract_player_info(player_url))
+        if s in nsig_results and not print_sig_code:
+            ret = nsig_results[s] = nsig_results.pop(s)
+            self.write_debug(f'Decrypted nsig {s} => {ret} (cached)')
+            return ret
+
         try:
             jsi, player_id, func_code = self._extract_n_function_code(video_id, player_url)
         except ExtractorError as e:
             raise ExtractorError('Unable to extract nsig function code', cause=e)
-        if self.get_param('youtube_print_sig_code'):
+        if print_sig_code:
             self.to_screen(f'Extracted nsig function from {player_id}:\n{func_code[1]}\n')
 
         try:
@@ -3126,8 +3157,23 @@ def _decrypt_nsig(self, s, video_id, player_url):
                 video_id=video_id, note='Executing signature code').strip()
 
         self.write_debug(f'Decrypted nsig {s} => {ret}')
+        self._store_nsig_result(player_id, s, ret)
         return ret
 
+    def _load_nsig_results(self, player_id):
+        if player_id not in self._nsig_results:
+            self._nsig_results[player_id] = self.cache.load(
+                'youtube-nsig-results', player_id, min_ver='2024.07.09') or {}
+        return self._nsig_results[player_id]
+
+    def _store_nsig_result(self, player_id, s, ret):
+        """Remember the result across runs; only the most recently used results are kept"""
+        nsig_results = self._load_nsig_results(player_id)
+        nsig_results[s] = ret
+        for n in list(itertools.islice(nsig_results, max(len(nsig_results) - self._NSIG_RESULTS_CACHE_SIZE, 0))):
+            del nsig_results[n]
+        self.cache.store('youtube-nsig-results', player_id, nsig_results)
+
     def _extract_n_function_name(self, jscode):
         funcname, idx = self._search_regex(
             r'''(?x)(?:\.get\("n"\)\)&&\(b=|b=String\.fromCharCode\(110\),c=a\.get\(b\)\)&&\(c=)
@@ -1,5 +1,6 @@
 import collections
 import contextlib
+import functools
 import itertools
 import json
 import math
@@ -134,6 +135,22 @@ def _js_ternary(cndn, if_true=True, if_false=False):
 _MATCHING_PARENS = dict(zip(*zip('()', '{}', '[]')))
 _QUOTES = '\'"/'
 
+# The set of operators is fixed, so the pattern only has to be built once
+_EXPRESSION_RE = re.compile(fr'''(?x)
+    (?P<assign>
+        (?P<out>{_NAME_RE})(?:\[(?P<index>[^\]]+?)\])?\s*
+        (?P<op>{"|".join(map(re.escape, set(_OPERATORS) - _COMP_OPERATORS))})?
+        =(?!=)(?P<expr>.*)$
+    )|(?P<return>
+        (?!if|return|true|false|null|undefined|NaN)(?P<name>{_NAME_RE})$
+    )|(?P<indexing>
+        (?P<in>{_NAME_RE})\[(?P<idx>.+)\]$
+    )|(?P<attribute>
+        (?P<var>{_NAME_RE})(?:(?P<nullish>\?)?\.(?P<member>[^(]+)|\[(?P<member2>[^\]]+)\])\s*
+    )|(?P<function>
+        (?P<fname>{_NAME_RE})\((?P<args>.*)\)$
+    )''')
+
 
 class JS_Undefined:
     pass
@@ -241,11 +258,22 @@ def _regex_flags(cls, expr):
             flags |= cls._RE_FLAGS[ch]
         return flags, expr[idx + 1:]
 
-    @staticmethod
-    def _separate(expr, delim=',', max_split=None):
-        OP_CHARS = '+-*/%&|^=<>!,;{}:['
+    # Longer expressions, like the rest of the player code in extract_function_code, are not cached,
+    # since the cache would keep them alive for the life of the process
+    _MAX_CACHED_SPLIT_LENGTH = 4096
+
+    @classmethod
+    def _separate(cls, expr, delim=',', max_split=None):
         if not expr:
             return
+        split = cls._split_cached if len(expr) <= cls._MAX_CACHED_SPLIT_LENGTH else cls._split
+        yield from split(expr, delim, max_split)
+
+    @staticmethod
+    def _split(expr, delim, max_split):
+        """The parts of expr separated by delim, as yielded by _separate"""
+        OP_CHARS = '+-*/%&|^=<>!,;{}:['
+        parts = []
         counters = {k: 0 for k in _MATCHING_PARENS.values()}
         start, splits, pos, delim_len = 0, 0, 0, len(delim) - 1
         in_quote, escaping, after_op, in_regex_char_group = None, False, True, False
@@ -273,12 +301,17 @@ def _separate(expr, delim=',', max_split=None):
             elif pos != delim_len:
                 pos += 1
                 continue
-            yield expr[start: idx - delim_len]
+            parts.append(expr[start: idx - delim_len])
             start, pos = idx + 1, 0
             splits += 1
             if max_split and splits >= max_split:
                 break
-        yield expr[start:]
+        parts.append(expr[start:])
+        return tuple(parts)
+
+    # Statements are re-interpreted from source every time they are executed,
+    # so the result is cached to avoid re-scanning the same code, e.g. in loops
+    _split_cached = staticmethod(functools.lru_cache(maxsize=2 ** 14)(_split.__func__))
 
     @classmethod
     def _separate_at_paren(cls, expr, delim=None):
@@ -549,20 +582,7 @@ def dict_item(key, val):
         if not expr:
             return None, should_return
 
-        m = re.match(fr'''(?x)
-            (?P<assign>
-                (?P<out>{_NAME_RE})(?:\[(?P<index>[^\]]+?)\])?\s*
-                (?P<op>{"|".join(map(re.escape, set(_OPERATORS) - _COMP_OPERATORS))})?
-                =(?!=)(?P<expr>.*)$
-            )|(?P<return>
-                (?!if|return|true|false|null|undefined|NaN)(?P<name>{_NAME_RE})$
-            )|(?P<indexing>
-                (?P<in>{_NAME_RE})\[(?P<idx>.+)\]$
-            )|(?P<attribute>
-                (?P<var>{_NAME_RE})(?:(?P<nullish>\?)?\.(?P<member>[^(]+)|\[(?P<member2>[^\]]+)\])\s*
-            )|(?P<function>
-                (?P<fname>{_NAME_RE})\((?P<args>.*)\)$
-            )''', expr)
+        m = _EXPRESSION_RE.match(expr)
         if m and m.group('assign'):
             left_val = local_vars.get(m.group('out'))
 
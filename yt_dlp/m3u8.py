@@ -0,0 +1,224 @@
+"""
+An incremental parser for HLS playlists (RFC 8216)
+<https://tools.ietf.org/html/rfc8216>
+
+A `Playlist` is fed the successive versions of a playlist document, e.g. on
+every refresh of a live stream. Only the lines that were not seen before are
+turned into records, so that polling a long DVR window stays cheap.
+"""
+
+import collections
+
+from .utils import float_or_none, parse_m3u8_attributes
+
+Segment = collections.namedtuple('Segment', (
+    'uri',            # as written in the playlist; may be relative
+    'sequence',       # media sequence number
+    'duration',       # from EXTINF, in seconds
+    'discontinuity',  # discontinuity sequence number
+    'key',            # attributes of the EXT-X-KEY in effect, or None
+    'byte_range',     # (start, end) tuple, or None
+    'init',           # whether this is the media initialization section of an EXT-X-MAP
+    'ad',             # whether this is inside an ad break
+))
+
+Variant = collections.namedtuple('Variant', ('uri', 'stream_inf'))
+
+
+class Playlist:
+    """
+    The parsed state of a master or media playlist
+
+    @param text: The first version of the playlist document, if already available
+    """
+
+    def __init__(self, text=None):
+        self.segments = []
+        self.target_duration = None
+        self.playlist_type = None
+        self.ended = False
+        self.server_control = {}  # attributes of the EXT-X-SERVER-CONTROL tag
+        self.discontinuity_sequence = 0
+        self._text = ''
+        self._next_sequence = 0
+        # The last EXT-X-KEY, as (value, attributes), so that the records can share it
+        # even across versions of the document; and the last EXT-X-MAP, as (value, discontinuity)
+        self._last_key = self._last_map = None
+        self._reset()
+        if text is not None:
+            self.feed(text)
+
+    @property
+    def is_master(self):
+        return self.target_duration is None and bool(self.variants or self.media)
+
+    @property
+    def discontinuity(self):
+        """The discontinuity sequence number of the last segment"""
+        return self._discontinuity
+
+    @property
+    def media_sequence(self):
+        """The media sequence number that the next segment will get"""
+        return self._next_sequence
+
+    def _reset(self):
+        # State that only applies within a single version of the document
+        self.variants = []
+        self.media = []  # attributes of the EXT-X-MEDIA tags
+        self._sequence = 0
+        self._discontinuity = self.discontinuity_sequence = 0
+        self._key = None
+        self._extinf = self._stream_inf = self._byte_range = None
+        self._byte_range_end = 0
+        self._ad = False
+        self._master_document = False
+
+    def feed(self, text):
+        """
+        Parse a new version of the playlist document and return the new segments
+
+        If the document only appends lines to the previous version, just those
+        lines are processed. Otherwise (e.g. for a live playlist whose window has
+        moved), the segments that were already returned are skipped cheaply
+        based on their media sequence number. The document may also be a
+        Playlist Delta Update, whose EXT-X-SKIP stands for known segments
+        """
+        start = len(self.segments)
+        if self._text and self._text[-1] == '\n' and text.startswith(self._text):
+            lines = text[len(self._text):].splitlines()
+        else:
+            self._reset()
+            lines = text.splitlines()
+            # Media playlists may lack EXT-X-TARGETDURATION, so it takes an EXT-X-STREAM-INF to make a
+            # master playlist; there, even the URIs without an EXT-X-STREAM-INF of their own are variants
+            self._master_document = '#EXT-X-STREAM-INF' in text and '#EXT-X-TARGETDURATION' not in text
+        self._text = text
+
+        handlers = self._TAG_HANDLERS
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if line[0] != '#':
+                self._on_uri(line)
+                continue
+            name, _, value = line.partition(':')
+            handler = handlers.get(name)
+            if handler:
+                handler(self, value)
+        return self.segments[start:]
+
+    def _on_uri(self, uri):
+        if self._stream_inf is not None or self._master_document:
+            self.variants.append(Variant(uri, self._stream_inf or {}))
+            self._stream_inf = None
+            return
+
+        byte_range = self._parse_byte_range(self._byte_range) if self._byte_range else None
+        extinf, sequence = self._extinf, self._sequence
+        self._extinf = self._byte_range = None
+        self._sequence += 1
+        # Only the segments that were not returned earlier are recorded
+        if sequence < self._next_sequence:
+            return
+        self._next_sequence = sequence + 1
+        self.segments.append(Segment(
+            uri, sequence, float_or_none(extinf.partition(',')[0]) if extinf else None,
+            self._discontinuity, self._key, byte_range, False, self._ad))
+
+    def _parse_byte_range(self, value):
+        length, _, offset = value.partition('@')
+        start = int(offset) if offset else self._byte_range_end
+        self._byte_range_end = start + int(length)
+        return start, self._byte_range_end
+
+    def _on_extinf(self, value):
+        self._extinf = value
+
+    def _on_byte_range(self, value):
+        self._byte_range = value
+
+    def _on_media_sequence(self, value):
+        self._sequence = int(value)
+
+    def _on_target_duration(self, value):
+        self.target_duration = float_or_none(value) or 0
+
+    def _on_playlist_type(self, value):
+        self.playlist_type = value
+
+    def _on_endlist(self, value):
+        self.ended = True
+
+    def _on_server_control(self, value):
+        self.server_control = parse_m3u8_attributes(value)
+
+    def _on_skip(self, value):
+        skipped = int(parse_m3u8_attributes(value)['SKIPPED-SEGMENTS'])
+        # The tags of the skipped segments are left out too, so their state is restored from the records
+        last = self._sequence + skipped - 1
+        for segment in reversed(self.segments):
+            if segment.sequence == last and not segment.init:
+                self._key, self._discontinuity = segment.key, segment.discontinuity
+                break
+        self._sequence += skipped
+
+    def _on_discontinuity(self, value):
+        self._discontinuity += 1
+
+    def _on_discontinuity_sequence(self, value):
+        self._discontinuity = self.discontinuity_sequence = int(value)
+
+    def _on_key(self, value):
+        if not self._last_key or self._last_key[0] != value:
+            self._last_key = (value, parse_m3u8_attributes(value))
+        self._key = self._last_key[1]
+
+    def _on_map(self, value):
+        attrs = parse_m3u8_attributes(value)
+        byte_range = attrs.get('BYTERANGE')
+        byte_range = self._parse_byte_range(byte_range) if byte_range else None
+        # A refreshed document repeats the EXT-X-MAP, but it is only needed once
+        if self._sequence < self._next_sequence or self._last_map == (value, self._discontinuity):
+            return
+        self._last_map = (value, self._discontinuity)
+        self.segments.append(Segment(
+            attrs.get('URI'), self._sequence, None, self._discontinuity, self._key, byte_range, True, self._ad))
+
+    def _on_stream_inf(self, value):
+        self._stream_inf = parse_m3u8_attributes(value)
+
+    def _on_media(self, value):
+        self.media.append(parse_m3u8_attributes(value))
+
+    def _on_anvato_segment_info(self, value):
+        if 'type=ad' in value:
+            self._ad = True
+        elif 'type=master' in value:
+            self._ad = False
+
+    def _on_uplynk_segment(self, value):
+        if value.endswith(',ad'):
+            self._ad = True
+        elif value.endswith(',segment'):
+            self._ad = False
+
+    _TAG_HANDLERS = {
+        '#EXTINF': _on_extinf,
+        '#EXT-X-BYTERANGE': _on_byte_range,
+        '#EXT-X-MEDIA-SEQUENCE': _on_media_sequence,
+        '#EXT-X-TARGETDURATION': _on_target_duration,
+        '#EXT-X-PLAYLIST-TYPE': _on_playlist_type,
+        '#EXT-X-ENDLIST': _on_endlist,
+        '#EXT-X-SERVER-CONTROL': _on_server_control,
+        '#EXT-X-SKIP': _on_skip,
+        '#EXT-X-DISCONTINUITY': _on_discontinuity,
+        '#EXT-X-DISCONTINUITY-SEQUENCE': _on_discontinuity_sequence,
+        '#EXT-X-KEY': _on_key,
+        '#EXT-X-MAP': _on_map,
+        '#EXT-X-STREAM-INF': _on_stream_inf,
+        '#EXT-X-MEDIA': _on_media,
+        '#ANVATO-SEGMENT-INFO': _on_anvato_segment_info,
+        '#UPLYNK-SEGMENT': _on_uplynk_segment,
+    }
@@ -1,4 +1,5 @@
 # flake8: noqa: F401
+import importlib.util
 import warnings
 
 from .common import (
@@ -8,6 +9,7 @@
     RequestDirector,
     RequestHandler,
     Response,
+    register_lazy_rh,
 )
 
 # isort: split
@@ -22,16 +24,21 @@
 except Exception as e:
     warnings.warn(f'Failed to import "requests" request handler: {e}' + bug_reports_message())
 
-try:
-    from . import _websockets
-except ImportError:
-    pass
-except Exception as e:
-    warnings.warn(f'Failed to import "websockets" request handler: {e}' + bug_reports_message())
 
-try:
-    from . import _curlcffi
-except ImportError:
-    pass
-except Exception as e:
-    warnings.warn(f'Failed to import "curl_cffi" request handler: {e}' + bug_reports_message())
+def _lazy_import_rh(module, dependency):
+    # Checking for the package is cheap; it is only imported once a request director is built
+    if not importlib.util.find_spec(dependency):
+        return
+
+    @register_lazy_rh
+    def load():
+        try:
+            importlib.import_module(f'.{module}', __name__)
+        except ImportError:
+            pass
+        except Exception as e:
+            warnings.warn(f'Failed to import "{dependency}" request handler: {e}' + bug_reports_message())
+
+
+_lazy_import_rh('_websockets', 'websockets')
+_lazy_import_rh('_curlcffi', 'curl_cffi')
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
+import collections
 import functools
 import http.client
 import io
+import select
 import ssl
+import threading
+import time
 import urllib.error
 import urllib.parse
 import urllib.request
@@ -78,10 +82,11 @@ class HTTPHandler(urllib.request.AbstractHTTPHandler):
     public domain.
     """
 
-    def __init__(self, context=None, source_address=None, *args, **kwargs):
+    def __init__(self, context=None, source_address=None, connection_pool=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._source_address = source_address
         self._context = context
+        self._connection_pool = connection_pool
 
     @staticmethod
     def _make_conn_class(base, req):
@@ -91,17 +96,80 @@ def _make_conn_class(base, req):
             conn_class = make_socks_conn_class(conn_class, socks_proxy)
         return conn_class
 
+    @staticmethod
+    def _connection_key(req):
+        # TLS settings and source address are the same for all connections of a pool
+        return (
+            req.type, req.host, req._tunnel_host,
+            req.headers.get('Ytdl-socks-proxy'), req.headers.get('Proxy-authorization'))
+
+    def _open(self, base, req, **http_conn_args):
+        key = self._connection_key(req)
+        http_class = functools.partial(
+            _create_http_connection, self._make_conn_class(base, req), self._source_address)
+        if self._connection_pool is None:
+            return self.do_open(http_class, req, **http_conn_args)
+        return self._do_keepalive_open(key, http_class, req, **http_conn_args)
+
     def http_open(self, req):
-        conn_class = self._make_conn_class(http.client.HTTPConnection, req)
-        return self.do_open(functools.partial(
-            _create_http_connection, conn_class, self._source_address), req)
+        return self._open(http.client.HTTPConnection, req)
 
     def https_open(self, req):
-        conn_class = self._make_conn_class(http.client.HTTPSConnection, req)
-        return self.do_open(
-            functools.partial(
-                _create_http_connection, conn_class, self._source_address),
-            req, context=self._context)
+        return self._open(http.client.HTTPSConnection, req, context=self._context)
+
+    def _do_keepalive_open(self, key, http_class, req, **http_conn_args):
+        """AbstractHTTPHandler.do_open, but keeping the connection open for reuse
+
+        The connection is returned to the pool once the response has been completely read.
+        """
+        if not req.host:
+            raise urllib.error.URLError('no host given')
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items() if k not in headers})
+        headers = {name.title(): val for name, val in headers.items()}
+        tunnel_headers = {}
+        if req._tunnel_host and 'Proxy-Authorization' in headers:
+            # Proxy-Authorization should not be sent to origin server
+            tunnel_headers['Proxy-Authorization'] = headers.pop('Proxy-Authorization')
+
+        while True:
+            conn = self._connection_pool.acquire(key)
+            reused = conn is not None
+            if reused:
+                conn.timeout = req.timeout
+                conn.sock.settimeout(req.timeout)
+            else:
+                conn = http_class(req.host, timeout=req.timeout, **http_conn_args)
+                conn.set_debuglevel(self._debuglevel)
+                conn.response_class = _KeepAliveHTTPResponse
+                if req._tunnel_host:
+                    conn.set_tunnel(req._tunnel_host, headers=tunnel_headers)
+
+            try:
+                try:
+                    conn.request(req.get_method(), req.selector, req.data, headers,
+                                 encode_chunked=req.has_header('Transfer-encoding'))
+                except OSError as err:  # timeout error
+                    raise urllib.error.URLError(err)
+                res = conn.getresponse()
+            except (urllib.error.URLError, ConnectionError) as e:
+                conn.close()
+                # The server may have closed the idle connection just as it was reused
+                cause = e.reason if isinstance(e, urllib.error.URLError) else e
+                if reused and isinstance(cause, ConnectionError) and isinstance(req.data, (bytes, type(None))):
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            break
+
+        if not res.will_close:
+            res._release = functools.partial(self._connection_pool.release, key, conn)
+        res.url = req.get_full_url()
+        res.msg = res.reason
+        return res
 
     @staticmethod
     def deflate(data):
@@ -179,6 +247,96 @@ def http_response(self, req, resp):
     https_response = http_response
 
 
+class _KeepAliveHTTPResponse(http.client.HTTPResponse):
+    """HTTPResponse that releases its connection once the body has been completely read"""
+    _release = None
+    _aborted = False
+
+    def close(self):
+        # The rest of the body would still be waiting on the connection
+        self._aborted = not self.isclosed() and (self.chunked or self.length != 0)
+        super().close()
+
+    def _close_conn(self):
+        release, self._release = self._release, None
+        complete = not (self._aborted or self.will_close) and (self.chunked or self.length == 0)
+        super()._close_conn()
+        if release:
+            release(complete)
+
+
+class KeepAliveConnectionPool:
+    """Pool of idle keep-alive HTTP connections
+
+    Connections are pooled per key, which should identify the host, proxy and TLS settings.
+    Idle connections are evicted after `idle_timeout` seconds, or as soon as the server closes them.
+
+    @param maxsize: Maximum number of idle connections to keep per key.
+    @param idle_timeout: Seconds after which an idle connection is closed.
+    @param stats: Counter to record the number of connections `opened` and `reused` to.
+    """
+
+    def __init__(self, maxsize=10, idle_timeout=30, stats=None):
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.stats = stats if stats is not None else collections.Counter()
+        self._lock = threading.Lock()
+        self._idle = {}
+        self._closed = False
+
+    @staticmethod
+    def _is_dropped(conn):
+        if conn.sock is None:
+            return True
+        try:
+            # An idle connection is only readable if the server has closed it
+            return bool(select.select([conn.sock], [], [], 0)[0])
+        except (OSError, ValueError):
+            return True
+
+    def _evict(self, now):
+        for key, idle in list(self._idle.items()):
+            while idle and now - idle[0][1] >= self.idle_timeout:
+                idle.popleft()[0].close()
+            if not idle:
+                del self._idle[key]
+
+    def acquire(self, key):
+        """Return an idle connection for key, or None if a new connection is to be opened"""
+        with self._lock:
+            self._evict(time.monotonic())
+            idle = self._idle.get(key)
+            while idle:
+                conn, _ = idle.pop()
+                if not self._is_dropped(conn):
+                    self.stats['reused'] += 1
+                    return conn
+                conn.close()
+            self.stats['opened'] += 1
+            return None
+
+    def release(self, key, conn, reusable=True):
+        """Return a connection to the pool. It is closed if not reusable"""
+        with self._lock:
+            if not reusable or self._closed or conn.sock is None:
+                conn.close()
+                return
+            now = time.monotonic()
+            self._evict(now)
+            idle = self._idle.setdefault(key, collections.deque())
+            idle.append((conn, now))
+            while len(idle) > self.maxsize:
+                idle.popleft()[0].close()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            for idle in self._idle.values():
+                for conn, _ in idle:
+                    conn.close()
+            self._idle.clear()
+
+
 def make_socks_conn_class(base_class, socks_proxy):
     assert issubclass(base_class, (
         http.client.HTTPConnection, http.client.HTTPSConnection))
@@ -312,6 +470,13 @@ def read(self, amt=None):
             handle_response_read_exceptions(e)
             raise e
 
+    def readinto(self, b):
+        try:
+            return self.fp.readinto(b)
+        except Exception as e:
+            handle_response_read_exceptions(e)
+            raise e
+
 
 def handle_sslerror(e: ssl.SSLError):
     if not isinstance(e, ssl.SSLError):
@@ -343,6 +508,11 @@ def __init__(self, *, enable_file_urls: bool = False, **kwargs):
         self.enable_file_urls = enable_file_urls
         if self.enable_file_urls:
             self._SUPPORTED_URL_SCHEMES = (*self._SUPPORTED_URL_SCHEMES, 'file')
+        self._connection_pool = KeepAliveConnectionPool(stats=self.connection_stats)
+
+    def close(self):
+        self._clear_instances()
+        self._connection_pool.close()
 
     def _check_extensions(self, extensions):
         super()._check_extensions(extensions)
@@ -356,7 +526,8 @@ def _create_instance(self, proxies, cookiejar):
             HTTPHandler(
                 debuglevel=int(bool(self.verbose)),
                 context=self._make_sslcontext(),
-                source_address=self.source_address),
+                source_address=self.source_address,
+                connection_pool=self._connection_pool),
             HTTPCookieProcessor(cookiejar),
             DataHandler(),
             UnknownHandler(),
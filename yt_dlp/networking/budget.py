@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import collections
+import contextlib
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Limits the rate at which bytes are transferred by any number of threads
+
+    @param rate: Bytes per second, or None for no limit
+    @param burst: Bytes that can be transferred at once after being idle. Defaults to one second's worth
+    """
+
+    def __init__(self, rate: float | None = None, burst: float | None = None):
+        self._lock = threading.Lock()
+        self._rate, self._burst = rate, burst
+        self._tokens, self._updated = 0, time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        if self._rate:
+            self._tokens = min(self._tokens + (now - self._updated) * self._rate, self._burst or self._rate)
+        self._updated = now
+
+    @property
+    def rate(self):
+        return self._rate
+
+    @rate.setter
+    def rate(self, rate):
+        with self._lock:
+            self._refill()
+            self._rate = rate
+            if rate:
+                self._tokens = min(self._tokens, self._burst or rate)
+
+    def consume(self, amount):
+        """Wait until `amount` bytes may be transferred"""
+        if not self._rate:
+            return
+        with self._lock:
+            if not self._rate:
+                return
+            self._refill()
+            # The bucket goes into debt, so that threads waiting at the same time take turns
+            self._tokens -= amount
+            delay = -self._tokens / self._rate
+        if delay > 0:
+            time.sleep(delay)
+
+
+class HostConnectionLimit:
+    """
+    Limits the number of simultaneous connections to each host
+
+    @param limit: Connections per host, or None for no limit
+    """
+
+    def __init__(self, limit: int | None = None):
+        self._condition = threading.Condition()
+        self._limit = limit
+        self._active = collections.Counter()
+
+    @property
+    def limit(self):
+        return self._limit
+
+    @limit.setter
+    def limit(self, limit):
+        with self._condition:
+            self._limit = limit
+            self._condition.notify_all()
+
+    def active(self, host):
+        with self._condition:
+            return self._active[host]
+
+    @contextlib.contextmanager
+    def connection(self, host):
+        """Wait for a free connection to the host and hold it for the duration of the context"""
+        with self._condition:
+            self._condition.wait_for(lambda: not self._limit or self._active[host] < self._limit)
+            self._active[host] += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._active[host] -= 1
+                if not self._active[host]:
+                    del self._active[host]
+                self._condition.notify_all()
+
+
+class Budget:
+    """
+    Bandwidth and connection limits that are shared by all the downloads in the process
+
+    The limits can be changed at any time, and apply to the transfers in progress.
+    Their initial values are taken from the global_ratelimit and max_connections_per_host
+    parameters of the most recently created YoutubeDL instance that sets them
+    """
+
+    def __init__(self):
+        self.bandwidth = TokenBucket()
+        self.connections = HostConnectionLimit()
+
+    @property
+    def rate(self):
+        return self.bandwidth.rate
+
+    @rate.setter
+    def rate(self, rate):
+        self.bandwidth.rate = rate
+
+    @property
+    def connections_per_host(self):
+        return self.connections.limit
+
+    @connections_per_host.setter
+    def connections_per_host(self, limit):
+        self.connections.limit = limit
+
+
+GLOBAL_BUDGET = Budget()
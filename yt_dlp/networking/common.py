@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import abc
+import collections
 import copy
 import enum
 import functools
@@ -72,6 +73,11 @@ def close(self):
             handler.close()
         self.handlers.clear()
 
+    @property
+    def connection_stats(self) -> collections.Counter:
+        """Number of connections `opened` and `reused` by all handlers"""
+        return sum((handler.connection_stats for handler in self.handlers.values()), collections.Counter())
+
     def add_handler(self, handler: RequestHandler):
         """Add a handler. If a handler of the same RH_KEY exists, it will overwrite it"""
         assert isinstance(handler, RequestHandler), 'handler must be a RequestHandler'
@@ -131,6 +137,7 @@ def send(self, request: Request) -> Response:
 
 
 _REQUEST_HANDLERS = {}
+_LAZY_RH_LOADERS = []
 
 
 def register_rh(handler):
@@ -141,6 +148,19 @@ def register_rh(handler):
     return handler
 
 
+def register_lazy_rh(loader):
+    """Register a function that imports (and so registers) RequestHandlers when they are first needed"""
+    _LAZY_RH_LOADERS.append(loader)
+    return loader
+
+
+def _load_request_handlers():
+    """Run the pending lazy loaders and return all the registered RequestHandlers"""
+    while _LAZY_RH_LOADERS:
+        _LAZY_RH_LOADERS.pop(0)()
+    return _REQUEST_HANDLERS
+
+
 class Features(enum.Enum):
     ALL_PROXY = enum.auto()
     NO_PROXY = enum.auto()
@@ -192,6 +212,9 @@ class RequestHandler(abc.ABC):
     @param verify: Verify SSL certificates
     @param legacy_ssl_support: Enable legacy SSL options such as legacy server connect and older cipher support.
 
+    Handlers that keep connections alive should count the connections they open and reuse
+    in the `connection_stats` Counter, under the keys `opened` and `reused`.
+
     Some configuration options may be available for individual Requests too. In this case,
     either the Request configuration option takes precedence or they are merged.
 
@@ -245,6 +268,7 @@ def __init__(
         self._client_cert = client_cert or {}
         self.verify = verify
         self.legacy_ssl_support = legacy_ssl_support
+        self.connection_stats = collections.Counter()
         super().__init__()
 
     def _make_sslcontext(self):
@@ -535,6 +559,13 @@ def read(self, amt: int | None = None) -> bytes:
         except Exception as e:
             raise TransportError(cause=e) from e
 
+    def readinto(self, b) -> int:
+        """Read into the writable bytes-like object b, returning the number of bytes read"""
+        # Subclasses should redefine this method if the response can be read into the buffer without a copy
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
     def close(self):
         self.fp.close()
         return super().close()
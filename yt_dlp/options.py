@@ -419,7 +419,9 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
     general.add_option(
         '--live-from-start',
         action='store_true', dest='live_from_start',
-        help='Download livestreams from the start. Currently only supported for YouTube (Experimental)')
+        help=(
+            'Download livestreams from the start. Currently only supported for YouTube '
+            'and for HLS EVENT playlists, which keep all their segments (Experimental)'))
     general.add_option(
         '--no-live-from-start',
         action='store_false', dest='live_from_start',
@@ -684,6 +686,16 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         '--no-download-archive',
         dest='download_archive', action='store_const', const=None,
         help='Do not use archive file (default)')
+    selection.add_option(
+        '--download-archive-index',
+        action='store_true', dest='download_archive_index', default=False,
+        help=(
+            'Look up videos in the download archive through an index stored next to it (FILE.sqlite) '
+            'instead of loading the whole archive into memory. The archive file itself keeps the same format'))
+    selection.add_option(
+        '--no-download-archive-index',
+        action='store_false', dest='download_archive_index',
+        help='Load the whole download archive into memory (default)')
     selection.add_option(
         '--max-downloads',
         dest='max_downloads', metavar='NUMBER', type=int, default=None,
@@ -842,6 +854,16 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         '--no-check-formats',
         action='store_false', dest='check_formats',
         help='Do not check that the formats are actually downloadable')
+    video_format.add_option(
+        '--concurrent-format-checks',
+        dest='concurrent_format_checks', metavar='N', default=4, type=int,
+        help='Number of formats that are tested at a time when checking formats (default is %default)')
+    video_format.add_option(
+        '--format-check-cache-ttl',
+        dest='format_check_cache_ttl', metavar='SECONDS', default=None, type=float,
+        help=(
+            'Cache the result of checking a format for this many seconds, so that it is not '
+            'tested again in later runs (default: not cached)'))
     video_format.add_option(
         '-F', '--list-formats',
         action='store_true', dest='listformats',
@@ -913,10 +935,30 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         '-N', '--concurrent-fragments',
         dest='concurrent_fragment_downloads', metavar='N', default=1, type=int,
         help='Number of fragments of a dash/hlsnative video that should be downloaded concurrently (default is %default)')
+    downloader.add_option(
+        '--async-fragments',
+        action='store_true', dest='async_fragments', default=False,
+        help=(
+            'Schedule the fragment downloads of all formats on a single event loop, '
+            'so that at most --concurrent-fragments downloads run at once in total (experimental)'))
+    downloader.add_option(
+        '--no-async-fragments',
+        action='store_false', dest='async_fragments',
+        help='Use separate threads for the fragments of each format (default)')
     downloader.add_option(
         '-r', '--limit-rate', '--rate-limit',
         dest='ratelimit', metavar='RATE',
         help='Maximum download rate in bytes per second, e.g. 50K or 4.2M')
+    downloader.add_option(
+        '--global-limit-rate',
+        dest='global_ratelimit', metavar='RATE',
+        help=(
+            'Maximum download rate in bytes per second shared by all downloads running at the same time, '
+            'including concurrent fragments and formats, e.g. 10M'))
+    downloader.add_option(
+        '--max-connections-per-host',
+        dest='max_connections_per_host', metavar='N', type=int,
+        help='Maximum number of simultaneous download connections to each host (default is no limit)')
     downloader.add_option(
         '--throttled-rate',
         dest='throttledratelimit', metavar='RATE',
@@ -962,6 +1004,16 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         '--no-keep-fragments',
         action='store_false', dest='keep_fragments',
         help='Delete downloaded fragments after downloading is finished (default)')
+    downloader.add_option(
+        '--in-memory-fragments',
+        action='store_true', dest='in_memory_fragments', default=False,
+        help=(
+            'Download fragments of a dash/hlsnative video into memory instead of temporary files. '
+            'Interrupted downloads can then only be resumed from the last complete fragment'))
+    downloader.add_option(
+        '--no-in-memory-fragments',
+        action='store_false', dest='in_memory_fragments',
+        help='Download each fragment to a temporary file (default)')
     downloader.add_option(
         '--buffer-size',
         dest='buffersize', metavar='SIZE', default='1024',
@@ -979,7 +1031,14 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         dest='http_chunk_size', metavar='SIZE', default=None,
         help=(
             'Size of a chunk for chunk-based HTTP downloading, e.g. 10485760 or 10M (default is disabled). '
-            'May be useful for bypassing bandwidth throttling imposed by a webserver (experimental)'))
+            'May be useful for bypassing bandwidth throttling imposed by a webserver. '
+            'Use "auto" to switch to chunks when throttling is detected and adapt their size to the throughput (experimental)'))
+    downloader.add_option(
+        '--http-connections',
+        dest='http_connections', metavar='N', default=1, type=int,
+        help=(
+            'Number of connections to use for downloading a single file over HTTP, in byte ranges of --http-chunk-size '
+            'if given (default is %default). The server must support ranged requests (experimental)'))
     downloader.add_option(
         '--test',
         action='store_true', dest='test', default=False,
@@ -1004,6 +1063,12 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         '--no-lazy-playlist',
         action='store_false', dest='lazy_playlist',
         help='Process videos in the playlist only after the entire playlist is parsed (default)')
+    downloader.add_option(
+        '--concurrent-entries',
+        dest='concurrent_entries', metavar='N', default=1, type=int,
+        help=(
+            'Number of playlist entries that should be processed concurrently (default is %default). '
+            'The entries are still recorded in the download archive in playlist order'))
     downloader.add_option(
         '--xattr-set-filesize',
         dest='xattr_set_filesize', action='store_true',
@@ -1030,6 +1095,17 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         help=(
             'Do not use the mpegts container for HLS videos. '
             'This is default when not downloading live streams'))
+    downloader.add_option(
+        '--stream-merge',
+        action='store_true', dest='stream_merge', default=False,
+        help=(
+            'Merge the video and audio formats with ffmpeg while they are downloaded by the native downloader, '
+            'instead of writing them to separate files first. Interrupted downloads cannot be resumed, '
+            'and formats with the index at the end of the file cannot be merged this way. Not supported on Windows'))
+    downloader.add_option(
+        '--no-stream-merge',
+        action='store_false', dest='stream_merge',
+        help='Download the formats to separate files before merging them (default)')
     downloader.add_option(
         '--download-sections',
         metavar='REGEX', dest='download_ranges', action='append',
@@ -1219,6 +1295,18 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         help=(
             'Quiet, but print JSON information for each url or infojson passed. Simulate unless --no-simulate is used. '
             'If the URL refers to a playlist, the whole playlist information is dumped in a single line'))
+    verbosity.add_option(
+        '--stream-playlist-json',
+        action='store_true', dest='stream_playlist_json', default=False,
+        help=(
+            'Write the entries of a playlist to the output of -J, and to the playlist infojson '
+            'when --no-clean-info-json is used, as they are processed instead of holding them in memory. '
+            'The entries are written before the other fields of the playlist. '
+            '-J is not streamed if anything else is printed to stdout'))
+    verbosity.add_option(
+        '--no-stream-playlist-json',
+        action='store_false', dest='stream_playlist_json',
+        help='Write the playlist JSON only once all the entries are processed (default)')
     verbosity.add_option(
         '--print-json',
         action='store_true', dest='print_json', default=False,
@@ -1590,6 +1678,13 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
             'before the specified input/output file, e.g. --ppa "Merger+ffmpeg_i1:-v quiet". '
             'You can use this option multiple times to give different arguments to different '
             'postprocessors. (Alias: --ppa)'))
+    postproc.add_option(
+        '--concurrent-postprocessing',
+        dest='concurrent_postprocessing', metavar='N', default=0, type=int,
+        help=(
+            'Number of videos that can be post-processed in the background while the next ones are downloaded '
+            '(default is %default, i.e. post-process each video before starting the next download). '
+            '"--exec after_move" and the download archive still follow the order of the downloads'))
     postproc.add_option(
         '-k', '--keep-video',
         action='store_true', dest='keepvideo', default=False,
@@ -6,7 +6,6 @@
 from .common import PostProcessor
 from .ffmpeg import FFmpegPostProcessor, FFmpegThumbnailsConvertorPP
 from ..compat import imghdr
-from ..dependencies import mutagen
 from ..utils import (
     Popen,
     PostProcessingError,
@@ -17,12 +16,6 @@
     shell_quote,
 )
 
-if mutagen:
-    from mutagen.flac import FLAC, Picture
-    from mutagen.mp4 import MP4, MP4Cover
-    from mutagen.oggopus import OggOpus
-    from mutagen.oggvorbis import OggVorbis
-
 
 class EmbedThumbnailPPError(PostProcessingError):
     pass
@@ -56,6 +49,8 @@ def _report_run(self, exe, filename):
 
     @PostProcessor._restrict_to(images=False)
     def run(self, info):
+        from ..dependencies import mutagen
+
         filename = info['filepath']
         temp_filename = prepend_extension(filename, 'temp')
 
@@ -119,6 +114,8 @@ def run(self, info):
             if not mutagen or prefer_atomicparsley:
                 success = False
             else:
+                from mutagen.mp4 import MP4, MP4Cover
+
                 self._report_run('mutagen', filename)
                 f = {'jpeg': MP4Cover.FORMAT_JPEG, 'png': MP4Cover.FORMAT_PNG}
                 try:
@@ -199,6 +196,10 @@ def run(self, info):
             if not mutagen:
                 raise EmbedThumbnailPPError('module mutagen was not found. Please install using `python3 -m pip install mutagen`')
 
+            from mutagen.flac import FLAC, Picture
+            from mutagen.oggopus import OggOpus
+            from mutagen.oggvorbis import OggVorbis
+
             self._report_run('mutagen', filename)
             f = {'opus': OggOpus, 'flac': FLAC, 'ogg': OggVorbis}[info['ext']](filename)
 
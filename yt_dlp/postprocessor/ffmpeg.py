@@ -331,7 +331,10 @@ def run_ffmpeg_multiple_files(self, input_paths, out_path, opts, **kwargs):
             [(path, []) for path in input_paths],
             [(out_path, opts)], **kwargs)
 
-    def real_run_ffmpeg(self, input_path_opts, output_path_opts, *, expected_retcodes=(0,)):
+    def real_run_ffmpeg(self, input_path_opts, output_path_opts, *, expected_retcodes=(0,), on_process_started=None):
+        """
+        @param on_process_started: Called with the ffmpeg process once it is started, e.g. to feed inputs that are pipes
+        """
         self.check_version()
 
         oldest_mtime = min(
@@ -361,11 +364,16 @@ def make_args(file, args, name, number):
                 for i, (path, opts) in enumerate(path_opts) if path)
 
         self.write_debug(f'ffmpeg command line: {shell_quote(cmd)}')
-        _, stderr, returncode = Popen.run(
-            cmd, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.PIPE)
+        with Popen(cmd, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, stdin=subprocess.PIPE) as proc:
+            if on_process_started:
+                on_process_started(proc)
+            _, stderr = proc.communicate_or_kill()
+            returncode = proc.returncode
         if returncode not in variadic(expected_retcodes):
             self.write_debug(stderr)
-            raise FFmpegPostProcessorError(stderr.strip().splitlines()[-1])
+            # ffmpeg may have been killed before writing anything
+            error = stderr.strip().splitlines() or [f'{self.basename} exited with code {returncode}']
+            raise FFmpegPostProcessorError(error[-1])
         for out_path, _ in output_path_opts:
             if out_path:
                 self.try_utime(out_path, oldest_mtime, oldest_mtime)
@@ -823,23 +831,31 @@ class FFmpegMergerPP(FFmpegPostProcessor):
 
     @PostProcessor._restrict_to(images=False)
     def run(self, info):
-        filename = info['filepath']
+        self.merge(info['requested_formats'], info['__files_to_merge'], info['filepath'])
+        return info['__files_to_merge'], info
+
+    def merge(self, formats, input_paths, filename, **kwargs):
+        """
+        Merge the files of the given formats into filename
+
+        The inputs may also be named pipes that are written to while ffmpeg runs.
+        kwargs are passed on to real_run_ffmpeg
+        """
         temp_filename = prepend_extension(filename, 'temp')
         args = ['-c', 'copy']
         audio_streams = 0
-        for (i, fmt) in enumerate(info['requested_formats']):
+        for i, (fmt, path) in enumerate(zip(formats, input_paths)):
             if fmt.get('acodec') != 'none':
                 args.extend(['-map', f'{i}:a:0'])
-                aac_fixup = fmt['protocol'].startswith('m3u8') and self.get_audio_codec(fmt['filepath']) == 'aac'
+                aac_fixup = fmt['protocol'].startswith('m3u8') and self.get_audio_codec(path) == 'aac'
                 if aac_fixup:
                     args.extend([f'-bsf:a:{audio_streams}', 'aac_adtstoasc'])
                 audio_streams += 1
             if fmt.get('vcodec') != 'none':
                 args.extend(['-map', f'{i}:v:0'])
         self.to_screen(f'Merging formats into "{filename}"')
-        self.run_ffmpeg_multiple_files(info['__files_to_merge'], temp_filename, args)
+        self.run_ffmpeg_multiple_files(input_paths, temp_filename, args, **kwargs)
         os.rename(encodeFilename(temp_filename), encodeFilename(filename))
-        return info['__files_to_merge'], info
 
     def can_merge(self):
         # TODO: figure out merge-capable ffmpeg version
@@ -51,7 +51,6 @@
     compat_HTMLParseError,
     compat_os_name,
 )
-from ..dependencies import xattr
 
 __name__ = __name__.rsplit('.', 1)[0]  # noqa: A001: Pretend to be the parent module
 
@@ -188,6 +187,13 @@ def preferredencoding():
 
 def write_json_file(obj, fn):
     """ Encode obj as JSON and write it to fn, atomically if possible """
+    with atomic_write_file(fn) as f:
+        json.dump(obj, f, ensure_ascii=False)
+
+
+@contextlib.contextmanager
+def atomic_write_file(fn):
+    """ Open a temporary file for writing text, which replaces fn if no exception is raised """
 
     tf = tempfile.NamedTemporaryFile(
         prefix=f'{os.path.basename(fn)}.', dir=os.path.dirname(fn),
@@ -195,7 +201,7 @@ def write_json_file(obj, fn):
 
     try:
         with tf:
-            json.dump(obj, tf, ensure_ascii=False)
+            yield tf
         if sys.platform == 'win32':
             # Need to remove existing file on Windows, else os.rename raises
             # WindowsError or FileExistsError.
@@ -206,7 +212,7 @@ def write_json_file(obj, fn):
             os.umask(mask)
             os.chmod(tf.name, 0o666 & ~mask)
         os.rename(tf.name, fn)
-    except Exception:
+    except BaseException:
         with contextlib.suppress(OSError):
             os.remove(tf.name)
         raise
@@ -2158,6 +2164,108 @@ def frange(start=0, stop=None, step=1):
         start += step
 
 
+class StreamingJSONWriter:
+    """Write a JSON object whose `key` is a list, item by item
+    The list is written as the first field of the object, and the other fields when it is closed"""
+
+    def __init__(self, write, key, **kwargs):
+        self._write, self._key, self._kwargs = write, key, kwargs
+        self._count, self.closed = 0, False
+        self._write(f'{{{json.dumps(key)}: [')
+
+    def add(self, item):
+        self._write(f'{", " if self._count else ""}{json.dumps(item, **self._kwargs)}')
+        self._count += 1
+
+    def close(self, obj=None):
+        """Write the fields of obj, except for `key`, and end the object"""
+        if self.closed:
+            return
+        self.closed = True
+        fields = json.dumps({k: v for k, v in (obj or {}).items() if k != self._key}, **self._kwargs)
+        self._write(f']{", " if fields != "{}" else ""}{fields[1:]}')
+
+
+class CopyOnWriteDict(collections.ChainMap):
+    """Copy-on-write view of the given dicts
+    Changes are kept in the view, and the given dicts are never modified or copied.
+    The keys in `deleted` are hidden unless they are set again"""
+
+    def __init__(self, *maps, deleted=()):
+        super().__init__({}, *maps)
+        self.deleted = set(deleted)
+
+    def __getitem__(self, key):
+        if key in self.deleted and key not in self.maps[0]:
+            return self.__missing__(key)
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        return key in self.maps[0] or (key not in self.deleted and any(key in m for m in self.maps[1:]))
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def _keys(self):
+        # Unlike to_dict, the values of the given dicts are not copied
+        keys = {}
+        for mapping in reversed(self.maps):
+            keys.update(dict.fromkeys(mapping))
+        for key in self.deleted.difference(self.maps[0]):
+            keys.pop(key, None)
+        return keys
+
+    def __bool__(self):
+        return bool(self.maps[0]) or any(key not in self.deleted for mapping in self.maps[1:] for key in mapping)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.maps[0].pop(key, None)
+        self.deleted.add(key)
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def pop(self, key, *args):
+        return collections.abc.MutableMapping.pop(self, key, *args)
+
+    def popitem(self):
+        # ChainMap.popitem would only look at maps[0]. Like dict, the last item is removed
+        items = self.to_dict()
+        if not items:
+            raise KeyError('popitem(): dictionary is empty')
+        key = next(reversed(items))
+        del self[key]
+        return key, items[key]
+
+    def clear(self):
+        self.maps[0].clear()
+        self.deleted.update(*self.maps[1:])
+
+    def copy(self):
+        """A view over a snapshot of this one, which is not affected by later changes to either"""
+        return type(self)(self.to_dict())
+
+    __copy__ = copy
+
+    def new_child(self, m=None):
+        return type(self)(self) if m is None else type(self)(m, self)
+
+    def to_dict(self):
+        """Copy the view into a dict"""
+        merged = {}
+        for mapping in reversed(self.maps[1:]):
+            merged.update(mapping.to_dict() if isinstance(mapping, CopyOnWriteDict) else mapping)
+        for key in self.deleted.difference(self.maps[0]):
+            merged.pop(key, None)
+        merged.update(self.maps[0])
+        return merged
+
+
 class LazyList(collections.abc.Sequence):
     """Lazy immutable list from an iterable
     Note that slices of a LazyList are lists and not LazyList"""
@@ -2256,21 +2364,61 @@ def __len__(self):
         # This is only useful for tests
         return len(self.getslice())
 
-    def __init__(self, pagefunc, pagesize, use_cache=True):
+    def __init__(self, pagefunc, pagesize, use_cache=True, *, prefetch=0):
+        """
+        @param prefetch     Number of pages after the current one to fetch in the background.
+                            Only use this if pagefunc can be called concurrently
+        """
         self._pagefunc = pagefunc
         self._pagesize = pagesize
         self._pagecount = float('inf')
         self._use_cache = use_cache
         self._cache = {}
+        self._prefetch = prefetch
+        self._prefetched = {}  # pagenum: Future
+        self._executor = None
 
     def getpage(self, pagenum):
         page_results = self._cache.get(pagenum)
         if page_results is None:
-            page_results = [] if pagenum > self._pagecount else list(self._pagefunc(pagenum))
+            future = self._prefetched.pop(pagenum, None)
+            if pagenum > self._pagecount:
+                page_results = []
+            elif future and not future.cancel():
+                page_results = future.result()
+            else:
+                page_results = list(self._pagefunc(pagenum))
+            if not self._prefetched:
+                # The last prefetched page has been used
+                self._cancel_prefetch()
         if self._use_cache:
             self._cache[pagenum] = page_results
         return page_results
 
+    def _prefetch_pages(self, pagenums):
+        """Start fetching the pages that have not been fetched yet, up to the prefetch limit"""
+        if not self._prefetch:
+            return
+        elif not self._executor:
+            import concurrent.futures
+            self._executor = concurrent.futures.ThreadPoolExecutor(self._prefetch, thread_name_prefix='ytdl-page')
+
+        for pagenum in itertools.islice(pagenums, self._prefetch):
+            if pagenum not in self._cache and pagenum not in self._prefetched and pagenum <= self._pagecount:
+                self._prefetched[pagenum] = self._executor.submit(lambda n: list(self._pagefunc(n)), pagenum)
+
+    def _cancel_prefetch(self, after=-1):
+        """Cancel fetching the pages after the given page, and stop the threads if no page is left to fetch"""
+        for pagenum in [n for n in self._prefetched if n > after]:
+            self._prefetched.pop(pagenum).cancel()
+        if self._executor and not self._prefetched:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def close(self):
+        """Stop fetching pages in the background. They are fetched again if they are requested"""
+        self._cancel_prefetch()
+
     def getslice(self, start=0, end=None):
         return list(self._getslice(start, end))
 
@@ -2281,6 +2429,8 @@ def __getitem__(self, idx):
         assert self._use_cache, 'Indexing PagedList requires cache'
         if not isinstance(idx, int) or idx < 0:
             raise TypeError('indices must be non-negative integers')
+        # Playlists are processed by indexing the entries one after another
+        self._prefetch_pages(itertools.count(idx // self._pagesize + 1))
         entries = self.getslice(idx, idx + 1)
         if not entries:
             raise self.IndexError
@@ -2309,10 +2459,14 @@ def _getslice(self, start, end):
                 if (end is not None and firstid <= end <= nextfirstid)
                 else None)
 
+            self._prefetch_pages(
+                itertools.count(pagenum + 1) if end is None
+                else range(pagenum + 1, (end - 1) // self._pagesize + 1))
             try:
                 page_results = self.getpage(pagenum)
             except Exception:
                 self._pagecount = pagenum - 1
+                self._cancel_prefetch(pagenum)
                 raise
             if startv != 0 or endv is not None:
                 page_results = page_results[startv:endv]
@@ -2323,6 +2477,9 @@ def _getslice(self, start, end):
             # is the last one - there are no more ids on further pages -
             # i.e. no need to query again.
             if len(page_results) + startv < self._pagesize:
+                if endv is None:
+                    self._pagecount = pagenum
+                    self._cancel_prefetch(pagenum)
                 break
 
             # If we got the whole page, but the next page is not interesting,
@@ -2334,16 +2491,20 @@ def _getslice(self, start, end):
 class InAdvancePagedList(PagedList):
     """PagedList with total number of pages known in advance"""
 
-    def __init__(self, pagefunc, pagecount, pagesize):
-        PagedList.__init__(self, pagefunc, pagesize, True)
+    def __init__(self, pagefunc, pagecount, pagesize, *, prefetch=0):
+        PagedList.__init__(self, pagefunc, pagesize, True, prefetch=prefetch)
         self._pagecount = pagecount
 
+    def _prefetch_pages(self, pagenums):
+        super()._prefetch_pages(itertools.takewhile(lambda n: n < self._pagecount, pagenums))
+
     def _getslice(self, start, end):
         start_page = start // self._pagesize
         end_page = self._pagecount if end is None else min(self._pagecount, end // self._pagesize + 1)
         skip_elems = start - start_page * self._pagesize
         only_more = None if end is None else end - start
         for pagenum in range(start_page, end_page):
+            self._prefetch_pages(range(pagenum + 1, end_page))
             page_results = self.getpage(pagenum)
             if skip_elems:
                 page_results = page_results[skip_elems:]
@@ -2415,18 +2576,23 @@ def get_requested_items(self):
         elif playlist_start != 1 or playlist_end:
             self.ydl.report_warning('Ignoring playliststart and playlistend because playlistitems was given', only_once=True)
 
-        for index in self.parse_playlist_items(playlist_items):
-            for i, entry in self[index]:
-                yield i, entry
-                if not entry:
-                    continue
-                try:
-                    # The item may have just been added to archive. Don't break due to it
-                    if not self.ydl.params.get('lazy_playlist'):
-                        # TODO: Add auto-generated fields
-                        self.ydl._match_entry(entry, incomplete=True, silent=True)
-                except (ExistingVideoReached, RejectedVideoReached):
-                    return
+        try:
+            for index in self.parse_playlist_items(playlist_items):
+                for i, entry in self[index]:
+                    yield i, entry
+                    if not entry:
+                        continue
+                    try:
+                        # The item may have just been added to archive. Don't break due to it
+                        if not self.ydl.params.get('lazy_playlist'):
+                            # TODO: Add auto-generated fields
+                            self.ydl._match_entry(entry, incomplete=True, silent=True)
+                    except (ExistingVideoReached, RejectedVideoReached):
+                        return
+        finally:
+            if isinstance(self._entries, PagedList):
+                # The pages after the requested items are not needed
+                self._entries.close()
 
     def get_full_count(self):
         if self.is_exhausted and not self.is_incomplete:
@@ -4471,6 +4637,7 @@ def write_xattr(path, key, value):
         return
 
     # UNIX Method 1. Use os.setxattr/xattrs/pyxattrs modules
+    from ..dependencies import xattr
 
     setxattr = None
     if callable(getattr(os, 'setxattr', None)):
@@ -5358,6 +5525,8 @@ def __init__(self, ydl, field_preference):
         self.ydl = ydl
         self._order = []
         self.evaluate_params(self.ydl.params, field_preference)
+        # The settings are shared by all the sorters, so they are read only once
+        self._field_preferences = {field: self._compile_field_preference(field) for field in self._order}
         if ydl.params.get('verbose'):
             self.print_verbose_info(self.ydl.write_debug)
 
@@ -5483,46 +5652,61 @@ def print_verbose_info(self, write_debug):
             if self._get_field_setting(field, 'limit_text') is not None else '')
             for field in self._order if self._get_field_setting(field, 'visible')])))
 
-    def _calculate_field_preference_from_value(self, format_, field, type_, value):
-        reverse = self._get_field_setting(field, 'reverse')
-        closest = self._get_field_setting(field, 'closest')
-        limit = self._get_field_setting(field, 'limit')
+    def _compile_field_preference(self, field):
+        """Return a function that calculates the preference of a format for the field"""
+        setting = functools.partial(self._get_field_setting, field)
+        type_ = setting('type')  # extractor, boolean, ordered, field, multiple
+        reverse, closest, limit = setting('reverse'), setting('closest'), setting('limit')
+        default, is_string = setting('default'), setting('convert') == 'string'
+
+        if type_ == 'multiple':
+            type_ = 'field'  # Only 'field' is allowed in multiple for now
+            keys = tuple(self._get_field_setting(f, 'field') for f in setting('field'))
+            function = setting('function')
+            get_value = lambda format_: function(format_.get(key) for key in keys)
+        else:
+            get_value = operator.methodcaller('get', setting('field'))
 
         if type_ == 'extractor':
-            maximum = self._get_field_setting(field, 'max')
-            if value is None or (maximum is not None and value >= maximum):
-                value = -1
+            maximum = setting('max')
+            convert = lambda value: -1 if value is None or (maximum is not None and value >= maximum) else value
         elif type_ == 'boolean':
-            in_list = self._get_field_setting(field, 'in_list')
-            not_in_list = self._get_field_setting(field, 'not_in_list')
-            value = 0 if ((in_list is None or value in in_list) and (not_in_list is None or value not in not_in_list)) else -1
+            in_list, not_in_list = setting('in_list'), setting('not_in_list')
+            convert = lambda value: 0 if (
+                (in_list is None or value in in_list) and (not_in_list is None or value not in not_in_list)) else -1
         elif type_ == 'ordered':
-            value = self._resolve_field_value(field, value, True)
+            ranks = {}  # The same few codecs/extensions/protocols are seen over and over
+
+            def convert(value):
+                rank = ranks.get(value)
+                if rank is None:
+                    rank = ranks[value] = self._resolve_field_value(field, value, True)
+                return rank
+        else:
+            convert = None
 
-        # try to convert to number
-        val_num = float_or_none(value, default=self._get_field_setting(field, 'default'))
-        is_num = self._get_field_setting(field, 'convert') != 'string' and val_num is not None
-        if is_num:
-            value = val_num
+        def preference(format_):
+            value = get_value(format_)
+            if convert:
+                value = convert(value)
 
-        return ((-10, 0) if value is None
-                else (1, value, 0) if not is_num  # if a field has mixed strings and numbers, strings are sorted higher
-                else (0, -abs(value - limit), value - limit if reverse else limit - value) if closest
-                else (0, value, 0) if not reverse and (limit is None or value <= limit)
-                else (0, -value, 0) if limit is None or (reverse and value == limit) or value > limit
-                else (-1, value, 0))
+            # try to convert to number
+            val_num = float_or_none(value, default=default)
+            is_num = not is_string and val_num is not None
+            if is_num:
+                value = val_num
 
-    def _calculate_field_preference(self, format_, field):
-        type_ = self._get_field_setting(field, 'type')  # extractor, boolean, ordered, field, multiple
-        get_value = lambda f: format_.get(self._get_field_setting(f, 'field'))
-        if type_ == 'multiple':
-            type_ = 'field'  # Only 'field' is allowed in multiple for now
-            actual_fields = self._get_field_setting(field, 'field')
+            return ((-10, 0) if value is None
+                    else (1, value, 0) if not is_num  # if a field has mixed strings and numbers, strings are sorted higher
+                    else (0, -abs(value - limit), value - limit if reverse else limit - value) if closest
+                    else (0, value, 0) if not reverse and (limit is None or value <= limit)
+                    else (0, -value, 0) if limit is None or (reverse and value == limit) or value > limit
+                    else (-1, value, 0))
 
-            value = self._get_field_setting(field, 'function')(get_value(f) for f in actual_fields)
-        else:
-            value = get_value(field)
-        return self._calculate_field_preference_from_value(format_, field, type_, value)
+        return preference
+
+    def _calculate_field_preference(self, format_, field):
+        return (self._field_preferences.get(field) or self._compile_field_preference(field))(format_)
 
     def calculate_preference(self, format):
         # Determine missing protocol
@@ -5559,7 +5743,7 @@ def calculate_preference(self, format):
         if not format.get('tbr'):
             format['tbr'] = try_call(lambda: format['vbr'] + format['abr']) or None
 
-        return tuple(self._calculate_field_preference(format, field) for field in self._order)
+        return tuple(preference(format) for preference in self._field_preferences.values())
 
 
 def filesize_from_tbr(tbr, duration):
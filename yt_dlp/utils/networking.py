@@ -126,6 +126,16 @@ def clean_headers(headers: HTTPHeaderDict):
     headers.pop('Ytdl-socks-proxy', None)
 
 
+def conditional_headers(headers):
+    """The headers that revalidate a response with the given headers, e.g. when polling a manifest"""
+    conditions = {}
+    if headers.get('ETag'):
+        conditions['If-None-Match'] = headers['ETag']
+    if headers.get('Last-Modified'):
+        conditions['If-Modified-Since'] = headers['Last-Modified']
+    return conditions
+
+
 def remove_dot_segments(path):
     # Implements RFC3986 5.2.4 remote_dot_segments
     # Pseudo-code: https://tools.ietf.org/html/rfc3986#section-5.2.4